@@ -0,0 +1,273 @@
+import argparse
+import datetime
+import heapq
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+# The fixture is used unless DATABASE_URI is set, so the benchmark runs the same way offline and on any checkout
+os.environ.setdefault('DATABASE_URI', 'sqlite:///' + os.path.join(BENCHMARK_DIR, 'fixture.db'))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from mydegree import ranking
+from mydegree.data_structures import (
+    Course, Timetable, TimetablePager, compatibility_rows, count_timetables, indexed_timetables, section_table,
+    timetable_sections, viable_levels
+)
+from mydegree.session_state import PlannerState
+from benchmarks.make_fixture import FIXTURE_COURSES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PAGE_SIZE = 20 # The page size of routes.py
+REPEATS = 5 # The number of timed runs of each stage
+SEMESTER = "Winter"
+RANK_BY = "gaps" # The score of the rank and score_all stages
+
+# Times of day in minutes that synthetic sections start at, 8:35 to 19:05 in 90 minute steps
+SLOTS = list(range(8 * 60 + 35, 19 * 60 + 35, 90))
+LECTURE_LENGTH = 80
+LAB_LENGTH = 170
+
+# Afternoons blocked off in the blocked off cases, as the filters page sends them
+BLOCKED_OFF = [
+    dict(day=2, startTime=13 * 60, endTime=17 * 60),
+    dict(day=4, startTime=13 * 60, endTime=17 * 60)
+]
+
+def synthetic_combos(num_of_crses: int, lectures: int, labs: int, biweekly: float, seed: int) -> list:
+    """ This method builds section_combos for num_of_crses made up courses, each with the given number of lecture
+        sections and labs lab sections per lecture. Lectures meet on two days and labs on one, in random SLOTS.
+        The given fraction of labs is biweekly, alternating between odd and even weeks.
+    """
+    rand = random.Random(seed)
+    crn = 10000
+    section_combos = []
+
+    for crse in range(num_of_crses):
+        code = f"SYNT {1000 + crse}"
+        combos = []
+
+        for lecture in range(lectures):
+            crn += 1
+            start = rand.choice(SLOTS)
+            lecture_section = Course(crn, f"{code} {chr(ord('A') + lecture)}", code, rand.sample(range(1, 6), 2), 0, start, start + LECTURE_LENGTH)
+
+            for lab in range(labs):
+                crn += 1
+                start = rand.choice(SLOTS[:-1])
+                week = rand.choice([1, 2]) if rand.random() < biweekly else 0
+                lab_section = Course(crn, f"{code} {chr(ord('A') + lecture)}{lab + 1}", code, [rand.randint(1, 5)], week, start, start + LAB_LENGTH)
+
+                if not lecture_section.conflicts(lab_section):
+                    combos.append(Timetable([lecture_section, lab_section]))
+
+            if labs == 0:
+                combos.append(Timetable([lecture_section]))
+
+        section_combos.append(combos)
+
+    return section_combos
+
+def real_sections(courses: list, blocked_off: bool) -> dict:
+    """ This method returns the output of timetable_sections() for the given Winter courses of the database.
+    """
+    state = PlannerState(list_of_names=courses, semester=SEMESTER, blocked_off=BLOCKED_OFF if blocked_off else [])
+
+    return timetable_sections(courses, state.x_timetable(), {course: "" for course in courses}, SEMESTER)
+
+def cases(quick: bool) -> list:
+    """ This method returns the benchmark cases as (name, parameters, sections) where sections returns the output of
+        timetable_sections() for the case. The real cases use the first 3 to 8 courses of FIXTURE_COURSES, with
+        and without blocked off times, and the synthetic cases vary the number of courses, the lab fan-out and the
+        fraction of biweekly labs. With quick, only the smallest cases are run.
+    """
+    all_cases = []
+    sizes = [3, 5] if quick else range(3, 9)
+
+    for num_of_crses in sizes:
+        for blocked_off in [False, True]:
+            courses = FIXTURE_COURSES[:num_of_crses]
+            all_cases.append((
+                f"real-{num_of_crses}{'-blocked' if blocked_off else ''}",
+                dict(courses = courses, blocked_off = blocked_off),
+                lambda courses=courses, blocked_off=blocked_off: real_sections(courses, blocked_off)
+            ))
+
+    synthetic = [(3, 4, 2, 0.0), (4, 4, 4, 0.5)] if quick else [
+        (3, 4, 2, 0.0), (4, 4, 4, 0.0), (4, 4, 4, 0.5), (5, 4, 4, 0.5), (6, 3, 6, 0.5), (6, 4, 4, 1.0), (7, 4, 4, 0.5), (8, 4, 6, 0.5)
+    ]
+
+    for num_of_crses, lectures, labs, biweekly in synthetic:
+        params = dict(courses = num_of_crses, lectures = lectures, labs = labs, biweekly = biweekly, seed = num_of_crses)
+        all_cases.append((
+            f"synthetic-{num_of_crses}x{lectures}x{labs}-{int(biweekly * 100)}",
+            params,
+            lambda params=params: dict(
+                section_combos = synthetic_combos(params['courses'], params['lectures'], params['labs'], params['biweekly'], params['seed']),
+                none_list = []
+            )
+        ))
+
+    return all_cases
+
+def stages(sections: callable) -> dict:
+    """ This method returns the stages timed for a case as functions of no arguments. Each stage only does its own
+        work, except end_to_end, which does what the first /timetables/ request of a student does. score_all finds
+        the scores of the same best timetables as rank by scoring every timetable, so the two show what pruning saves.
+    """
+    built = sections()
+    section_combos = built["section_combos"]
+
+    def table():
+        table_sections, payloads = section_table(section_combos)
+        levels = viable_levels(section_combos, payloads)
+        return compatibility_rows(levels, table_sections)
+
+    def first_page():
+        return TimetablePager(dict(indexed_timetables(section_combos), **built)).page(0, PAGE_SIZE)
+
+    def enumerate_all():
+        return sum(1 for _ in indexed_timetables(section_combos)["timetables"])
+
+    def score_all():
+        # What rank would cost without pruning: every timetable is generated and scored
+        indexed = indexed_timetables(section_combos)
+        score = ranking.SCORES[RANK_BY]
+        cost = lambda indices: score.cost(Timetable([indexed["sections"][i] for i in indices]).mask)
+        return heapq.nsmallest(ranking.TOP_K, map(cost, indexed["timetables"]))
+
+    def end_to_end():
+        case_sections = sections()
+        pager = TimetablePager(dict(indexed_timetables(case_sections["section_combos"]), **case_sections))
+        return pager.page(0, PAGE_SIZE), pager.total()
+
+    return dict(
+        sections = sections,
+        table = table,
+        count = lambda: count_timetables(section_combos),
+        first_page = first_page,
+        enumerate = enumerate_all,
+        rank = lambda: ranking.top_timetables(section_combos, ranking.SCORES[RANK_BY]),
+        score_all = score_all,
+        end_to_end = end_to_end
+    )
+
+def time_stage(stage: callable, repeats: int) -> dict:
+    """ This method runs stage repeats times and returns the min and median wall time in milliseconds, then runs
+        it once more under tracemalloc for the peak memory it allocated in bytes. Memory is measured on its own
+        run because tracemalloc slows the code down.
+    """
+    times = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        stage()
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return dict(min_ms = round(min(times), 3), median_ms = round(statistics.median(times), 3), peak_bytes = peak)
+
+def run_case(sections: callable, repeats: int) -> dict:
+    built = sections()
+    result = dict(
+        sizes = [len(combos) for combos in built["section_combos"]],
+        timetables = count_timetables(built["section_combos"]),
+        stages = dict()
+    )
+
+    for name, stage in stages(sections).items():
+        result["stages"][name] = time_stage(stage, repeats)
+
+    return result
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARK_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(quick: bool = False, repeats: int = REPEATS, only: str = None) -> dict:
+    """ This method runs every benchmark case whose name contains only (all of them by default) and returns the
+        results with the commit, python and numpy versions so results of different commits can be compared.
+    """
+    results = dict(
+        commit = git_commit(),
+        python = platform.python_version(),
+        numpy = np.__version__ if np is not None else None,
+        database = os.environ['DATABASE_URI'],
+        timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        repeats = repeats,
+        cases = dict()
+    )
+
+    for name, params, sections in cases(quick):
+        if (only is None) or (only in name):
+            results["cases"][name] = dict(params = params, **run_case(sections, repeats))
+
+    return results
+
+def compare(results: dict, baseline: dict) -> list:
+    """ This method returns (case, stage, baseline ms, ms, ratio) for every stage in both results, comparing median
+        times. A ratio below 1 means the stage got faster than in baseline.
+    """
+    rows = []
+
+    for case, result in results["cases"].items():
+        for stage, timing in result["stages"].items():
+            old_timing = baseline["cases"].get(case, dict(stages = dict()))["stages"].get(stage)
+
+            if old_timing is not None:
+                ratio = timing["median_ms"] / old_timing["median_ms"] if old_timing["median_ms"] > 0 else None
+                rows.append((case, stage, old_timing["median_ms"], timing["median_ms"], ratio))
+
+    return rows
+
+def print_results(results: dict) -> None:
+    print(f"commit {results['commit']}  python {results['python']}  numpy {results['numpy']}")
+
+    for case, result in results["cases"].items():
+        print(f"\n{case}: {result['timetables']} timetables, combinations per course {result['sizes']}")
+
+        for stage, timing in result["stages"].items():
+            print(f"  {stage:<12}{timing['median_ms']:>12.2f} ms  (min {timing['min_ms']:.2f})  peak {timing['peak_bytes'] / 1024:>10.0f} KiB")
+
+def print_comparison(rows: list) -> None:
+    print(f"\n{'case':<28}{'stage':<12}{'baseline ms':>14}{'ms':>12}{'ratio':>8}")
+
+    for case, stage, old_ms, new_ms, ratio in rows:
+        print(f"{case:<28}{stage:<12}{old_ms:>14.2f}{new_ms:>12.2f}{ratio if ratio is not None else float('nan'):>8.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the timetable generator")
+    parser.add_argument('--quick', action='store_true', help="Only run the smallest cases")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="The number of timed runs of each stage")
+    parser.add_argument('--case', help="Only run the cases whose name contains this")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Compare the results with a JSON file written by --output")
+    args = parser.parse_args()
+
+    results = run(args.quick, args.repeats, args.case)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            print_comparison(compare(results, json.load(file)))
@@ -0,0 +1,46 @@
+import argparse
+import os
+import sqlite3
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SITE_DB = os.path.join(BENCHMARK_DIR, '..', 'instance', 'site.db')
+FIXTURE_DB = os.path.join(BENCHMARK_DIR, 'fixture.db')
+
+# The real course sets of the benchmark are the first 3 to 8 of these courses in the Winter semester
+FIXTURE_COURSES = [
+    'MATH 1104', 'MATH 1005', 'PHYS 1004', 'ECOR 1048', 'SYSC 2006', 'ACSE 3209', 'AFRI 1002', 'ANTH 1002'
+]
+
+def make_fixture(source: str, destination: str) -> int:
+    """ This method copies the course_data table of source, with only the sections of FIXTURE_COURSES, into a new
+        database at destination and returns the number of sections copied. The table and its indexes are created 
+        with the same SQL as in source.
+    """
+    if os.path.exists(destination):
+        os.remove(destination)
+
+    with sqlite3.connect(source) as source_db, sqlite3.connect(destination) as destination_db:
+        schema = source_db.execute(
+            "SELECT sql FROM sqlite_master WHERE tbl_name = 'course_data' AND sql IS NOT NULL ORDER BY type DESC"
+        ).fetchall()
+
+        for (sql,) in schema:
+            destination_db.execute(sql)
+
+        columns = [row[1] for row in source_db.execute('PRAGMA table_info(course_data)')]
+        rows = source_db.execute(
+            f"SELECT {', '.join(columns)} FROM course_data WHERE department || ' ' || course_number IN ({', '.join('?' * len(FIXTURE_COURSES))}) ORDER BY regst_num",
+            FIXTURE_COURSES
+        ).fetchall()
+
+        destination_db.executemany(f"INSERT INTO course_data ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+
+    return len(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the benchmark fixture database from site.db")
+    parser.add_argument('--source', default=SITE_DB, help="The database to copy the sections from")
+    parser.add_argument('--destination', default=FIXTURE_DB, help="Where to write the fixture database")
+    args = parser.parse_args()
+
+    print(f"Copied {make_fixture(args.source, args.destination)} sections to {args.destination}")
@@ -1,24 +1,25 @@
+import argparse
 import pandas as pd
 from mydegree import app, db
-from mydegree.models import CourseData
-
-# df DataFrame
-# number of rows: len(df)
-# number of columns: len(df.columns)
-# number of elements: df.size
-
-data = pd.read_excel('winter_schedule.xlsx')
-column_headers = list(data.columns)
-
-TERM = column_headers[2]
-CRN = column_headers[3]
-SUBJ = column_headers[4]
-CRSE = column_headers[5]
-SEQ = column_headers[6]
-CATALOG_TITLE = column_headers[7]
-DAYS = column_headers[18]
-START_TIME =  column_headers[19]
-END_TIME = column_headers[20]
+from mydegree.models import CourseData, section_kind, upgrade_course_data
+
+SCHEDULE_FILES = ['fall_schedule.xlsx', 'winter_schedule.xlsx']
+
+# Positions of the columns used in the schedule spreadsheets
+TERM = 2
+CRN = 3
+SUBJ = 4
+CRSE = 5
+SEQ = 6
+CATALOG_TITLE = 7
+DAYS = 18
+START_TIME = 19
+END_TIME = 20
+
+TERMS = {
+    '202330': "Fall",
+    '202410': "Winter"
+}
 
 char_to_day_num = {
     'M' : 1,
@@ -26,104 +27,264 @@ char_to_day_num = {
     'W' : 3,
     'R' : 4,
     'F' : 5,
-    'S' : 0 # Check module for possible throws
+    'S' : 0
 }
 
 biweekly_str_to_num = {'O' : 1, 'E' : 2}
 
 department_codes = [
-                      'AERO', 'ACSE', 'ARCC', 'ARCH', 'BIOC', 'BIOM'
+                      'AERO', 'ACSE', 'ARCC', 'ARCH', 'BIOC', 'BIOM',
                       'BIOL', 'CCDP', 'CDNS', 'CHEM', 'CIVE', 'COMP',
-                      'ECOR', 'ELEC', 'ENVE', 'ERTH ', 'MAAE', 'MATH',
+                      'ECOR', 'ELEC', 'ENVE', 'ERTH', 'MAAE', 'MATH',
                       'MECH', 'PHYS', 'SREE', 'SYSC'
                   ]
 
-bad_apples = []
-
-
-for i in range(len(department_codes)):
-    rows_of_courses = data[data[SUBJ] == department_codes[i]]
-
-    for j in range(len(rows_of_courses)):     
-        row = rows_of_courses.iloc[j]
-
-        term = str(int(row[TERM]))
-        crn = int(row[CRN])
-        dept_code = str(row[SUBJ])
-        crse_num = str(row[CRSE])
-        crse_section = str(row[SEQ])
-        crse_title = str(row[CATALOG_TITLE]) 
-        days = str(row[DAYS])
-
-        if (term == '202330'):
-            semester = "Fall"
-        elif (term == '202410'):
-            semester = "Winter"
-        else:
-            bad_apples.append(dept_code + ' ' + crse_num + ' ' + crse_section)
-            continue
-        
-        try:
-            start_time = str(int(row[START_TIME]))
-        except ValueError:
-            bad_apples.append(dept_code + ' ' + crse_num + ' ' + crse_section)
-            continue
-
-        try:
-            end_time = str(int(row[END_TIME]))
-        except ValueError:
-            bad_apples.append(dept_code + ' ' + crse_num + ' ' + crse_section)
-            continue
-
-        if (days == 'nan') or (start_time == 'nan') or (end_time == 'nan'):
-            bad_apples.append(dept_code + ' ' + crse_num + ' ' + crse_section)
-            continue
-
-
-        day_nums_data = []
-
-        for k in range(len(days)):
-            day_nums_data.append(char_to_day_num[days[k]])
-
-        if len(day_nums_data) == 1:
-            day_nums_data.append(None)
-
-        if (len(crse_section) == 3) and ((crse_section[2] == 'O') or (crse_section[2] == 'E')):
-            week = biweekly_str_to_num[crse_section[2]] # odd biweekly or even biweekly
-        else:
-            week = 0 # non biweekly
-
-        if len(start_time) == 3:
-            s_time = (int(start_time[0]) * 60) + int(start_time[1] + start_time[2])
-        elif len(start_time) == 4:
-            s_time = (int(start_time[0] + start_time[1]) * 60) + int(start_time[2] + start_time[3])
-        else:
-            bad_apples.append(dept_code + ' ' + crse_num + ' ' + crse_section)
-            continue
-        
-        if len(end_time) == 3:
-            e_time = (int(end_time[0]) * 60) + int(end_time[1] + end_time[2])
-        elif len(end_time) == 4:
-            e_time = (int(end_time[0] + end_time[1]) * 60) + int(end_time[2] + end_time[3])
-        else:
-            bad_apples.append(dept_code + ' ' + crse_num + ' ' + crse_section)
-            continue
-            
-        course_data = CourseData(
-            regst_num = crn,
-            course_code = dept_code + ' ' + crse_num + ' ' + crse_section,
-            course_title = crse_title,
-            semester = semester,
-            first_day = day_nums_data[0],
-            second_day = day_nums_data[1],
-            week_frequency = week,
-            start_time = s_time,
-            end_time = e_time
-        )
+def read_schedule(file: str) -> pd.DataFrame:
+    """ This method reads a schedule spreadsheet and returns the columns used by the loader under their usual names
+        (TERM, CRN, SUBJ, CRSE, SEQ, CATALOG_TITLE, DAYS, START_TIME, END_TIME), keeping only the rows of the
+        departments in department_codes.
+    """
+    positions = dict(
+        TERM = TERM, CRN = CRN, SUBJ = SUBJ, CRSE = CRSE, SEQ = SEQ, CATALOG_TITLE = CATALOG_TITLE,
+        DAYS = DAYS, START_TIME = START_TIME, END_TIME = END_TIME
+    )
+
+    data = pd.read_excel(file, usecols=list(positions.values()))
+    data.columns = list(positions.keys())
+    data = data[data['SUBJ'].astype(str).str.strip().isin(department_codes)].copy()
+    data['FILE'] = file
+
+    return data
+
+def to_minutes(times: pd.Series) -> pd.Series:
+    """ This method converts times written as HMM or HHMM (e.g. 835.0 for 8:35) into minutes. Times that are
+        missing or not three or four digits long become NaN.
+    """
+    times = pd.to_numeric(times, errors='coerce')
+    valid = (times >= 100) & (times <= 9999) & (times == times.round())
+
+    return ((times // 100) * 60 + (times % 100)).where(valid)
+
+def parse_schedule(data: pd.DataFrame) -> dict:
+    """ This method validates and converts the rows returned by read_schedule() into CourseData rows, all at once.
+        Sections with no days and no times are kept with None days and times so they show up as unscheduled 
+        courses. When the same CRN is in more than one file, the row from the last file is used.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            The rows of one or more schedule spreadsheets, in file order
+
+        Returns
+        -------
+        dict
+            The CourseData rows as records (a list of dictionaries) and the rejected rows as rejected (a
+            pd.DataFrame with the course code, CRN, file and reason for each rejected row)
+    """
+    crn = pd.to_numeric(data['CRN'], errors='coerce').astype('Int64')
+    file_num = data['FILE'].map({file: i for i, file in enumerate(data['FILE'].unique())})
+    data = data[file_num == file_num.groupby(crn.fillna(-1)).transform('max')]
+    crn = crn[data.index]
+
+    term = pd.to_numeric(data['TERM'], errors='coerce').astype('Int64').astype(str)
+    semester = term.map(TERMS)
+
+    days = data['DAYS'].astype('string').str.strip()
+    raw_start_time = pd.to_numeric(data['START_TIME'], errors='coerce')
+    raw_end_time = pd.to_numeric(data['END_TIME'], errors='coerce')
+    start_time = to_minutes(raw_start_time)
+    end_time = to_minutes(raw_end_time)
+
+    dept_code = data['SUBJ'].astype(str).str.strip()
+    raw_crse_num = pd.to_numeric(data['CRSE'], errors='coerce')
+    whole_crse_num = raw_crse_num == raw_crse_num.round()
+    # Numbers read as floats (2310.0) are written as integers; anything else is kept as written for the rejected rows
+    crse_num = raw_crse_num.where(whole_crse_num).astype('Int64').astype(str).where(whole_crse_num, data['CRSE'].astype(str).str.strip())
+    crse_section = data['SEQ'].astype(str).str.strip()
+    course_code = dept_code + ' ' + crse_num + ' ' + crse_section
+
+    num_missing = days.isna().astype(int) + raw_start_time.isna().astype(int) + raw_end_time.isna().astype(int)
+    unscheduled = num_missing == 3
+
+    # The first failing check is the reason a row is rejected
+    checks = [
+        ("unknown term", semester.isna()),
+        ("missing CRN", crn.isna()),
+        ("bad course number", ~whole_crse_num),
+        ("incomplete meeting time", (num_missing != 0) & ~unscheduled),
+        ("unknown day", ~unscheduled & ~days.fillna('').str.fullmatch(r'[MTWRFS]+')),
+        ("bad start time", ~unscheduled & start_time.isna()),
+        ("bad end time", ~unscheduled & end_time.isna()),
+        ("duplicate CRN", crn.duplicated(keep='first')),
+    ]
+
+    reason = pd.Series(None, index=data.index, dtype=object)
+
+    for description, failed in checks:
+        failed = failed.fillna(True).astype(bool)
+        reason = reason.mask(reason.isna() & failed, description)
+
+    accepted = reason.isna()
+
+    rejected = pd.DataFrame(dict(
+        course_code = course_code[~accepted],
+        crn = crn[~accepted],
+        file = data['FILE'][~accepted],
+        reason = reason[~accepted]
+    )).reset_index(drop=True)
+
+    days = days[accepted]
+    # Only two meeting days fit in CourseData, so a third day (e.g. F of MWF) is dropped as before
+    first_day = days.str[0].map(char_to_day_num)
+    second_day = days.str[1].map(char_to_day_num)
+
+    crse_section = crse_section[accepted]
+    week = crse_section.str[2].map(biweekly_str_to_num).where(crse_section.str.len() == 3).fillna(0).astype(int)
+
+    rows = pd.DataFrame(dict(
+        regst_num = crn[accepted].astype(int),
+        course_code = course_code[accepted],
+        course_title = data['CATALOG_TITLE'][accepted].astype(str),
+        semester = semester[accepted],
+        first_day = first_day.astype('Int64'),
+        second_day = second_day.astype('Int64'),
+        week_frequency = week,
+        start_time = start_time[accepted].astype('Int64'),
+        end_time = end_time[accepted].astype('Int64'),
+        department = dept_code[accepted],
+        course_number = crse_num[accepted],
+        section = crse_section,
+        section_kind = crse_section.map(section_kind)
+    ))
+
+    records = rows.astype(object).where(rows.notna(), None).to_dict('records')
+
+    return dict(records = records, rejected = rejected)
+
+def diff_schedules(records: list, existing: list, semesters: list) -> dict:
+    """ This method compares the incoming CourseData rows with the rows already in the database by CRN.
+
+        Parameters
+        ----------
+        records : list
+            The incoming CourseData rows as dictionaries
+        existing : list
+            The CourseData rows in the database as dictionaries
+        semesters : list
+            The semesters being loaded. Only existing rows of these semesters and of the departments in 
+            department_codes can be removed.
+
+        Returns
+        -------
+        dict
+            The rows to insert as added, the rows to update as changed and the existing rows to delete as removed
+    """
+    existing_by_crn = {row['regst_num']: row for row in existing}
+    incoming_crns = {record['regst_num'] for record in records}
+
+    added = []
+    changed = []
+
+    for record in records:
+        old_row = existing_by_crn.get(record['regst_num'])
+
+        if old_row is None:
+            added.append(record)
+        elif any(old_row[column] != value for column, value in record.items()):
+            changed.append(record)
+
+    removed = [
+        row for row in existing 
+        if (row['semester'] in semesters) and (row['department'] in department_codes) and (row['regst_num'] not in incoming_crns)
+    ]
+
+    return dict(added = added, changed = changed, removed = removed)
+
+def load_schedules(files: list, upsert: bool = False) -> dict:
+    """ This method reads, validates and loads the given schedule spreadsheets in a single transaction, so the web
+        app never sees a half-loaded table. By default the sections of department_codes in every semester found in 
+        the files are replaced by the new rows with one bulk insert. With upsert, the new rows are compared with the database by CRN and only the 
+        sections that were added, changed or removed are written.
+
+        Parameters
+        ----------
+        files : list
+            The paths of the schedule spreadsheets
+        upsert : bool
+            True to only write the differences, False (default) to replace the semesters
+
+        Returns
+        -------
+        dict
+            The CourseData rows loaded as records and the rejected rows as rejected (see parse_schedule()), and the 
+            differences as added, changed and removed (see diff_schedules())
+    """
+    data = pd.concat([read_schedule(file) for file in files], ignore_index=True)
+    parsed = parse_schedule(data)
+    semesters = sorted({record['semester'] for record in parsed['records']})
+
+    with app.app_context():
+        upgrade_course_data()
+
+        with db.session.begin():
+            existing = [dict(row) for row in db.session.execute(db.select(CourseData.__table__)).mappings()]
+            changes = diff_schedules(parsed['records'], existing, semesters)
+
+            if upsert:
+                if len(changes['removed']) != 0:
+                    removed_crns = [row['regst_num'] for row in changes['removed']]
+                    db.session.execute(db.delete(CourseData).where(CourseData.regst_num.in_(removed_crns)))
+                if len(changes['changed']) != 0:
+                    db.session.execute(db.update(CourseData), changes['changed'])
+                if len(changes['added']) != 0:
+                    db.session.execute(db.insert(CourseData), changes['added'])
+            else:
+                db.session.execute(db.delete(CourseData).where(
+                    (CourseData.semester.in_(semesters) & CourseData.department.in_(department_codes)) 
+                    | CourseData.regst_num.in_([record['regst_num'] for record in parsed['records']])
+                ))
+
+                if len(parsed['records']) != 0:
+                    db.session.execute(db.insert(CourseData), parsed['records'])
+
+    return dict(parsed, **changes)
+
+def print_report(loaded: dict) -> None:
+    records = loaded['records']
+    rejected = loaded['rejected']
+
+    print(f"Loaded {len(records)} sections")
+    print(f"Rejected {len(rejected)} sections")
+
+    if len(rejected) != 0:
+        print(rejected.groupby('reason').size().to_string())
+        print(rejected.to_string(index=False))
+
+    summary = pd.DataFrame(
+        [(row['department'], change) for change in ['added', 'changed', 'removed'] for row in loaded[change]],
+        columns=['department', 'change']
+    )
+
+    if len(summary) == 0:
+        print("No sections added, changed or removed")
+    else:
+        print(pd.crosstab(summary['department'], summary['change']).to_string())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load schedule spreadsheets into the CourseData table")
+    parser.add_argument('files', nargs='*', default=SCHEDULE_FILES, help="The schedule spreadsheets to load")
+    parser.add_argument('--rejected', help="Write the rejected rows to this CSV file")
+    parser.add_argument('--upsert', action='store_true', help="Only write the sections that were added, changed or removed")
+    parser.add_argument('--upgrade-db', action='store_true', help="Only bring a CourseData table made by an older version up to date")
+    args = parser.parse_args()
 
+    if args.upgrade_db:
         with app.app_context():
-            db.create_all()
-            db.session.add(course_data)
-            db.session.commit()
+            upgrade_course_data()
+        print("CourseData is up to date")
+    else:
+        loaded = load_schedules(args.files, upsert=args.upsert)
+        print_report(loaded)
 
-print(bad_apples)
+        if args.rejected:
+            loaded['rejected'].to_csv(args.rejected, index=False)
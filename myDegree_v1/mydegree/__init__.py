@@ -1,10 +1,27 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URI', 'sqlite:///site.db') # Relative SQLite paths are in the instance folder
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = 'd84f0f3710e816a2e56e7e3cd7582dac'
+app.config['PLANNER_STATE_STORE'] = os.environ.get('PLANNER_STATE_STORE', 'memory') # memory or sqlite (see session_state.py)
+app.config['PLANNER_STATE_ENTRIES'] = 1000 # The most students whose state (or timetables, with sqlite) is kept in memory
+app.config['PLANNER_STATE_TTL'] = 24 * 60 * 60 # Seconds a student's state is kept in memory after their last request
+app.config['TIMETABLE_CACHE_ENTRIES'] = 128 # The most timetable requests kept by timetable_cache.py
+app.config['TIMETABLE_CACHE_BYTES'] = 64 * 1024 * 1024 # About how much memory their timetables may use
+app.config['PARALLEL_WORKERS'] = int(os.environ.get('PARALLEL_WORKERS', 0)) # Processes to enumerate timetables with (see parallel.py), 0 or 1 to stay in-process
+app.config['PARALLEL_THRESHOLD'] = 200000 # The smallest search worth sending to the processes
+app.config['REQUEST_TIMING'] = os.environ.get('REQUEST_TIMING', '1') == '1' # Send Server-Timing headers and log request timings (see instrumentation.py)
+app.config['PROFILE_THRESHOLD_MS'] = float(os.environ.get('PROFILE_THRESHOLD_MS', 0)) # Save a cProfile of requests slower than this, 0 to not profile
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR') # Where profiles are saved, profiles in the instance folder by default
+app.config['RESPONSE_COMPRESSION'] = os.environ.get('RESPONSE_COMPRESSION', '1') == '1' # Compress HTML, JSON, CSS and JS responses (see responses.py)
+app.config['COMPRESS_MIN_BYTES'] = 1024 # Smaller responses are sent as they are since compressing them saves little
 db = SQLAlchemy(app)
 
-from mydegree import routes
\ No newline at end of file
+from mydegree import instrumentation, responses
+from mydegree import routes
+from mydegree.program_data import preload
+
+preload()
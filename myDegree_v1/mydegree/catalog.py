@@ -0,0 +1,125 @@
+import os
+import threading
+from typing import Dict, List, Tuple
+from mydegree import app, db
+from mydegree.models import CourseData, LECTURE, LAB, TUTORIAL, section_kind
+from mydegree import data_structures, instrumentation
+
+def course_key(course_name: str) -> Tuple[str, str]:
+    """ This method returns the (department, number) key of a course name such as "SYSC 2004".
+    """
+    parts = course_name.split()
+
+    if len(parts) < 2:
+        return (course_name, "")
+    return (parts[0], parts[1])
+
+class CourseSections:
+    """ This class holds all the sections of one course in one semester.
+
+        Attributes
+        ----------
+        sections : list
+            Tuples of the section (e.g. L1), its kind (see models.section_kind) and its Course object, in
+            database order
+        lectures : list
+            The Course objects of the lecture sections
+        labs : list
+            The Course objects of the lab and tutorial sections
+        labs_by_letter : dict
+            The Course objects of the lab and tutorial sections keyed by their first section letter
+    """
+    def __init__(self):
+        self.sections = []
+        self.lectures = []
+        self.labs = []
+        self.labs_by_letter = dict()
+
+    def add(self, section: str, course: 'data_structures.Course', kind: str = None) -> None:
+        if kind is None:
+            kind = section_kind(section)
+            
+        self.sections.append((section, kind, course))
+
+        if kind == LECTURE:
+            self.lectures.append(course)
+        elif (kind == LAB) or (kind == TUTORIAL):
+            self.labs.append(course)
+            self.labs_by_letter.setdefault(section[0], []).append(course)
+
+class SectionCatalog:
+    """ This class is a process-wide, in-memory copy of the CourseData table. All the rows of a semester are
+        loaded with one query the first time the semester is needed and indexed by (department, number). The
+        whole catalog is dropped whenever the database file changes, so a reload with excel_to_sql.py is picked
+        up on the next request.
+
+        Methods
+        -------
+        semester(semester : str)
+            Returns the CourseSections objects of every course offered in the semester keyed by (department, number)
+        course_sections(course_name : str, semester : str)
+            Returns the CourseSections object of the course, which is empty if the course is not offered
+        section_letters(course_name : str, semester : str)
+            Returns the sections (e.g. A, L1) of the course in database order
+        version()
+            Returns the modification time and size of the database file, which change whenever CourseData does
+        refresh()
+            Drops all loaded semesters
+    """
+    def __init__(self):
+        self._semesters = dict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def version(self) -> tuple:
+        with app.app_context():
+            path = db.engine.url.database
+
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @instrumentation.timed_function('catalog_load')
+    def _load(self, semester: str) -> Dict[Tuple[str, str], 'catalog.CourseSections']:
+        courses = dict()
+
+        with app.app_context():
+            rows = CourseData.query.filter(CourseData.semester == semester, CourseData.department.isnot(None)).order_by(CourseData.regst_num).all()
+
+            for course_data_obj in rows:
+                courses.setdefault((course_data_obj.department, course_data_obj.course_number), CourseSections()).add(
+                    course_data_obj.section, 
+                    data_structures.db_model_to_data_struct(course_data_obj), 
+                    course_data_obj.section_kind
+                )
+
+        instrumentation.count('catalog_rows', len(rows))
+        return courses
+
+    def semester(self, semester: str) -> Dict[Tuple[str, str], 'catalog.CourseSections']:
+        version = self.version()
+
+        with self._lock:
+            if version != self._version:
+                self._semesters.clear()
+                self._version = version
+
+            if semester not in self._semesters:
+                self._semesters[semester] = self._load(semester)
+
+            return self._semesters[semester]
+
+    def course_sections(self, course_name: str, semester: str) -> 'catalog.CourseSections':
+        return self.semester(semester).get(course_key(course_name), CourseSections())
+
+    def section_letters(self, course_name: str, semester: str) -> List[str]:
+        return [section for section, _, _ in self.course_sections(course_name, semester).sections]
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._semesters.clear()
+            self._version = None
+
+section_catalog = SectionCatalog()
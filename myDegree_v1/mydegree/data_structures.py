@@ -1,10 +1,84 @@
+import itertools
+import math
 import re
-from typing import List
-from mydegree import app, db
-from mydegree.models import CourseData
+import sys
+import threading
+import zlib
+from typing import Iterator, List
+
+try:
+    import numpy as np
+except ImportError: # NumPy only speeds up conflict_matrix()
+    np = None
+
+from mydegree import app, catalog, instrumentation, parallel
+from mydegree.models import OTHER
+
+MINS_PER_DAY = 24 * 60 # One bit per minute of the day, so touching start/end times still overlap as before
+NUM_OF_DAYS = 7 # Room for day 0 (Saturday in excel_to_sql.py) through day 6
+WEEK_BITS = MINS_PER_DAY * NUM_OF_DAYS # The bits needed for one week of the occupancy mask
+WEEK_FULL = (1 << WEEK_BITS) - 1
+ODD_WEEK = 1
+EVEN_WEEK = 2
+ITER_PAGE_SIZE = 100 # The number of timetables a TimetablePager generates at a time when iterated over
+
+def occupancy_mask(days: list, week: int, start_time: int, end_time: int) -> int:
+    """ This method returns the occupancy mask of a meeting. The low WEEK_BITS bits are the minutes
+        occupied in odd weeks and the next WEEK_BITS bits are the minutes occupied in even weeks. Two
+        meetings conflict exactly when the bitwise AND of their masks is non-zero.
+    
+        Parameters
+        ----------
+        days : list
+            The days of the week the meeting occurs. A None first day means the meeting never conflicts
+            and a None later day stands for every day.
+        week : int
+            The week frequency. 0 if every week. 1 for odd biweekly. 2 for even biweekly.
+        start_time : int
+            The start time of the meeting in minutes. None means the meeting never conflicts.
+        end_time : int
+            The end time of the meeting in minutes
+            
+        Returns
+        -------
+        int
+            The occupancy mask
+    """
+    if (len(days) == 0) or (days[0] is None) or (start_time is None) or (end_time is None):
+        return 0
+        
+    if None in days:
+        days = range(NUM_OF_DAYS)
+    
+    start_time = max(math.ceil(start_time), 0) # Blocked off times from the browser may be floats
+    end_time = min(math.floor(end_time), MINS_PER_DAY - 1)
+    
+    if end_time < start_time:
+        return 0
+        
+    span = ((1 << (end_time - start_time + 1)) - 1) << start_time
+    mask = 0
+    
+    for day in days:
+        mask |= span << (int(day) * MINS_PER_DAY)
+    
+    if week == ODD_WEEK:
+        return mask
+    elif week == EVEN_WEEK:
+        return mask << WEEK_BITS
+    else:
+        return mask | (mask << WEEK_BITS)
+
+def any_week(mask: int) -> int:
+    """ This method folds the odd and even halves of an occupancy mask together so that the week
+        frequency is ignored, as is done when checking against blocked off times.
+    """
+    return (mask | (mask >> WEEK_BITS)) & WEEK_FULL
 
 class Course:
-    """ This class represents a Carleton University course to be scheduled in a timetable.
+    """ This class represents a Carleton University course to be scheduled in a timetable. Course objects are
+        immutable and use __slots__ since every section in the catalog is one. The code and title are interned
+        so sections of the same course share them.
     
         Attributes
         ----------
@@ -15,9 +89,11 @@ class Course:
             course section
         title : str
             The title of the course
-        days : list
-            A list of numbers (1-5) representing the days of the week the course's 
-            meetings occur
+        day_mask : int
+            Bit d is set for every day d (1-5) the course's meetings occur. 0 if the days are unknown.
+        days : tuple
+            The numbers of the days of the week the course's meetings occur, in order, or (None,)
+            if the days are unknown
         week : int
             The week frequency of the course. 0 if every week. 1 for odd biweekly.
             2 for even biweekly.
@@ -25,6 +101,8 @@ class Course:
             The start time of the course's meetings in minutes
         end_time : int
             The end time of the course's meetings in minutes
+        mask : int
+            The occupancy mask of the course's meetings. See occupancy_mask()
             
         Methods
         -------
@@ -38,27 +116,42 @@ class Course:
         biweekly_separate(other : 'data_structures.Course')
             Returns true if the week values of other and self are 1 or 2 respectively
             without loss of generality
+        conflicts(other : 'data_structures.Course')
+            Returns true if other can not be on the same timetable as self. This is 
+            equivalent to same_day, separate_class_times and biweekly_separate combined.
+        to_dict()
+            Returns a dictionary representation of the course that can be turned into JSON
     """
+    __slots__ = ('crn', 'code', 'title', 'day_mask', 'week', 'start_time', 'end_time', 'mask')
+
     def __init__(self, crn, code, title, days, week, start_time, end_time):
-        self.crn = crn
-        self.code = code
-        self.title = title  
-        self.days = days
-        self.week = week
-        self.start_time = start_time 
-        self.end_time = end_time
+        set_attribute = super().__setattr__
+        set_attribute('crn', crn)
+        set_attribute('code', sys.intern(code))
+        set_attribute('title', sys.intern(title))
+        set_attribute('day_mask', day_mask(days))
+        set_attribute('week', week)
+        set_attribute('start_time', start_time)
+        set_attribute('end_time', end_time)
+        set_attribute('mask', occupancy_mask(days, week, start_time, end_time))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Course objects can not be changed ({name})")
+
+    def __reduce__(self):
+        return (Course, (self.crn, self.code, self.title, list(self.days), self.week, self.start_time, self.end_time))
 
     def __repr__(self):
         return self.code
 
+    @property
+    def days(self):
+        if self.day_mask == 0:
+            return (None,)
+        return tuple(day for day in range(NUM_OF_DAYS) if self.day_mask & (1 << day))
+
     def same_day(self, other):
-        if (self.days[0] is None) or (other.days[0] is None):
-            return False
-        for day in self.days:
-            for other_day in other.days:
-                if (day == other_day) or (day is None) or (other_day is None):
-                    return True
-        return False
+        return (self.day_mask & other.day_mask) != 0
                 
     def separate_class_times(self, other):
         if (self.start_time is None) or (other.start_time is None):
@@ -67,6 +160,35 @@ class Course:
 
     def biweekly_separate(self, other):
         return (self.week != 0) and (other.week != 0) and (self.week != other.week)
+
+    def conflicts(self, other):
+        return (self.mask & other.mask) != 0
+
+    def to_dict(self):
+        return {
+            "crn": self.crn,
+            "code": self.code,
+            "title": self.title,
+            "days": list(self.days),
+            "week": self.week,
+            "start_time": self.start_time,
+            "end_time": self.end_time
+        }
+
+def day_mask(days: list) -> int:
+    """ This method turns a list of days into a Course day mask. As in occupancy_mask(), a None first day means 
+        the days are unknown and a None later day stands for every day.
+    """
+    if (len(days) == 0) or (days[0] is None):
+        return 0
+    if None in days:
+        return (1 << NUM_OF_DAYS) - 1
+    
+    mask = 0
+    
+    for day in days:
+        mask |= 1 << int(day)
+    return mask
     
 class Timetable:
     """ This class represents a timetable scheduled with Carleton University courses.
@@ -75,6 +197,8 @@ class Timetable:
         ----------
         courses : list
             A list of Course objects representing the courses on the timetable
+        mask : int
+            The union of the occupancy masks of all the courses on the timetable
 
         Methods
         -------
@@ -94,6 +218,10 @@ class Timetable:
     """
     def __init__(self, courses: List['data_structures.Course']):
         self.courses = courses
+        self.mask = 0
+        
+        for course in courses:
+            self.mask |= course.mask
 
     def __repr__(self) -> str:
         return str(self.courses)
@@ -110,70 +238,38 @@ class Timetable:
         return sum_timetable
         
     def add_course(self, new_course: 'data_structures.Course') -> bool:
-        if len(self.courses) == 0:
-            self.courses.append(new_course)
-            return True
-            
-        add_to_list = False
-        
-        for course in self.courses:
-            if not course.same_day(new_course):
-                add_to_list = True
-            else:
-                if course.separate_class_times(new_course):
-                    add_to_list = True
-                else:
-                    if course.biweekly_separate(new_course):
-                        add_to_list = True
-                    else:
-                        add_to_list = False
-                        break
+        add_to_list = (self.mask & new_course.mask) == 0
 
         if add_to_list:
             self.courses.append(new_course)
+            self.mask |= new_course.mask
         else:
-            print(f'{new_course} can not be added to time table {self}') # at the end '..time table t1' for example where t1 is the variable assigned the Timetable object
+            app.logger.debug('%s can not be added to time table %s', new_course, self)
             
         return add_to_list
         
     def x_add_course(self, new_course: 'data_structures.Course', x_timetable: 'data_structures.Timetable') -> bool:
         if len(self.courses) == 0:
             self.courses.append(new_course)
+            self.mask |= new_course.mask
             return True
-            
-        add_to_list = False
         
-        for course in self.courses:
-            if not course.same_day(new_course):
-                add_to_list = True
-            else:
-                if course.separate_class_times(new_course):
-                    add_to_list = True
-                else:
-                    if course.biweekly_separate(new_course):
-                        add_to_list = True
-                    else:
-                        add_to_list = False
-                        break
-        
-        for course in x_timetable.courses:
-            if not course.same_day(new_course):
-                add_to_list = True
-            else:
-                if course.separate_class_times(new_course):
-                    add_to_list = True
-                else:
-                    add_to_list = False
-                    break
+        # As before, when there are blocked off times they alone decide whether new_course is added
+        if len(x_timetable.courses) != 0:
+            add_to_list = (any_week(x_timetable.mask) & any_week(new_course.mask)) == 0
+        else:
+            add_to_list = (self.mask & new_course.mask) == 0
                         
         if add_to_list:
             self.courses.append(new_course)
+            self.mask |= new_course.mask
         else:
-            print(f'{new_course} can not be added to time table {self}') # at the end '..time table t1' for example where t1 is the variable assigned the Timetable object
+            app.logger.debug('%s can not be added to time table %s', new_course, self)
             
         return add_to_list
         
 
+@instrumentation.timed_function('get_sections')
 def get_sections(course_name: str, semester: str) -> List[str]:
     """ This method returns a list of course sections for a course in a given semester.
     
@@ -189,16 +285,7 @@ def get_sections(course_name: str, semester: str) -> List[str]:
         List[str]
             The course sections found
     """
-    section_letters = []
-    SECTION_LETTER = 2
-    
-    with app.app_context():
-        all_sections = CourseData.query.filter(CourseData.course_code.op('regexp')(r'' + course_name), CourseData.semester == semester).all()
-        
-    for course_data_obj in all_sections:
-        section_letters.append(course_data_obj.course_code.split()[SECTION_LETTER])
-        
-    return section_letters
+    return catalog.section_catalog.section_letters(course_name, semester)
         
 def db_model_to_data_struct(db_model: 'models.CourseData') -> 'data_structures.Course':
     """ This method converts a CourseData object to a Course object. In data_structures.all_timetables,
@@ -234,67 +321,301 @@ def db_model_to_data_struct(db_model: 'models.CourseData') -> 'data_structures.C
         end_time=db_model.end_time
     )
 
-def merge_crses(first: List['data_structures.Timetable'], second: List['data_structures.Timetable']) -> List['data_structures.Timetable']:
-    """ This method implements an algorithm to combine two lists of timetable objects into one. This method is recursively called
-        by recursive_merge().
+def backtrack_timetables(section_combos: List[List['data_structures.Timetable']]) -> Iterator['data_structures.Timetable']:
+    """ This method implements a depth-first backtracking search over the lecture and lab combinations of each course. One 
+        combination is placed per course at a time and a branch is abandoned on its first conflict, so partial timetables 
+        are never materialized. Courses with the fewest viable combinations are placed first. It is a helper method for 
+        all_timetables().
 
         Parameters
         ----------
-        first : list
-            A list of Timetable objects
-        second : list
-            A list of Timetable objects
+        section_combos : list
+            A two-dimensional list of Timetable objects. Each inner list holds the lecture and lab combinations of one course.
             
+        Yields
+        ------
+        data_structures.Timetable
+            Every possible Timetable object containing all course names, with the courses in the order of section_combos
+    """
+    timetables = indexed_timetables(section_combos)
+    
+    for indices in timetables["timetables"]:
+        yield Timetable([timetables["sections"][index] for index in indices])
+
+def viable_levels(section_combos: List[List['data_structures.Timetable']], payloads: Iterator[list]) -> list:
+    """ This method returns the levels searched by search_levels(): one (course index, viable combinations) pair per
+        course, with the courses that have the fewest viable combinations first. A viable combination is a 
+        (mask, payload) pair for a combination whose courses do not conflict with each other. It returns an empty list
+        if a course has no viable combination.
+
+        Parameters
+        ----------
+        section_combos : list
+            A two-dimensional list of Timetable objects. Each inner list holds the lecture and lab combinations of one course.
+        payloads : iterable
+            For each course, the payloads of its combinations, which search_levels() puts together into timetables 
+            (e.g. the Course objects of each combination)
+
         Returns
         -------
         list
-            A list of Timetable objects
+            The levels to search
     """
-    merger = []
+    levels = []
     
-    for first_timetable in first:
-        for second_timetable in second:
-            new_timetable = Timetable([])
-            new_timetable = new_timetable + first_timetable
-
-            if len(second_timetable.courses) == 1:
-                if not new_timetable.add_course(second_timetable.courses[0]):
-                    continue
-                merger.append(new_timetable)
+    for i, (combos, combo_payloads) in enumerate(zip(section_combos, payloads)):
+        viable = []
+        
+        for combo, payload in zip(combos, combo_payloads):
+            combo_mask = 0
+            
+            for course in combo.courses:
+                if combo_mask & course.mask:
+                    break
+                combo_mask |= course.mask
             else:
-                if (not new_timetable.add_course(second_timetable.courses[0])) or (not new_timetable.add_course(second_timetable.courses[1])):
-                    continue
-                merger.append(new_timetable)
+                viable.append((combo_mask, payload))
+                
+        if len(viable) == 0:
+            return []
+            
+        levels.append((i, viable))
+        
+    levels.sort(key=lambda level: len(level[1]))
+    return levels
+
+def search_levels(levels: list, num_of_crses: int, rows: List[int], first: range = None, combos: int = None) -> Iterator[list]:
+    """ This method is the backtracking search of backtrack_timetables() over levels returned by viable_levels(). It
+        yields the payloads of the combinations of each timetable one after the other, in course order. If first is
+        given only the combinations at those positions of the first level are tried, so the search can be split up.
+        If combos is given only the combinations whose bits are set in it are used (see narrow_timetables()).
+
+        The combinations are numbered in level order and rows (see compatibility_rows()) gives, for each one, the 
+        bits of the combinations it does not conflict with. The combinations still allowed at each depth are kept 
+        as the bitwise AND of the rows of the combinations chosen so far, so trying a combination is a single small
+        AND instead of a test against every course already placed. A branch is also abandoned as soon as a later
+        course has no allowed combination left.
+    """
+    if len(levels) == 0:
+        return
+    
+    payloads = [payload for _, viable in levels for _, payload in viable]
+    level_bits = levels_bits(levels)
+    
+    chosen = [None] * num_of_crses
+    allowed = [0] * (num_of_crses + 1)
+    candidates = [0] * num_of_crses
+    allowed[0] = (1 << len(payloads)) - 1 if combos is None else combos
+    candidates[0] = level_bits[0] & allowed[0]
+    
+    if first is not None:
+        candidates[0] &= ((1 << first.stop) - 1) ^ ((1 << first.start) - 1)
+    
+    depth = 0
+    
+    while depth >= 0:
+        if candidates[depth] == 0:
+            depth -= 1
+            continue
+        
+        lowest = candidates[depth] & -candidates[depth]
+        candidates[depth] ^= lowest
+        combo = lowest.bit_length() - 1
+        chosen[levels[depth][0]] = payloads[combo]
+        
+        if depth == num_of_crses - 1:
+            yield [item for payload in chosen for item in payload]
+            continue
+        
+        next_allowed = allowed[depth] & rows[combo]
+        
+        if all(next_allowed & level_bits[later] for later in range(depth + 1, num_of_crses)):
+            depth += 1
+            allowed[depth] = next_allowed
+            candidates[depth] = next_allowed & level_bits[depth]
+
+def levels_bits(levels: list) -> List[int]:
+    """ This method returns, for each level, the bits of its combinations numbered in level order.
+    """
+    bits = []
+    offset = 0
+    
+    for _, viable in levels:
+        bits.append(((1 << len(viable)) - 1) << offset)
+        offset += len(viable)
+        
+    return bits
+
+def count_levels(levels: list, num_of_crses: int, rows: List[int], first: range = None) -> int:
+    """ This method returns the number of timetables search_levels() would yield without generating them. The 
+        number of ways to place the remaining courses only depends on which of their combinations are still 
+        allowed, so it is computed once for each such state and reused (dynamic programming over the course order 
+        and the allowed combinations). The last course adds as many timetables as it has allowed combinations.
+        As with search_levels(), first limits the combinations of the first level that are tried.
+    """
+    if len(levels) == 0:
+        return 0
+    
+    level_bits = levels_bits(levels)
+    later_bits = [0] * (num_of_crses + 1)
+    
+    for depth in range(num_of_crses - 1, -1, -1):
+        later_bits[depth] = later_bits[depth + 1] | level_bits[depth]
+    
+    counts = dict()
+    
+    def count(depth: int, allowed: int) -> int:
+        if depth == num_of_crses - 1:
+            return (allowed & level_bits[depth]).bit_count()
+        
+        key = (depth, allowed & later_bits[depth])
+        
+        if key not in counts:
+            total = 0
+            candidates = allowed & level_bits[depth]
+            
+            while candidates:
+                lowest = candidates & -candidates
+                candidates ^= lowest
+                total += count(depth + 1, allowed & rows[lowest.bit_length() - 1])
+                
+            counts[key] = total
+            
+        return counts[key]
+    
+    allowed = later_bits[0]
+    
+    if first is not None:
+        allowed &= ~level_bits[0] | (((1 << first.stop) - 1) ^ ((1 << first.start) - 1))
+    
+    return count(0, allowed)
 
-    return merger
+def conflict_matrix(sections: List['data_structures.Course']) -> 'numpy.ndarray':
+    """ This method returns a boolean matrix with True at [i, j] when sections i and j conflict, built with NumPy
+        broadcasting over the day masks, start and end times and week frequencies of the sections. It matches
+        Course.conflicts() (touching start and end times overlap). It returns None if NumPy is not installed.
+    """
+    if np is None:
+        return None
+    
+    scheduled = np.array([course.mask != 0 for course in sections], dtype=bool)
+    days = np.array([course.day_mask for course in sections], dtype=np.int64)
+    # As in occupancy_mask(), times are rounded inwards and kept within the day
+    start_time = np.array([course.start_time if course.mask != 0 else 0 for course in sections], dtype=float)
+    end_time = np.array([course.end_time if course.mask != 0 else 0 for course in sections], dtype=float)
+    start_time = np.maximum(np.ceil(start_time), 0)
+    end_time = np.minimum(np.floor(end_time), MINS_PER_DAY - 1)
+    weeks = np.array([ODD_WEEK if course.week == ODD_WEEK else EVEN_WEEK if course.week == EVEN_WEEK else ODD_WEEK | EVEN_WEEK for course in sections], dtype=np.int64)
+    
+    return (
+        (scheduled[:, None] & scheduled[None, :])
+        & ((days[:, None] & days[None, :]) != 0)
+        & (start_time[:, None] <= end_time[None, :])
+        & (start_time[None, :] <= end_time[:, None])
+        & ((weeks[:, None] & weeks[None, :]) != 0)
+    )
 
-def recursive_merge(num_of_crses: int, section_combos: List[List['data_structures.Timetable']]) -> List['data_structures.Timetable']:
-    """ This method implements an algorithm to recursively combine all the lists of timetables in the the given list to one list
-        of all possible timetables. It is a helper method for all_timetables().
+def compatibility_rows(levels: list, sections: List['data_structures.Course']) -> List[int]:
+    """ This method returns the rows search_levels() needs for levels whose payloads are section indices into sections.
+        Row i has bit j set when combinations i and j, numbered in level order, have no conflicting sections. With 
+        NumPy the section conflicts come from conflict_matrix() and are combined into combination conflicts with one
+        matrix product. Without it the occupancy masks of every pair of combinations are compared.
+    """
+    combos = [(combo_mask, payload) for _, viable in levels for combo_mask, payload in viable]
+    conflicts = conflict_matrix(sections)
+    
+    if conflicts is None:
+        return [sum(1 << j for j, (other_mask, _) in enumerate(combos) if (combo_mask & other_mask) == 0) for combo_mask, _ in combos]
+    
+    membership = np.zeros((len(combos), len(sections)), dtype=np.int32)
+    
+    for i, (_, payload) in enumerate(combos):
+        membership[i, list(payload)] = 1
+    
+    compatible = (membership @ conflicts.astype(np.int32) @ membership.T) == 0
+    packed = np.packbits(compatible, axis=1, bitorder='little')
+    
+    return [int.from_bytes(row.tobytes(), 'little') for row in packed]
+
+def section_table(section_combos: List[List['data_structures.Timetable']]) -> tuple:
+    """ This method numbers the Course objects of section_combos so timetables can be kept as small tuples of section
+        indices instead of lists of Course objects.
 
         Parameters
         ----------
-        num_of_crses : int
-            The number of course names
         section_combos : list
-            A two-dimensional list of Timetable objects
-            
+            A two-dimensional list of Timetable objects. Each inner list holds the lecture and lab combinations of one course.
+
         Returns
         -------
-        list
-            A list of all possible Timetable objects containing all course names
+        tuple
+            The section table (a list of every Course object once) and, for each course, the section indices of each
+            of its combinations, which can be given to viable_levels() as payloads
     """
-    if num_of_crses == 0:
-        return []
-    elif num_of_crses == 1:
-        return section_combos[0]
+    sections = []
+    index_of = dict()
+    payloads = []
+
+    for combos in section_combos:
+        course_payloads = []
+
+        for combo in combos:
+            indices = []
+
+            for course in combo.courses:
+                if id(course) not in index_of:
+                    index_of[id(course)] = len(sections)
+                    sections.append(course)
+                indices.append(index_of[id(course)])
+
+            course_payloads.append(tuple(indices))
+
+        payloads.append(course_payloads)
+
+    return sections, payloads
+
+def indexed_timetables(section_combos: List[List['data_structures.Timetable']]) -> dict:
+    """ This method does the same search as backtrack_timetables() but each timetable is generated as a tuple of
+        indices into a section table (see section_table()) rather than as a Timetable object.
+
+        Parameters
+        ----------
+        section_combos : list
+            A two-dimensional list of Timetable objects. Each inner list holds the lecture and lab combinations of one course.
+
+        Returns
+        -------
+        dict
+            The section table as sections and an iterator over the section indices of every possible timetable, 
+            in the order of backtrack_timetables(), as timetables. Searches of at least PARALLEL_THRESHOLD 
+            timetables are done by the processes of parallel.py. When there is a search of two or more courses,
+            its levels (without the occupancy masks) and compatibility rows are also given as search, so it can 
+            be narrowed later (see narrow_timetables()).
+    """
+    sections, payloads = section_table(section_combos)
+    levels = viable_levels(section_combos, payloads)
+
+    if len(section_combos) == 1:
+        # There is nothing to search, but a lecture and lab that conflict are still left out
+        timetables = (payload for _, payload in levels[0][1]) if levels else iter(())
     else:
-        return merge_crses(recursive_merge(num_of_crses - 1, section_combos), section_combos[num_of_crses - 1])
+        rows = compatibility_rows(levels, sections)
+        
+        if parallel.use_pool(levels):
+            timetables = parallel.parallel_indices(levels, len(section_combos), rows)
+        else:
+            timetables = (tuple(indices) for indices in search_levels(levels, len(section_combos), rows))
 
-def all_timetables(input_courses: List[str], x_timetable: 'data_structures.Timetable', section_regex: dict, semester: str) -> dict:   
-    """ This method takes in a list of course names and the current semester. Using data from the database it generates a list of all possible 
-        Timetable objects containing all course names. The parameter x_timetable is for time filteration. The parameter section_regex is for
-        course section filteration.
+        if len(levels) != 0:
+            return dict(sections = sections, timetables = timetables, search = (parallel.without_masks(levels), rows))
+
+    return dict(sections = sections, timetables = timetables)
+
+@instrumentation.timed_function('sections')
+def timetable_sections(input_courses: List[str], x_timetable: 'data_structures.Timetable', section_regex: dict, semester: str) -> dict:
+    """ This method takes in a list of course names and the current semester. Using data from the database it builds the lecture and
+        lab combinations of each course that all_timetables() searches through. The parameter x_timetable is for time filteration. 
+        The parameter section_regex is for course section filteration.
 
         Parameters
         ----------
@@ -310,63 +631,51 @@ def all_timetables(input_courses: List[str], x_timetable: 'data_structures.Timet
             
         Returns
         -------
-        list
-            A list of all possible Timetable objects containing all course names
+        dict
+            The two-dimensional list of lecture and lab combinations as section_combos and the Course
+            objects that could not be scheduled as none_list
     """
     NUM_OF_CRSES = len(input_courses)
     num_of_reg_crses = NUM_OF_CRSES
     
-    lecture_sections = []
-    lab_sections = []
+    course_sections = []
     none_list = []
     
     section_combinations = []
     
-    i = 0
     for i in range(len(input_courses)):
-        with app.app_context():
-            all_sections = CourseData.query.filter(CourseData.course_code.op('regexp')(r'' + input_courses[i] + section_regex[input_courses[i]]), 
-                CourseData.semester == semester).all()
-                
-            modifySequence = False
+        all_sections = catalog.section_catalog.course_sections(input_courses[i], semester)
+        include_pattern = re.compile(r'' + input_courses[i] + section_regex[input_courses[i]])
             
-            lect_hold_list = []
-            lab_hold_list = []
+        modifySequence = False
+        
+        hold_sections = catalog.CourseSections()
+        
+        for section, kind, course in all_sections.sections:
+            if (section_regex[input_courses[i]] != "") and (not include_pattern.search(course.code)):
+                continue
             
-            for course_data_obj in all_sections:
-                lect_pattern = re.compile(r'' + input_courses[i] + r'\s\w$')
-                lab_pattern = re.compile(r'' + input_courses[i] + r'\s(\w{2}|\w{3})$')
-
-                if lect_pattern.fullmatch(course_data_obj.course_code):
-                    if (course_data_obj.first_day is not None) and (course_data_obj.start_time is not None):
-                        lect_hold_list.append(db_model_to_data_struct(course_data_obj))
-                    else:
-                        none_list.append(db_model_to_data_struct(course_data_obj))
-                        modifySequence = True
-                elif lab_pattern.fullmatch(course_data_obj.course_code):
-                    if (course_data_obj.first_day is not None) and (course_data_obj.start_time is not None): # Kind of unnecessary
-                        lab_hold_list.append(db_model_to_data_struct(course_data_obj))
-                    else:
-                        none_list.append(db_model_to_data_struct(course_data_obj))
-                        modifySequence = True
-                else:
-                    print("Something's not right")
-
-            if (modifySequence):
-                num_of_reg_crses = num_of_reg_crses - 1
+            if kind == OTHER:
+                app.logger.warning("%s is neither a lecture nor a lab", course.code)
+            elif (course.days[0] is not None) and (course.start_time is not None):
+                hold_sections.add(section, course)
             else:
-                lecture_sections.append(lect_hold_list)    
-                lab_sections.append(lab_hold_list)    
+                none_list.append(course)
+                modifySequence = True
+
+        if (modifySequence):
+            num_of_reg_crses = num_of_reg_crses - 1
+        else:
+            course_sections.append(hold_sections)
     
-    print("Number of courses " + str(num_of_reg_crses))    
-    print("lecture courses")
-    print(lecture_sections)    
-    print("lab courses")
-    print(lab_sections)    
+    app.logger.debug(
+        "Number of courses %d, lecture courses %s, lab courses %s", num_of_reg_crses, 
+        [hold_sections.lectures for hold_sections in course_sections], [hold_sections.labs for hold_sections in course_sections]
+    )
     
     for p in range(num_of_reg_crses): 
-        lecture_section = lecture_sections[p]
-        lab_section = lab_sections[p]
+        lecture_section = course_sections[p].lectures
+        lab_section = course_sections[p].labs
         
         if (len(lab_section) != 0) and (lab_section[0].code.split()[2][0] != 'L'):
             lect_and_lab_sections1 = []
@@ -374,11 +683,11 @@ def all_timetables(input_courses: List[str], x_timetable: 'data_structures.Timet
             for q in range(len(lecture_section)):
                 section_letter = lecture_section[q].code.split()[2]
                 
-                for r in range(len(lab_section)):
+                for lab in course_sections[p].labs_by_letter.get(section_letter, []):
                     timetable = Timetable([])
                     timetable.x_add_course(lecture_section[q], x_timetable)
                 
-                    if (lab_section[r].code.split()[2][0] == section_letter) and (timetable.x_add_course(lab_section[r], x_timetable)):
+                    if timetable.x_add_course(lab, x_timetable):
                         lect_and_lab_sections1.append(timetable)
                         
             section_combinations.append(lect_and_lab_sections1)  
@@ -401,6 +710,295 @@ def all_timetables(input_courses: List[str], x_timetable: 'data_structures.Timet
                             lect_and_lab_sections2.append(timetable)       
             
             section_combinations.append(lect_and_lab_sections2)
+    
+    instrumentation.count('sections', sum(len(hold_sections.sections) for hold_sections in course_sections))
+    instrumentation.count('combinations', sum(len(combos) for combos in section_combinations))
                 
-    timetables = recursive_merge(num_of_reg_crses, section_combinations)
-    return dict(timetables = timetables, none_list = none_list)            
+    return dict(section_combos = section_combinations, none_list = none_list)
+
+def iter_timetables(input_courses: List[str], x_timetable: 'data_structures.Timetable', section_regex: dict, semester: str) -> dict:
+    """ This method does the same thing as all_timetables() but the timetables are generated lazily as they are iterated over,
+        so the first few can be shown without generating the rest.
+
+        Parameters
+        ----------
+        input_courses : list
+            The course names with only the department code and the course number
+        x_timetable : 'data_structures.Timetable'
+            A Timetable object with blocked off times represented by Course objects
+        section_regex : dict
+            A dictionary with the course names as the keys and regular expressions 
+            representing the course sections to include as the corresponding values
+        semester : str
+            The given semester (Fall, Winter, or Summer)
+            
+        Returns
+        -------
+        dict
+            An iterator over the section indices of all possible timetables as timetables and the section table 
+            they index as sections (see indexed_timetables()), the Course objects that could not be scheduled as 
+            none_list, and the lecture and lab combinations the iterator searches as section_combos. This can be 
+            given to TimetablePager to get the Timetable objects.
+    """
+    sections = timetable_sections(input_courses, x_timetable, section_regex, semester)
+    
+    return dict(indexed_timetables(sections["section_combos"]), **sections)
+
+def all_timetables(input_courses: List[str], x_timetable: 'data_structures.Timetable', section_regex: dict, semester: str) -> dict:   
+    """ This method takes in a list of course names and the current semester. Using data from the database it generates a list of all possible 
+        Timetable objects containing all course names. The parameter x_timetable is for time filteration. The parameter section_regex is for
+        course section filteration.
+
+        Parameters
+        ----------
+        input_courses : list
+            The course names with only the department code and the course number
+        x_timetable : 'data_structures.Timetable'
+            A Timetable object with blocked off times represented by Course objects
+        section_regex : dict
+            A dictionary with the course names as the keys and regular expressions 
+            representing the course sections to include as the corresponding values
+        semester : str
+            The given semester (Fall, Winter, or Summer)
+            
+        Returns
+        -------
+        dict
+            A list of all possible Timetable objects containing all course names as timetables and the Course 
+            objects that could not be scheduled as none_list
+    """
+    sections = timetable_sections(input_courses, x_timetable, section_regex, semester)
+
+    with instrumentation.timed('search'):
+        timetables = parallel.parallel_search(sections["section_combos"])
+
+    instrumentation.count('timetables', len(timetables))
+    return dict(timetables = timetables, none_list = sections["none_list"])
+
+@instrumentation.timed_function('narrow')
+def narrow_timetables(previous: 'data_structures.TimetablePager', sections: dict) -> dict:
+    """ This method narrows the search of previous down to the lecture and lab combinations in sections instead of 
+        searching from scratch. This only gives the right timetables if every combination in sections was also 
+        searched for previous, which is the case when blocked off times are added or section regexes are narrowed. 
+        Adding the first blocked off time is not always such a case, since labs are then no longer checked against 
+        their lectures. The section table, levels and compatibility rows of previous are kept and the search is run
+        again with only the bits of the remaining combinations set (see search_levels()), so it does not matter 
+        how many timetables previous has generated.
+
+        Parameters
+        ----------
+        previous : 'data_structures.TimetablePager'
+            The TimetablePager of the timetables before the filters changed
+        sections : dict
+            The lecture and lab combinations for the new filters, as returned by timetable_sections()
+
+        Returns
+        -------
+        dict
+            The same as iter_timetables(), with the timetables in the order of previous and indexing its section 
+            table, or None if previous has no search to narrow or sections has a combination that was not searched 
+            for previous
+    """
+    if (previous.search is None) or (len(sections["section_combos"]) != len(previous.section_combos)):
+        return None
+
+    allowed = set()
+
+    for old_combos, new_combos in zip(previous.section_combos, sections["section_combos"]):
+        old_keys = {combo_key(combo.courses) for combo in old_combos}
+        new_keys = [combo_key(combo.courses) for combo in new_combos]
+
+        if not old_keys.issuperset(new_keys):
+            return None
+
+        allowed.update(new_keys)
+
+    levels, rows = previous.search
+    payloads = [payload for _, viable in levels for _, payload in viable]
+    combos = sum(1 << i for i, payload in enumerate(payloads) if combo_key(previous.sections[index] for index in payload) in allowed)
+
+    if parallel.use_pool(levels):
+        timetables = parallel.parallel_indices(levels, len(previous.section_combos), rows, combos)
+    else:
+        timetables = (tuple(indices) for indices in search_levels(levels, len(previous.section_combos), rows, combos=combos))
+
+    return dict(
+        timetables = timetables,
+        sections = previous.sections,
+        search = previous.search,
+        none_list = sections["none_list"],
+        section_combos = sections["section_combos"]
+    )
+
+def combo_key(courses: Iterator['data_structures.Course']) -> tuple:
+    """ This method returns the CRNs of a lecture and lab combination.
+    """
+    return tuple(course.crn for course in courses)
+
+@instrumentation.timed_function('count')
+def count_timetables(section_combos: List[List['data_structures.Timetable']]) -> int:
+    """ This method returns the number of timetables backtrack_timetables() would generate for section_combos
+        without generating any of them (see count_levels()). Counts of searches of at least PARALLEL_THRESHOLD 
+        timetables are split across the processes of parallel.py.
+    """
+    sections, payloads = section_table(section_combos)
+    levels = viable_levels(section_combos, payloads)
+    
+    if len(section_combos) < 2:
+        return len(levels[0][1]) if levels else 0
+    
+    rows = compatibility_rows(levels, sections)
+    
+    if parallel.use_pool(levels):
+        return parallel.parallel_count(levels, len(section_combos), rows)
+    
+    return count_levels(levels, len(section_combos), rows)
+    
+class TimetablePager:
+    """ This class serves the timetables from iter_timetables() a page at a time. Timetables are only generated 
+        when a page that needs them is requested and are kept so earlier pages can be served again. They are kept
+        as tuples of indices into the section table and only turned into Timetable objects for the pages served.
+        A pager can be shared by several requests at once. The timetables may also be given as Timetable objects
+        without a section table, and as a list, which is served as is. A list of ranked timetables only holds
+        the best of them, so their total is still counted from the lecture and lab combinations.
+    
+        Attributes
+        ----------
+        none_list : list
+            The Course objects that could not be scheduled
+        section_combos : list
+            The lecture and lab combinations the timetables are made of
+        sections : list
+            The section table the timetables index
+        table_id : str
+            A short id of the section table. Pagers with the same sections and meeting times in the same order have the same id.
+        ranked : bool
+            True if the timetables are only the best ones by a score (see ranking.top_timetables())
+        search : tuple
+            The levels and compatibility rows the timetables are searched with (see indexed_timetables()), or None
+            
+        Methods
+        -------
+        page(offset : int, limit : int)
+            Returns a list of at most limit timetables starting at offset
+        page_indices(offset : int, limit : int)
+            Returns the section indices of at most limit timetables starting at offset
+        has_more(offset : int)
+            Returns true if there is a timetable at offset
+        total()
+            Returns the number of timetables. This is computed separately from the pages the first time it is called.
+        shown()
+            Returns the number of timetables served, which is less than total() when they are ranked
+        size()
+            Returns the approximate number of bytes held by the pager, not counting the Course objects which
+            are shared with the section catalog
+        generated()
+            Returns the section indices of every timetable if they have all been generated, or None
+        indices()
+            Generates the section indices of every timetable a page at a time
+        resolve(indices : tuple)
+            Returns the Timetable object of the section indices of a timetable
+        __iter__
+            This dunder method is implemented. It generates the timetables a page at a time as they are iterated over.
+    """
+    def __init__(self, timetables: dict):
+        self.none_list = timetables["none_list"]
+        self.section_combos = timetables["section_combos"]
+        self.ranked = timetables.get("ranked", False)
+        self.search = timetables.get("search")
+        
+        if "sections" in timetables:
+            self.sections = timetables["sections"]
+            self._iterator = iter(timetables["timetables"])
+        else:
+            self.sections, _ = section_table(self.section_combos)
+            index_of = {id(course): i for i, course in enumerate(self.sections)}
+            self._iterator = (tuple(index_of[id(course)] for course in timetable.courses) for timetable in timetables["timetables"])
+        
+        # A list has already been generated, so it is served as is
+        listed = isinstance(timetables["timetables"], list)
+
+        self.table_id = format(zlib.crc32(repr([
+            (course.crn, course.day_mask, course.week, course.start_time, course.end_time) for course in self.sections
+        ]).encode()), '08x')
+        
+        self._generated = list(self._iterator) if listed else []
+        self._exhausted = listed
+        self._total = len(self._generated) if listed and not self.ranked else None
+        self._lock = threading.RLock()
+        self._size = sys.getsizeof(self.sections) + sys.getsizeof(self.section_combos) + sum(
+            sys.getsizeof(combos) + sum(timetable_size(timetable) for timetable in combos) for combos in self.section_combos
+        ) + sum(sys.getsizeof(indices) for indices in self._generated)
+
+        if self.search is not None:
+            self._size += sum(sys.getsizeof(row) for row in self.search[1])
+        
+    def _generate_up_to(self, stop: int) -> None:
+        if (not self._exhausted) and (len(self._generated) < stop):
+            with instrumentation.timed('search'):
+                new_timetables = list(itertools.islice(self._iterator, stop - len(self._generated)))
+            
+            instrumentation.count('timetables', len(new_timetables))
+            self._generated.extend(new_timetables)
+            self._size += sum(sys.getsizeof(indices) for indices in new_timetables)
+            self._exhausted = len(self._generated) < stop
+            
+    def resolve(self, indices: tuple) -> 'data_structures.Timetable':
+        return Timetable([self.sections[index] for index in indices])
+            
+    def page_indices(self, offset: int, limit: int) -> List[tuple]:
+        with self._lock:
+            self._generate_up_to(offset + limit)
+            return self._generated[offset:offset + limit]
+
+    def page(self, offset: int, limit: int) -> List['data_structures.Timetable']:
+        return [self.resolve(indices) for indices in self.page_indices(offset, limit)]
+        
+    def has_more(self, offset: int) -> bool:
+        with self._lock:
+            self._generate_up_to(offset + 1)
+            return offset < len(self._generated)
+        
+    def total(self) -> int:
+        with self._lock:
+            if self._total is None:
+                if self._exhausted and not self.ranked:
+                    self._total = len(self._generated)
+                else:
+                    self._total = count_timetables(self.section_combos)
+            return self._total            
+
+    def shown(self) -> int:
+        if self.ranked:
+            return len(self._generated)
+        return self.total()
+
+    def size(self) -> int:
+        return self._size + sys.getsizeof(self._generated)
+
+    def generated(self) -> List[tuple]:
+        with self._lock:
+            return self._generated if self._exhausted else None
+
+    def indices(self) -> Iterator[tuple]:
+        offset = 0
+
+        while True:
+            with self._lock:
+                self._generate_up_to(offset + ITER_PAGE_SIZE)
+                page = self._generated[offset:offset + ITER_PAGE_SIZE]
+
+            if len(page) == 0:
+                return
+
+            yield from page
+            offset += len(page)
+
+    def __iter__(self) -> Iterator['data_structures.Timetable']:
+        for indices in self.indices():
+            yield self.resolve(indices)
+
+def timetable_size(timetable: 'data_structures.Timetable') -> int:
+    """ This method returns the approximate number of bytes held by a Timetable object, not counting its Course objects.
+    """
+    return sys.getsizeof(timetable) + sys.getsizeof(timetable.courses) + sys.getsizeof(timetable.mask)
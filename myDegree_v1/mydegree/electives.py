@@ -0,0 +1,205 @@
+import collections
+import functools
+import re
+from typing import Dict, List
+from mydegree import program_data
+from mydegree.planner import offered
+
+SEASONS = "FWS"
+# The seasons of the semester field of the elective lists (basic_sci_elctv.json)
+LIST_SEMESTERS = {"Fall": "F", "Winter": "W", "Both": "FW", "Summer": "S"}
+SOURCE = "source"
+SINK = "sink"
+
+class ElectiveRule:
+    """ This class is one rule of an elective requirement of program_data.all_elctv_data: a specific course or courses
+        ("ELEC 2507, ELEC 4705"), a general pattern matched against every course of the catalog ("SYSC 5(\\d{3})")
+        or a list of courses (basicScience). The pattern is compiled and matched against the catalog once, so
+        the courses of the catalog a rule accepts are a set.
+
+        Attributes
+        ----------
+        max_needed : int
+            The most courses the rule counts
+        eligible : frozenset
+            The course codes the rule accepts
+        offered : dict
+            The course codes the rule accepts that are offered in each season (F, W or S)
+
+        Methods
+        -------
+        accepts(code : str)
+            Returns true if the rule counts the course
+    """
+    def __init__(self, rule: dict, catalog: Dict[str, dict], lists: Dict[str, list]):
+        self.type = rule["type"]
+        self.code = rule["code"]
+        self.max_needed = rule["max_needed"]
+        self.pattern = re.compile(self.code) if self.type == "general" else None
+        semesters = {code: course.get("semesters") for code, course in catalog.items()}
+
+        if self.type == "specific":
+            codes = self.code.split(", ")
+        elif self.type == "general":
+            codes = [code for code in catalog if self.pattern.fullmatch(code)]
+        else:
+            courses = lists.get(self.code, [])
+            codes = [course["course_code"] for course in courses]
+            semesters.update({course["course_code"]: LIST_SEMESTERS.get(course.get("semester"), "") for course in courses})
+
+        self.eligible = frozenset(codes)
+        self.offered = {
+            season: frozenset(code for code in codes if offered(dict(semesters = semesters.get(code)), season)) for season in SEASONS
+        }
+
+    def accepts(self, code: str) -> bool:
+        # Courses missing from the catalog, such as graduate courses, can still match a pattern
+        return (code in self.eligible) or ((self.pattern is not None) and (self.pattern.fullmatch(code) is not None))
+
+class ElectiveMatcher:
+    """ This class assigns the electives of a plan to the elective requirements of a program. Each requirement
+        counts up to total_num_needed courses and each of its rules up to max_needed, and a course counts once.
+        Since the rules overlap (SYSC 4101 is both an SYSC 3000/4000 course and an engineering elective of two
+        requirements), courses are assigned by maximum flow from the courses through the rules to the
+        requirements, so as many courses as possible count.
+
+        Attributes
+        ----------
+        requirements : list
+            The total number of courses needed and the compiled rules of each requirement
+        mainline : frozenset
+            The course codes of the program's sequence, which are never counted as electives
+
+        Methods
+        -------
+        match(courses : list)
+            Returns the requirement and rule each course counts for and the courses each requirement still needs
+        still_counting(courses : list, season : str)
+            Returns the courses offered in season that would count for a requirement not yet met
+    """
+    def __init__(self, elctv_data: List[dict], mainline: List[str], catalog: Dict[str, dict], lists: Dict[str, list]):
+        self.mainline = frozenset(mainline)
+        self.requirements = [
+            (requirement["total_num_needed"], [ElectiveRule(rule, catalog, lists) for rule in requirement["req_data"]])
+            for requirement in elctv_data
+        ]
+
+    def _flow(self, courses: List[str]) -> dict:
+        # The edges of the network and their capacities are source -> course (1), course -> rule (1) for each rule
+        # accepting the course, rule -> requirement (max_needed) and requirement -> sink (total_num_needed).
+        # Returns the remaining capacity of every edge after the maximum flow.
+        residual = collections.defaultdict(dict)
+
+        def edge(start, end, capacity):
+            residual[start][end] = capacity
+            residual[end].setdefault(start, 0)
+
+        for i, (total_num_needed, rules) in enumerate(self.requirements):
+            edge(("requirement", i), SINK, total_num_needed)
+
+            for j, rule in enumerate(rules):
+                edge(("rule", i, j), ("requirement", i), rule.max_needed)
+
+                for code in courses:
+                    if rule.accepts(code):
+                        edge(("course", code), ("rule", i, j), 1)
+
+        for code in courses:
+            edge(SOURCE, ("course", code), 1)
+
+        # Edmonds-Karp: augment along the shortest path left until the sink can not be reached
+        while True:
+            parents = {SOURCE: None}
+            queue = collections.deque([SOURCE])
+
+            while queue and (SINK not in parents):
+                node = queue.popleft()
+
+                for neighbour, capacity in residual[node].items():
+                    if capacity > 0 and neighbour not in parents:
+                        parents[neighbour] = node
+                        queue.append(neighbour)
+
+            if SINK not in parents:
+                return residual
+
+            # Every edge into a course has capacity 1, so every path carries one course
+            node = SINK
+
+            while parents[node] is not None:
+                residual[parents[node]][node] -= 1
+                residual[node][parents[node]] += 1
+                node = parents[node]
+
+    def _electives(self, courses: List[str]) -> List[str]:
+        return list(dict.fromkeys(code for code in courses if code not in self.mainline))
+
+    def match(self, courses: List[str]) -> dict:
+        """ This method assigns courses to the elective requirements so as many of them count as possible.
+
+            Parameters
+            ----------
+            courses : list
+                The course codes of the plan. The courses of the program's sequence are ignored.
+
+            Returns
+            -------
+            dict
+                assigned, the requirement and rule index of each course that counts keyed by course code,
+                unassigned, the courses that do not count, and remaining, the number of courses each
+                requirement still needs
+        """
+        electives = self._electives(courses)
+        residual = self._flow(electives)
+        assigned = dict()
+
+        for code in electives:
+            for node, capacity in residual[("course", code)].items():
+                # A course sent through a rule left the edge to it with no capacity
+                if node != SOURCE and capacity == 0:
+                    assigned[code] = [node[1], node[2]]
+
+        remaining = [residual[("requirement", i)][SINK] for i in range(len(self.requirements))]
+        return dict(assigned = assigned, unassigned = [code for code in electives if code not in assigned], remaining = remaining)
+
+    def still_counting(self, courses: List[str], season: str) -> List[str]:
+        """ This method returns the courses offered in season, not in courses or the program's sequence, that
+            would count if added to courses. A course counts if a rule accepting it can still send a course to
+            the sink, so once the rules that can are found, the answer is the union of their offered sets.
+        """
+        electives = self._electives(courses)
+        residual = self._flow(electives)
+        # The nodes that can reach the sink, found backwards through the edges with capacity left
+        reaching = {SINK}
+        queue = collections.deque([SINK])
+
+        while queue:
+            node = queue.popleft()
+
+            for neighbour in residual[node]:
+                if (neighbour not in reaching) and residual[neighbour].get(node, 0) > 0:
+                    reaching.add(neighbour)
+                    queue.append(neighbour)
+
+        counting = set()
+
+        for i, (_, rules) in enumerate(self.requirements):
+            for j, rule in enumerate(rules):
+                if ("rule", i, j) in reaching:
+                    counting |= rule.offered.get(season, frozenset())
+
+        return sorted(counting - self.mainline - set(electives))
+
+def elective_matcher(program: int, year: int) -> 'electives.ElectiveMatcher':
+    """ This method returns the ElectiveMatcher of a program and catalog year, as indexed on the select program
+        page, built from the data files as they are now.
+    """
+    return _elective_matcher(program, year, program_data.elective_courses.get(), program_data.mainline_courses.get(), program_data.basic_science_electives.get())
+
+# Matchers are kept for the data files they were built from, so they are built again when one is reloaded
+@functools.lru_cache(maxsize=32)
+def _elective_matcher(program: int, year: int, elective_courses: 'program_data.ElectiveCourses', mainline_courses: 'program_data.MainlineCourses', basic_science: 'program_data.ElectiveList') -> 'electives.ElectiveMatcher':
+    mainline = [code for term in mainline_courses.terms[year][program] for code in term]
+    lists = dict(basicScience = basic_science.courses)
+
+    return ElectiveMatcher(program_data.all_elctv_data[program], mainline, elective_courses.courses, lists)
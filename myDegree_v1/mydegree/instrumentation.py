@@ -0,0 +1,198 @@
+import contextlib
+import cProfile
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+from flask import g, request, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from mydegree import app
+
+logger = logging.getLogger('mydegree.requests')
+# The RequestTimings object of the request being handled. It is not kept in g because the app context pushed by
+# code such as catalog.SectionCatalog has its own g.
+_timings = contextvars.ContextVar('timings', default=None)
+
+class RequestTimings:
+    """ This class holds the stage durations and counts of one request. Stages can be nested (e.g. db inside
+        catalog_load), so their durations can add up to more than the total.
+
+        Attributes
+        ----------
+        stages : dict
+            The milliseconds spent in each stage and the number of times it was entered, keyed by stage name
+        counts : dict
+            The counters of the request (e.g. queries, timetables) keyed by name
+
+        Methods
+        -------
+        add(stage : str, ms : float)
+            Adds ms milliseconds spent in stage
+        count(name : str, amount : int)
+            Adds amount to the counter name
+        server_timing(total_ms : float)
+            Returns the value of the Server-Timing header with every stage, every counter and the total
+        to_dict(total_ms : float)
+            Returns the stages, counters and total as a dictionary that can be saved as JSON
+    """
+    def __init__(self):
+        self.stages = dict()
+        self.counts = dict()
+
+    def add(self, stage: str, ms: float) -> None:
+        spent = self.stages.setdefault(stage, [0.0, 0])
+        spent[0] += ms
+        spent[1] += 1
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def server_timing(self, total_ms: float) -> str:
+        metrics = [f'{stage};dur={ms:.2f}' for stage, (ms, _) in self.stages.items()]
+        metrics += [f'{name};desc="{amount}"' for name, amount in self.counts.items()]
+        metrics.append(f'total;dur={total_ms:.2f}')
+        return ', '.join(metrics)
+
+    def to_dict(self, total_ms: float) -> dict:
+        return dict(
+            total_ms = round(total_ms, 3),
+            stages = {stage: dict(ms = round(ms, 3), calls = calls) for stage, (ms, calls) in self.stages.items()},
+            counts = dict(self.counts)
+        )
+
+def current_timings() -> 'instrumentation.RequestTimings':
+    """ This method returns the RequestTimings object of the current request, or None outside a request or when
+        REQUEST_TIMING is off. Work done in the process pool of parallel.py is not in a request, so only the
+        time spent waiting for it is recorded.
+    """
+    return _timings.get()
+
+@contextlib.contextmanager
+def timed(stage: str):
+    """ This method is a context manager that adds the time spent in its block to stage in the current request.
+    """
+    timings = current_timings()
+
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        timings.add(stage, (time.perf_counter() - start) * 1000)
+
+def timed_function(stage: str):
+    """ This method returns a decorator that adds the time spent in the decorated function to stage. It must not
+        be used on generators, since their work is done after they return.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name: str, amount: int = 1) -> None:
+    """ This method adds amount to the counter name of the current request.
+    """
+    timings = current_timings()
+
+    if timings is not None:
+        timings.count(name, amount)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_query(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info['query_start'].pop()
+    timings = current_timings()
+
+    if timings is not None:
+        timings.add('db', (time.perf_counter() - start) * 1000)
+        timings.count('queries')
+
+@before_render_template.connect_via(app)
+def _before_render(sender, template, context, **extra):
+    if current_timings() is not None:
+        g.render_start = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def _after_render(sender, template, context, **extra):
+    timings = current_timings()
+
+    if (timings is not None) and ('render_start' in g):
+        timings.add('render', (time.perf_counter() - g.pop('render_start')) * 1000)
+
+@app.before_request
+def _start_request():
+    if not app.config['REQUEST_TIMING']:
+        return
+
+    g.timings_token = _timings.set(RequestTimings())
+    g.request_start = time.perf_counter()
+
+    if app.config['PROFILE_THRESHOLD_MS'] > 0:
+        profiler = cProfile.Profile()
+
+        try:
+            profiler.enable()
+        except ValueError:
+            # Only one profiler can run at a time, so a request made during another profiled request is not profiled
+            return
+        g.profiler = profiler
+
+@app.after_request
+def _finish_request(response):
+    timings = current_timings()
+
+    if timings is None:
+        return response
+
+    total_ms = (time.perf_counter() - g.request_start) * 1000
+    profiler = g.pop('profiler', None)
+    record = dict(method = request.method, path = request.path, status = response.status_code, **timings.to_dict(total_ms))
+
+    if profiler is not None:
+        profiler.disable()
+
+        if total_ms >= app.config['PROFILE_THRESHOLD_MS']:
+            record['profile'] = save_profile(profiler, request.endpoint)
+
+    response.headers['Server-Timing'] = timings.server_timing(total_ms)
+    logger.info(json.dumps(record))
+
+    return response
+
+@app.teardown_request
+def _end_request(exception):
+    # after_request is skipped when a view raises, so the profiler may still be running
+    profiler = g.pop('profiler', None)
+
+    if profiler is not None:
+        profiler.disable()
+
+    token = g.pop('timings_token', None)
+
+    if token is not None:
+        _timings.reset(token)
+
+def save_profile(profiler: cProfile.Profile, endpoint: str) -> str:
+    """ This method saves the stats of profiler to PROFILE_DIR (by default, profiles in the instance folder) and
+        returns the path. The file can be read with pstats or snakeviz.
+    """
+    directory = app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles')
+    os.makedirs(directory, exist_ok=True)
+
+    path = os.path.join(directory, f'{endpoint}-{time.time_ns()}.prof')
+    profiler.dump_stats(path)
+
+    return path
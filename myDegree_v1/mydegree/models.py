@@ -1,5 +1,34 @@
+import re
 from mydegree import db
 
+LECTURE = "lecture"
+LAB = "lab"
+TUTORIAL = "tutorial"
+OTHER = "other"
+
+def section_kind(section: str) -> str:
+    """ This method returns whether a course section is a lecture (one character, e.g. A), a lab (two or three
+        characters starting with L, e.g. L1 or L1O), a tutorial (two or three characters tied to a lecture
+        section, e.g. A1) or something else.
+    """
+    if re.fullmatch(r'\w', section):
+        return LECTURE
+    elif re.fullmatch(r'\w{2}|\w{3}', section):
+        return LAB if section[0] == 'L' else TUTORIAL
+    else:
+        return OTHER
+
+def split_course_code(course_code: str) -> dict:
+    """ This method splits a course code such as "SYSC 2004 L1" into the values of the department, course_number,
+        section and section_kind columns of CourseData.
+    """
+    parts = course_code.split()
+
+    if len(parts) != 3:
+        return dict(department = None, course_number = None, section = None, section_kind = OTHER)
+
+    return dict(department = parts[0], course_number = parts[1], section = parts[2], section_kind = section_kind(parts[2]))
+
 class CourseData(db.Model):
     regst_num = db.Column(db.Integer, primary_key=True)
     course_code = db.Column(db.String(15), nullable=False)
@@ -10,7 +39,62 @@ class CourseData(db.Model):
     week_frequency = db.Column(db.Integer, nullable=True)
     start_time = db.Column(db.Integer, nullable=True)
     end_time = db.Column(db.Integer, nullable=True)
+    department = db.Column(db.String(4), nullable=True, index=True)
+    course_number = db.Column(db.String(4), nullable=True)
+    section = db.Column(db.String(3), nullable=True)
+    section_kind = db.Column(db.String(8), nullable=True, index=True)
+
+    __table_args__ = (
+        db.Index('ix_course_data_semester_department_number', 'semester', 'department', 'course_number'),
+    )
+
+    def __init__(self, **kwargs):
+        if 'course_code' in kwargs:
+            for column, value in split_course_code(kwargs['course_code']).items():
+                kwargs.setdefault(column, value)
+        super().__init__(**kwargs)
 
     def __repr__(self):
         return f"\n{self.course_code}\n{self.course_title}"
 
+def upgrade_course_data() -> None:
+    """ This method brings a database created before the department, course_number, section and section_kind
+        columns existed up to date. The columns are added, filled in from course_code and indexed. It only 
+        reads the table's columns and indexes and does nothing more if the database is already up to date. It is
+        run by excel_to_sql.py (see --upgrade-db) rather than when the app starts, and must be called inside an
+        application context.
+    """
+    inspector = db.inspect(db.engine)
+
+    if not inspector.has_table(CourseData.__tablename__):
+        db.create_all()
+        return
+
+    existing = {column['name'] for column in inspector.get_columns(CourseData.__tablename__)}
+    new_columns = [column for column in CourseData.__table__.columns if column.name not in existing]
+    indexes = {index['name'] for index in inspector.get_indexes(CourseData.__tablename__)}
+
+    # The columns are only filled in when they are added, since rows loaded after that have them
+    if (len(new_columns) == 0) and all(index.name in indexes for index in CourseData.__table__.indexes):
+        return
+
+    with db.engine.begin() as connection:
+        for column in new_columns:
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            connection.execute(db.text(f'ALTER TABLE {CourseData.__tablename__} ADD COLUMN {column.name} {column_type}'))
+
+        rows = connection.execute(db.text(
+            f'SELECT regst_num, course_code FROM {CourseData.__tablename__} WHERE section_kind IS NULL'
+        )).all()
+
+        if len(rows) != 0:
+            connection.execute(
+                db.text(
+                    f'UPDATE {CourseData.__tablename__} SET department = :department, course_number = :course_number, '
+                    'section = :section, section_kind = :section_kind WHERE regst_num = :regst_num'
+                ),
+                [dict(split_course_code(course_code), regst_num = regst_num) for regst_num, course_code in rows]
+            )
+
+        for index in CourseData.__table__.indexes:
+            index.create(connection, checkfirst=True)
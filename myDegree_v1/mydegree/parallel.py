@@ -0,0 +1,123 @@
+import itertools
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List
+from mydegree import app
+from mydegree import data_structures
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def search_size(levels: list) -> int:
+    """ This method returns the number of timetables a search over levels would try without pruning any branch.
+    """
+    return math.prod(len(viable) for _, viable in levels)
+
+def use_pool(levels: list) -> bool:
+    """ This method returns true if a search over levels is worth splitting across processes, which is when
+        PARALLEL_WORKERS is more than 1, since one process is no faster than this one, and the search is at least
+        PARALLEL_THRESHOLD timetables.
+    """
+    return (app.config['PARALLEL_WORKERS'] > 1) and (len(levels) != 0) and (search_size(levels) >= app.config['PARALLEL_THRESHOLD'])
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=app.config['PARALLEL_WORKERS'])
+        return _pool
+
+def compact_levels(section_combos: List[List['data_structures.Timetable']]) -> tuple:
+    """ This method returns the levels of section_combos (see data_structures.viable_levels()) with the section index
+        of each course instead of its Course object as payload, their compatibility rows (see 
+        data_structures.compatibility_rows()) and the section table the indices refer to. Only the rows and the
+        indices are sent to other processes, so the large occupancy masks are dropped from the levels.
+    """
+    sections, payloads = data_structures.section_table(section_combos)
+    levels = data_structures.viable_levels(section_combos, payloads)
+    rows = data_structures.compatibility_rows(levels, sections)
+    return without_masks(levels), rows, sections
+
+def without_masks(levels: list) -> list:
+    """ This method returns levels with the occupancy masks dropped, since only the payloads are needed once the
+        compatibility rows are built and the masks are large to send to other processes.
+    """
+    return [(crse_index, [(None, payload) for _, payload in viable]) for crse_index, viable in levels]
+
+def search_partition(levels: list, num_of_crses: int, rows: List[int], first: range, combos: int = None) -> List[tuple]:
+    """ This method runs in a worker process. It searches the part of levels that starts with the combinations at
+        the first positions of the first level and returns the section indices of every timetable found.
+    """
+    return [tuple(indices) for indices in data_structures.search_levels(levels, num_of_crses, rows, first, combos)]
+
+def count_partition(levels: list, num_of_crses: int, rows: List[int], first: range) -> int:
+    """ This method runs in a worker process. It counts the timetables of the part of levels that starts with the
+        combinations at the first positions of the first level.
+    """
+    return data_structures.count_levels(levels, num_of_crses, rows, first)
+
+def partitions(levels: list, workers: int) -> List[range]:
+    """ This method splits the combinations of the first level into about four ranges per worker so slow
+        ranges can be balanced out.
+    """
+    num_of_combos = len(levels[0][1])
+    step = max(num_of_combos // (4 * workers), 1)
+    return [range(start, min(start + step, num_of_combos)) for start in range(0, num_of_combos, step)]
+
+def parallel_indices(levels: list, num_of_crses: int, rows: List[int], combos: int = None) -> Iterator[tuple]:
+    """ This method does the search of data_structures.search_levels() across the PARALLEL_WORKERS processes of a 
+        shared pool. The search is split by the combination chosen for the first course searched (the one with 
+        the fewest viable combinations) and the parts are put back together in that order, so the timetables come
+        out in the same order as in this process. The parts are only sent to the pool when the first timetable is 
+        asked for, and each is yielded as soon as it and the parts before it are done.
+
+        Parameters
+        ----------
+        levels : list
+            The levels to search, with section indices as payloads (see data_structures.viable_levels())
+        num_of_crses : int
+            The number of courses of each timetable
+        rows : list
+            The compatibility rows of levels (see data_structures.compatibility_rows())
+        combos : int
+            The bits of the combinations that may be used, or None for all of them (see data_structures.search_levels())
+
+        Returns
+        -------
+        iterator
+            The section indices of every timetable
+    """
+    levels = without_masks(levels)
+    parts = partitions(levels, app.config['PARALLEL_WORKERS'])
+    results = get_pool().map(search_partition, [levels] * len(parts), [num_of_crses] * len(parts), [rows] * len(parts), parts, [combos] * len(parts))
+
+    yield from itertools.chain.from_iterable(results)
+
+def parallel_count(levels: list, num_of_crses: int, rows: List[int]) -> int:
+    """ This method does the count of data_structures.count_levels() across the PARALLEL_WORKERS processes of a 
+        shared pool, split the same way as parallel_indices().
+    """
+    levels = without_masks(levels)
+    parts = partitions(levels, app.config['PARALLEL_WORKERS'])
+    return sum(get_pool().map(count_partition, [levels] * len(parts), [num_of_crses] * len(parts), [rows] * len(parts), parts))
+
+def parallel_search(section_combos: List[List['data_structures.Timetable']]) -> List['data_structures.Timetable']:
+    """ This method does the search of data_structures.backtrack_timetables() across the PARALLEL_WORKERS processes of
+        a shared pool (see parallel_indices()). Searches smaller than PARALLEL_THRESHOLD stay in this process.
+
+        Parameters
+        ----------
+        section_combos : list
+            A two-dimensional list of Timetable objects. Each inner list holds the lecture and lab combinations of one course.
+
+        Returns
+        -------
+        list
+            Every possible Timetable object
+    """
+    timetables = data_structures.indexed_timetables(section_combos)
+    sections = timetables["sections"]
+
+    return [data_structures.Timetable([sections[index] for index in indices]) for indices in timetables["timetables"]]
@@ -0,0 +1,158 @@
+from typing import Dict, List
+from mydegree import instrumentation
+from mydegree.prerequisites import NO_REQUIREMENT
+
+MAX_TERMS = 24 # The most terms a plan can have, so a course that can never be taken does not plan forever
+MAX_IDLE_TERMS = 3 # The number of terms in a row without a course before the courses left are given up on
+
+def next_season(season: str, summer: bool) -> str:
+    """ This method returns the season (F, W or S) of the term after a term of the given season.
+    """
+    if season == "F":
+        return "W"
+    elif (season == "W") and summer:
+        return "S"
+    return "F"
+
+def offered(course: dict, season: str) -> bool:
+    """ This method returns true if a course is offered in season according to the semesters field of
+        eng_electives.json (e.g. "FW"). A course with no semesters, or that is not in the file such as an elective
+        placeholder (ENGELCTV), may be taken in any term.
+    """
+    semesters = course.get("semesters") if course is not None else None
+    return (not semesters) or (season in semesters)
+
+class PlanGenerator:
+    """ This class plans the courses left of a program term by term. It is a list scheduler: each term is filled
+        with the courses whose prerequisites are met, that are offered that term, by critical path, i.e. the
+        courses with the longest chain of courses in the plan depending on them go first, then in the order of
+        the program's sequence. When the prerequisites of a course can not be met by the courses planned or
+        passed, the courses outside the plan are assumed to be passed (e.g. high school courses or MATH 0005),
+        as the planner can not take them.
+
+        Attributes
+        ----------
+        codes : list
+            The course codes left to plan, in the order of the program's sequence. A code can appear more than
+            once, as full-year courses (SYSC 4907) and elective placeholders (ENGELCTV) do.
+        loads : list
+            The number of courses of each term of the program's sequence from the first with a course left,
+            the load of the plan's terms unless limited
+        heights : dict
+            The number of terms of the longest chain of planned courses starting at each course code
+        outside : dict
+            The courses assumed to be passed for the prerequisites of each course code, as a mask
+
+        Methods
+        -------
+        plan(start : str, load_limits : list, default_load : int, summer : bool)
+            Returns the plan as a list of terms and the courses that could not be planned
+    """
+    def __init__(self, index: 'prerequisites.PrerequisiteIndex', courses: dict, sequence: List[List[str]], passed: List[str] = ()):
+        self.index = index
+        self.courses = courses
+        # A course passed is passed for every term of it, as for a full-year course
+        passed_codes = set(passed)
+        self.codes = [code for term in sequence for code in term if code not in passed_codes]
+
+        left = set(self.codes)
+        self.loads = [len(term) for term in sequence]
+        self.loads = self.loads[next((i for i, term in enumerate(sequence) if left.intersection(term)), len(sequence)):]
+
+        self.plan_mask = index.mask(self.codes)
+        self.passed_mask = index.mask(passed)
+        self.heights = dict()
+        self.outside = dict()
+        within = self.plan_mask | self.passed_mask
+
+        for code in self.codes:
+            self._height(code)
+            requirement = index.requirements.get(code, NO_REQUIREMENT)
+            self.outside[code] = 0 if requirement.satisfied(within, within) else ~self.plan_mask
+
+    def _height(self, code: str) -> int:
+        if code not in self.heights:
+            self.heights[code] = 1
+            dependents = self.index.dependents.get(code, 0) & self.plan_mask
+            self.heights[code] = 1 + max((self._height(dependent) for dependent in self.index.course_codes(dependents)), default=0)
+
+        return self.heights[code]
+
+    def _load(self, term: int, load_limits: List[int], default_load: int) -> int:
+        if term < len(load_limits):
+            return load_limits[term]
+        elif default_load is not None:
+            return default_load
+        return self.loads[term] if term < len(self.loads) else max(self.loads, default=0)
+
+    @instrumentation.timed_function('plan')
+    def plan(self, start: str = "F", load_limits: List[int] = (), default_load: int = None, summer: bool = False) -> Dict[str, list]:
+        """ This method plans the courses left from a term of season start on.
+
+            Parameters
+            ----------
+            start : str
+                The season (F, W or S) of the first term
+            load_limits : list
+                The most courses of each term from the first; 0 for a term off (e.g. a co-op term)
+            default_load : int
+                The most courses of the terms after load_limits. By default, the plan's terms follow loads and
+                the terms after it take as many courses as the largest.
+            summer : bool
+                True if courses may be planned in summer terms
+
+            Returns
+            -------
+            dict
+                The terms, as dictionaries with the season and course codes, and the codes not planned
+        """
+        left = {code: self.codes.count(code) for code in self.codes}
+        todo = sorted(range(len(self.codes)), key=lambda i: (-self.heights[self.codes[i]], i))
+        passed = self.passed_mask
+        terms = []
+        season = start
+        idle = 0
+
+        while todo and (len(terms) < MAX_TERMS) and (idle < MAX_IDLE_TERMS):
+            load = self._load(len(terms), load_limits, default_load)
+            chosen = []
+            taken = passed
+            added = True
+
+            # Courses that may be taken concurrently with a course chosen this term can only be chosen after it
+            while added and (len(chosen) < load):
+                added = False
+
+                for i in todo:
+                    code = self.codes[i]
+
+                    if (i in chosen) or ((code in self.index.bits) and any(self.codes[j] == code for j in chosen)):
+                        continue
+
+                    outside = self.outside[code]
+
+                    if offered(self.courses.get(code), season) and self.index.requirements.get(code, NO_REQUIREMENT).satisfied(passed | outside, taken | outside):
+                        chosen.append(i)
+                        taken |= self.index.bits.get(code, 0)
+                        added = True
+
+                        if len(chosen) == load:
+                            break
+
+            # A course that is planned more than once only counts as passed once every term of it is planned
+            for i in chosen:
+                left[self.codes[i]] -= 1
+
+                if left[self.codes[i]] == 0:
+                    passed |= self.index.bits.get(self.codes[i], 0)
+
+            todo = [i for i in todo if i not in chosen]
+            terms.append(dict(season = season, courses = [self.codes[i] for i in sorted(chosen)]))
+            idle = 0 if (chosen or load == 0) else idle + 1
+            season = next_season(season, summer)
+
+        # Terms left empty while waiting for a course that never became possible are not part of the plan
+        while terms and not terms[-1]["courses"]:
+            terms.pop()
+
+        return dict(terms = terms, unplanned = [self.codes[i] for i in sorted(todo)])
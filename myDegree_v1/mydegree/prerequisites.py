@@ -0,0 +1,387 @@
+import abc
+from typing import Callable, Dict, List, Tuple
+from mydegree.program_data import DataFile
+
+AND = "&"
+OR = "|"
+CONCURRENT = "c" # A course code starting with this may also be taken in the same term
+
+class Requirement(abc.ABC):
+    """ This class is the base of a compiled prerequisite tree. Courses are bits of an int, so a set of courses
+        is an int and checking a requirement is a few bitwise operations.
+
+        Methods
+        -------
+        satisfied(passed : int, taken : int)
+            Returns true if the requirement is met by the courses passed in earlier terms, or by the courses
+            taken (passed or in the current term) for the courses that may be taken concurrently
+        missing(passed : int, taken : int)
+            Returns the unmet courses as home.html shows them. Alternatives are grouped in a list when more
+            than one of them is unmet.
+        chain(depth : callable)
+            Returns the number of terms needed to meet the requirement, given the number of terms needed to
+            pass each course, and the course that sets it (or None if the requirement is already met)
+    """
+    @abc.abstractmethod
+    def satisfied(self, passed: int, taken: int) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def missing(self, passed: int, taken: int) -> list:
+        pass
+
+    @abc.abstractmethod
+    def chain(self, depth: Callable[[str], int]) -> Tuple[int, str]:
+        pass
+
+class CourseRequirement(Requirement):
+    """ This class is one course of a prerequisite tree.
+    """
+    def __init__(self, code: str, bit: int, concurrent: bool):
+        self.code = code
+        self.bit = bit
+        self.concurrent = concurrent
+
+    def satisfied(self, passed: int, taken: int) -> bool:
+        return ((taken if self.concurrent else passed) & self.bit) != 0
+
+    def missing(self, passed: int, taken: int) -> list:
+        return [] if self.satisfied(passed, taken) else [self.code]
+
+    def chain(self, depth: Callable[[str], int]) -> Tuple[int, str]:
+        # A course that may be taken concurrently can be in the same term, so it takes one term less
+        terms = max(depth(self.code) - (1 if self.concurrent else 0), 0)
+        return (terms, self.code if terms > 0 else None)
+
+class Group(Requirement):
+    """ This class is an AND or OR of requirements. The courses among them are also kept as two masks, one of
+        the courses that must be passed and one of the courses that may be taken concurrently, so they are
+        checked at once and only the nested groups are checked one by one.
+    """
+    def __init__(self, children: List['prerequisites.Requirement']):
+        self.children = children
+        self.passed_mask = 0
+        self.taken_mask = 0
+        self.groups = []
+
+        for child in children:
+            if not isinstance(child, CourseRequirement):
+                self.groups.append(child)
+            elif child.concurrent:
+                self.taken_mask |= child.bit
+            else:
+                self.passed_mask |= child.bit
+
+class AllOf(Group):
+    def satisfied(self, passed: int, taken: int) -> bool:
+        return (
+            ((passed & self.passed_mask) == self.passed_mask) and ((taken & self.taken_mask) == self.taken_mask)
+            and all(group.satisfied(passed, taken) for group in self.groups)
+        )
+
+    def missing(self, passed: int, taken: int) -> list:
+        return [code for child in self.children for code in child.missing(passed, taken)]
+
+    def chain(self, depth: Callable[[str], int]) -> Tuple[int, str]:
+        # Every child must be met, so the longest one sets the chain
+        return max((child.chain(depth) for child in self.children), key=lambda chain: chain[0], default=(0, None))
+
+class AnyOf(Group):
+    def satisfied(self, passed: int, taken: int) -> bool:
+        return ((passed & self.passed_mask) != 0) or ((taken & self.taken_mask) != 0) or any(group.satisfied(passed, taken) for group in self.groups)
+
+    def missing(self, passed: int, taken: int) -> list:
+        if self.satisfied(passed, taken):
+            return []
+
+        possibly_missing = [code for child in self.children for code in child.missing(passed, taken)]
+        return possibly_missing if len(possibly_missing) == 1 else [possibly_missing]
+
+    def chain(self, depth: Callable[[str], int]) -> Tuple[int, str]:
+        # Only one child must be met, so the shortest one sets the chain
+        return min((child.chain(depth) for child in self.children), key=lambda chain: chain[0], default=(0, None))
+
+NO_REQUIREMENT = AllOf([])
+
+def tree_courses(tree: dict) -> List[str]:
+    """ This method returns the course codes in a prerequisite tree, without the concurrent prefix.
+    """
+    if tree is None:
+        return []
+
+    data = tree.get("data")
+    codes = [] if data in (None, AND, OR) else [data[len(CONCURRENT):] if data.startswith(CONCURRENT) else data]
+    return codes + [code for child in tree.get("children", []) for code in tree_courses(child)]
+
+def compile_tree(tree: dict, bits: Dict[str, int]) -> 'prerequisites.Requirement':
+    """ This method compiles a prerequisite tree as made by scraping.course_info.CourseInfoParser.prerequisite_tree()
+        into a Requirement. The tree is a dictionary with the operator (& or |) or course code as data and the
+        operands as children. Course codes starting with c may be taken concurrently. The conditions that are
+        not courses, such as year standing, are not checked.
+
+        Parameters
+        ----------
+        tree : dict
+            The prerequisite tree, or None if the course has no prerequisites
+        bits : dict
+            The bit of each course code
+
+        Returns
+        -------
+        'prerequisites.Requirement'
+            The compiled tree
+    """
+    if tree is None:
+        return NO_REQUIREMENT
+
+    data = tree.get("data")
+    children = [compile_tree(child, bits) for child in tree.get("children", [])]
+
+    if data == AND:
+        return AllOf(children)
+    elif data == OR:
+        return AnyOf(children)
+    elif data is None:
+        return NO_REQUIREMENT
+
+    concurrent = data.startswith(CONCURRENT)
+    code = data[len(CONCURRENT):] if concurrent else data
+    return CourseRequirement(code, bits[code], concurrent)
+
+class PrerequisiteIndex:
+    """ This class holds the compiled prerequisites of every course in eng_electives.json and the graph they make.
+        An edge goes from each course to every course in its prerequisite tree, whether it is under an AND or an
+        OR; the trees themselves are kept in requirements for the queries that need the structure. Sets of
+        courses, including the transitive closures, are ints with one bit per course.
+
+        Attributes
+        ----------
+        bits : dict
+            The bit of each course code found in the courses or their prerequisites
+        codes : list
+            The course code of each bit, by bit position
+        requirements : dict
+            The compiled prerequisites of each course keyed by course code
+        prerequisites : dict
+            The courses in the prerequisite tree of each course (forward edges) keyed by course code
+        dependents : dict
+            The courses with each course in their prerequisite tree (reverse edges) keyed by course code
+        order : list
+            Every course code with prerequisites before the courses that need them
+        positions : dict
+            The position of each course code in order
+        ancestors : dict
+            Every course that may be needed before each course (the closure of prerequisites) keyed by course code
+        descendants : dict
+            Every course that may need each course first (the closure of dependents) keyed by course code
+        depths : dict
+            The number of terms needed to pass each course when no course is passed yet
+
+        Methods
+        -------
+        mask(codes : list)
+            Returns the courses as an int, ignoring the codes without a bit
+        course_codes(mask : int)
+            Returns the course codes of an int, in order
+        validate(terms : list)
+            Returns the unmet prerequisites of every course of a plan
+        unlocks(code : str, passed : list)
+            Returns the courses whose prerequisites become met by passing a course
+        chain(code : str, passed : list)
+            Returns the longest prerequisite chain left before a course can be passed
+        blocked_by(code : str, passed : list)
+            Returns the courses that can not be taken without passing a course
+    """
+    def __init__(self, data: dict):
+        self.codes = sorted(set(data) | {code for course in data.values() for code in tree_courses(course.get("prerequisites"))})
+        self.bits = {code: 1 << i for i, code in enumerate(self.codes)}
+        self.requirements = {code: compile_tree(course.get("prerequisites"), self.bits) for code, course in data.items()}
+
+        self.prerequisites = {code: 0 for code in self.codes}
+        self.dependents = {code: 0 for code in self.codes}
+
+        for code, course in data.items():
+            for prerequisite in tree_courses(course.get("prerequisites")):
+                self.prerequisites[code] |= self.bits[prerequisite]
+                self.dependents[prerequisite] |= self.bits[code]
+
+        self.order = self._topological_order()
+        self.positions = {code: i for i, code in enumerate(self.order)}
+        self.ancestors = self._closure(self.prerequisites, self.order)
+        self.descendants = self._closure(self.dependents, self.order[::-1])
+        self.depths = self._depths(0, self.order)
+
+    def mask(self, codes: List[str]) -> int:
+        mask = 0
+
+        for code in codes:
+            mask |= self.bits.get(code, 0)
+
+        return mask
+
+    def course_codes(self, mask: int) -> List[str]:
+        codes = []
+
+        while mask:
+            bit = mask & -mask
+            codes.append(self.codes[bit.bit_length() - 1])
+            mask ^= bit
+
+        return codes
+
+    def _topological_order(self) -> List[str]:
+        # Kahn's algorithm. The scraped data has no cycles, but if it ever does, the courses on them go last.
+        waiting = {code: bin(self.prerequisites[code]).count("1") for code in self.codes}
+        ready = [code for code in self.codes if waiting[code] == 0]
+        order = []
+
+        while ready:
+            code = ready.pop()
+            order.append(code)
+
+            for dependent in self.course_codes(self.dependents[code]):
+                waiting[dependent] -= 1
+
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+
+        placed = set(order)
+        return order + [code for code in self.codes if code not in placed]
+
+    def _closure(self, edges: Dict[str, int], order: List[str]) -> Dict[str, int]:
+        # Following order, the closure of each course's edges is done before it is needed. The courses on a cycle
+        # are only done once the closures stop changing.
+        closure = {code: 0 for code in self.codes}
+        changed = True
+
+        while changed:
+            changed = False
+
+            for code in order:
+                reach = edges[code]
+
+                for other in self.course_codes(edges[code]):
+                    reach |= closure[other]
+
+                if reach != closure[code]:
+                    closure[code] = reach
+                    changed = True
+
+        return closure
+
+    def _depths(self, passed: int, codes: List[str]) -> Dict[str, int]:
+        # The depths of codes and their prerequisites. A passed course takes no terms, any other one term after
+        # its prerequisites. Courses on a cycle are counted once.
+        depths = dict()
+
+        def depth(code):
+            if code not in depths:
+                depths[code] = 0 if (passed & self.bits[code]) else 1
+
+                if depths[code]:
+                    depths[code] = 1 + self.requirements.get(code, NO_REQUIREMENT).chain(depth)[0]
+
+            return depths[code]
+
+        for code in codes:
+            depth(code)
+
+        return depths
+
+    def validate(self, terms: List[List[str]]) -> Dict[str, list]:
+        """ This method checks the prerequisites of every course of a plan. A course's prerequisites must be
+            passed in an earlier term, or taken in the same term if they may be taken concurrently.
+
+            Parameters
+            ----------
+            terms : list
+                The course codes of each term, in order
+
+            Returns
+            -------
+            dict
+                The unmet prerequisites (see Requirement.missing()) of each course with any, keyed by course code
+        """
+        missing = dict()
+        passed = 0
+
+        for term in terms:
+            taken = passed | self.mask(term)
+
+            for code in term:
+                requirement = self.requirements.get(code, NO_REQUIREMENT)
+
+                if not requirement.satisfied(passed, taken):
+                    missing[code] = requirement.missing(passed, taken)
+
+            passed = taken
+
+        return missing
+
+    def unlocks(self, code: str, passed: List[str] = ()) -> List[str]:
+        """ This method returns the courses whose prerequisites are not met by the passed courses but are once
+            code is passed too. Only the dependents of code can be unlocked, so only their trees are checked.
+        """
+        before = self.mask(passed)
+        after = before | self.bits.get(code, 0)
+        candidates = self.dependents.get(code, 0) & ~after
+
+        return [
+            dependent for dependent in self.course_codes(candidates)
+            if (not self.requirements.get(dependent, NO_REQUIREMENT).satisfied(before, before))
+            and self.requirements.get(dependent, NO_REQUIREMENT).satisfied(after, after)
+        ]
+
+    def chain(self, code: str, passed: List[str] = ()) -> List[str]:
+        """ This method returns the longest chain of prerequisites left before code can be passed, as the course
+            codes to pass one after the other, ending with code. Of alternatives, the shortest one is followed.
+            The chain is empty if code is passed.
+
+            Parameters
+            ----------
+            code : str
+                The course code
+            passed : list
+                The course codes already passed
+
+            Returns
+            -------
+            list
+                The course codes of the chain, first to last
+        """
+        if code not in self.bits:
+            return [code]
+
+        # The depths with nothing passed are cached, since they are what the course pages ask for
+        passed_mask = self.mask(passed)
+        depths = self.depths if passed_mask == 0 else self._depths(passed_mask, [code])
+        chain = []
+
+        while (code is not None) and depths[code] > 0 and (code not in chain):
+            chain.append(code)
+            code = self.requirements.get(code, NO_REQUIREMENT).chain(depths.__getitem__)[1]
+
+        return chain[::-1]
+
+    def blocked_by(self, code: str, passed: List[str] = ()) -> List[str]:
+        """ This method returns the courses that can not be taken without passing code, e.g. after failing it.
+            A course is blocked when its prerequisites can not be met without the blocked courses, assuming
+            every other course can still be passed; an alternative to code keeps its dependents open. Courses
+            already passed are never blocked.
+        """
+        if code not in self.bits:
+            return []
+
+        passed_mask = self.mask(passed)
+        blocked = self.bits[code]
+        candidates = self.descendants[code] & ~passed_mask
+
+        # Following order, every prerequisite of a course is blocked or not before the course is checked
+        for dependent in sorted(self.course_codes(candidates), key=self.positions.__getitem__):
+            if not self.requirements.get(dependent, NO_REQUIREMENT).satisfied(~blocked, ~blocked):
+                blocked |= self.bits[dependent]
+
+        return self.course_codes(blocked & ~self.bits[code])
+
+# The scraper can update eng_electives.json while the app runs, so the graph is rebuilt whenever the file changes
+prerequisite_index = DataFile('eng_electives.json', PrerequisiteIndex, watch=True)
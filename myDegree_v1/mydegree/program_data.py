@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+from types import MappingProxyType
+from jinja2.utils import htmlsafe_json_dumps
+from mydegree import app
+
+data_files = [] # Every DataFile object, so they can all be loaded at startup
+
+# The programs and catalog years on the select program page, which index mainline_courses.json and all_elctv_data
+programs = ["Computer Systems Engineering", "Software Engineering", "Communications Engineering", "Biomedical & Electrical Engineering"]
+years = ["2018", "2019", "2020", "2021", "2022", "2023"]
+
+# The elective requirements of each program
+all_elctv_data = [
+        [
+            {
+                "total_num_needed": 3,
+                "req_data": [
+                    {
+                        "type": "specific",
+                        "code": "MECH 4503",
+                        "max_needed": 1
+                    },
+                    {
+                        "type": "general",
+                        "code": "(SYSC|ELEC) (3|4)(\\d{3})",
+                        "max_needed": 3
+                    },
+                    {
+                        "type": "general",
+                        "code": "SYSC 5(\\d{3})",
+                        "max_needed": 2
+                    }
+                ]
+            }
+        ],       
+        [
+            {
+                "total_num_needed": 2,
+                "req_data": [
+                    {
+                        "type": "list",
+                        "code": "computerScience",
+                        "max_needed": 2
+                    },
+                    {
+                        "type": "general",
+                        "code": "SYSC 5(\\d{3})",
+                        "max_needed": 2
+                    }
+                ]
+            },
+            {
+                "total_num_needed": 1,
+                "req_data": [
+                    {
+                        "type": "list",
+                        "code": "basicScience",
+                        "max_needed": 1
+                    },
+                    {
+                        "type": "specific",
+                        "code": "ELEC 2507, ELEC 4705",
+                        "max_needed": 1
+                    }
+                ]
+            },
+            {
+                "total_num_needed": 2,
+                "req_data": [
+                    {
+                        "type": "general",
+                        "code": "((SYSC|ELEC) (3|4)(\\d{3})|SYSC 5(\\d{3}))",
+                        "max_needed": 2
+                    }
+                ]
+            }
+        ],
+        [    
+            {
+                "total_num_needed": 2,
+                "req_data": [
+                    {
+                        "type": "general",
+                        "code": "(SYSC|ELEC) (3|4)(\\d{3})",
+                        "max_needed": 2
+                    }
+                ]
+            },
+        ],
+        [
+            {
+                "total_num_needed": 1,
+                "req_data": [
+                    {
+                        "type": "specific",
+                        "code": "ELEC 3908, SYSC 2004",
+                        "max_needed": 1
+                    }
+                ]
+            },
+            {
+                "total_num_needed": 2,
+                "req_data": [
+                    {
+                        "type": "specific",
+                        "code": "ELEC 4709, SYSC 4202, SYSC 4205",
+                        "max_needed": 2
+                    },
+                    {
+                        "type": "general",
+                        "code": "BIOM 5(\\d{3})",
+                        "max_needed": 2
+                    }
+                ]
+            },
+            {
+                "total_num_needed": 1,
+                "req_data": [
+                    {
+                        "type": "general",
+                        "code": "((SYSC|ELEC) (3|4)(\\d{3})|BIOM 5(\\d{3}))",
+                        "max_needed": 1
+                    }
+                ]
+            }
+        ]
+    ]
+
+def freeze(value):
+    """ This method returns a read-only copy of parsed JSON, with dictionaries turned into mappingproxy objects and
+        lists into tuples, so the data shared by every request can not be changed by one of them.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    elif isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def script_json(value) -> 'markupsafe.Markup':
+    """ This method serializes value the way the tojson template filter does, so it can be put straight into a script.
+    """
+    return htmlsafe_json_dumps(value, dumps=json.dumps)
+
+class ElectiveCourses:
+    """ This class holds eng_electives.json, the scraped information about each course.
+
+        Attributes
+        ----------
+        courses : mappingproxy
+            The information about each course (course_title, schedule, preclusions, prerequisites and semesters)
+            keyed by course code
+        course_info_json : 'markupsafe.Markup'
+            The courseInfo object of home.html as JSON
+    """
+    def __init__(self, data: dict):
+        self.courses = freeze(data)
+        self.course_info_json = script_json({
+            code: dict(
+                title = course['course_title'],
+                schedule = course['schedule'],
+                preclusions = course['preclusions'],
+                prerequisites = course.get('prerequisites') or None,
+                semesters = course['semesters']
+            )
+            for code, course in data.items()
+        })
+
+class MainlineCourses:
+    """ This class holds mainline_courses.json, the courses of each term of each program by catalog year.
+
+        Attributes
+        ----------
+        terms : tuple
+            The course codes of each term, indexed by catalog year and then program as on the select program page
+        codes_json : tuple
+            The course codes of all the terms of each program as JSON, indexed the same way
+    """
+    def __init__(self, data: list):
+        self.terms = freeze(data)
+        self.codes_json = tuple(
+            tuple(script_json([code for term in program for code in term]) for program in year) for year in data
+        )
+
+class ElectiveList:
+    """ This class holds a list of electives such as basic_sci_elctv.json.
+
+        Attributes
+        ----------
+        courses : tuple
+            The course_code, course_title and semester (Fall, Winter or Both) of each course
+    """
+    def __init__(self, data: list):
+        self.courses = freeze(data)
+
+class DataFile:
+    """ This class is one JSON file in static/data, loaded once into the object built by build. When the app runs
+        in debug mode, or watch is true, the file is loaded again whenever it changes, keeping the previous object
+        if the file can not be parsed. Every DataFile object is loaded by preload() when the app starts, unless
+        register is false.
+
+        Methods
+        -------
+        get()
+            Returns the object built from the file
+        refresh()
+            Loads the file again the next time get() is called
+    """
+    def __init__(self, filename: str, build: type, watch: bool = False, register: bool = True):
+        self.path = os.path.join(app.static_folder, 'data', filename)
+        self._build = build
+        self._watch = watch
+        self._value = None
+        self._version = None
+        self._lock = threading.Lock()
+
+        if register:
+            data_files.append(self)
+
+    def _file_version(self) -> tuple:
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self):
+        with self._lock:
+            if (self._value is None) or ((self._watch or app.debug) and (self._file_version() != self._version)):
+                # The version is read before the file, so a change made while it is read is loaded next time
+                version = self._file_version()
+
+                try:
+                    with open(self.path) as file:
+                        value = self._build(json.load(file))
+                except ValueError:
+                    # A file being written may not be valid yet; the old object is kept until it is
+                    if self._value is None:
+                        raise
+                    app.logger.warning("Could not load %s, keeping the previous version", self.path, exc_info=True)
+                else:
+                    self._value = value
+                    self._version = version
+
+            return self._value
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._value = None
+
+# Watched like prerequisites.prerequisite_index, which is built from the same file
+elective_courses = DataFile('eng_electives.json', ElectiveCourses, watch=True)
+mainline_courses = DataFile('mainline_courses.json', MainlineCourses)
+basic_science_electives = DataFile('basic_sci_elctv.json', ElectiveList)
+
+def preload() -> None:
+    for data_file in data_files:
+        data_file.get()
@@ -0,0 +1,189 @@
+import abc
+import functools
+import heapq
+import itertools
+import operator
+from typing import Iterator, List
+from mydegree import instrumentation
+from mydegree.data_structures import MINS_PER_DAY, NUM_OF_DAYS, Timetable, any_week, compatibility_rows, levels_bits, section_table, viable_levels
+
+TOP_K = 100 # The number of timetables kept when they are ranked
+DAY_FULL = (1 << MINS_PER_DAY) - 1
+
+@functools.lru_cache(maxsize=1024)
+def day_masks(mask: int) -> tuple:
+    """ This method splits an occupancy mask into one mask of MINS_PER_DAY bits per day, ignoring the week frequency.
+        The split of recent masks is remembered since the same partial timetables are scored many times.
+    """
+    week = any_week(mask)
+    return tuple((week >> (day * MINS_PER_DAY)) & DAY_FULL for day in range(NUM_OF_DAYS))
+
+class Score(abc.ABC):
+    """ This class is the base of the timetable scores used by top_timetables(). Lower scores are better.
+
+        Methods
+        -------
+        cost(mask : int)
+            Returns the score of a timetable with the given occupancy mask
+        lower_bound(mask : int, remaining : int)
+            Returns a score no timetable built on a partial timetable with the occupancy mask mask can beat, where
+            remaining is the union of the masks of every combination that could still be added. By default this
+            is cost(mask), which is right for scores that never get better as courses are added.
+    """
+    @abc.abstractmethod
+    def cost(self, mask: int) -> int:
+        pass
+
+    def lower_bound(self, mask: int, remaining: int) -> int:
+        return self.cost(mask)
+
+class FewestDays(Score):
+    """ This class scores a timetable by the number of days with classes.
+    """
+    def cost(self, mask: int) -> int:
+        return sum(1 for day in day_masks(mask) if day != 0)
+
+class LeastGapTime(Score):
+    """ This class scores a timetable by the free minutes between its first and last class of each day. Adding
+        a course can fill a gap, so a partial timetable is only bounded by the gap minutes no remaining
+        combination could fill.
+    """
+    def _gaps(self, mask: int, remaining: int) -> int:
+        gaps = 0
+
+        for day, remaining_day in zip(day_masks(mask), day_masks(remaining)):
+            if day != 0:
+                span = (1 << day.bit_length()) - (day & -day) # The minutes from the first class to the end of the last
+                gaps += (span & ~(day | remaining_day)).bit_count()
+
+        return gaps
+
+    def cost(self, mask: int) -> int:
+        return self._gaps(mask, 0)
+
+    def lower_bound(self, mask: int, remaining: int) -> int:
+        return self._gaps(mask, remaining)
+
+class LatestStart(Score):
+    """ This class scores a timetable by how early in the day its earliest class of the week starts.
+    """
+    def cost(self, mask: int) -> int:
+        starts = [(day & -day).bit_length() - 1 for day in day_masks(mask) if day != 0]
+        return -min(starts, default=MINS_PER_DAY)
+
+class EarliestFinish(Score):
+    """ This class scores a timetable by how late in the day its latest class of the week ends.
+    """
+    def cost(self, mask: int) -> int:
+        return max((day.bit_length() - 1 for day in day_masks(mask)), default=-1)
+
+SCORES = {
+    "days": FewestDays(),
+    "gaps": LeastGapTime(),
+    "start": LatestStart(),
+    "finish": EarliestFinish()
+}
+
+@instrumentation.timed_function('rank')
+def top_timetables(section_combos: List[List['data_structures.Timetable']], score: 'ranking.Score', k: int = TOP_K) -> List['data_structures.Timetable']:
+    """ This method returns the k best timetables backtrack_timetables() would generate for section_combos, best
+        first, without generating all of them. It is a depth-first branch and bound: the best k timetables found so
+        far are kept in a heap and a partial timetable is abandoned as soon as it cannot beat the worst of them.
+
+        As in search_levels(), the combinations still compatible with a partial timetable are kept as the AND of the
+        compatibility rows of its combinations. A partial timetable is bounded course by course: each remaining
+        course has to add one of its compatible combinations, so the bound is the highest, over the remaining
+        courses, of the lowest score.lower_bound() any of its combinations can reach with the others still able to
+        fill gaps. The courses whose best combination scores lowest are placed first and the combinations of a
+        course are tried lowest bound first, so the heap fills with good timetables early. Timetables with the same
+        score are kept in the order they are found.
+
+        Parameters
+        ----------
+        section_combos : list
+            A two-dimensional list of Timetable objects. Each inner list holds the lecture and lab combinations of one course.
+        score : 'ranking.Score'
+            The score to rank the timetables by
+        k : int
+            The number of timetables to return
+
+        Returns
+        -------
+        list
+            At most k Timetable objects, with the courses in the order of section_combos
+    """
+    num_of_crses = len(section_combos)
+
+    if (num_of_crses == 0) or (k <= 0):
+        return []
+
+    sections, payloads = section_table(section_combos)
+    levels = viable_levels(section_combos, payloads)
+
+    if len(levels) == 0:
+        return []
+
+    for _, viable in levels:
+        viable.sort(key=lambda item: score.cost(item[0]))
+
+    if num_of_crses == 1:
+        return [Timetable([sections[i] for i in payload]) for _, payload in levels[0][1][:k]]
+
+    levels.sort(key=lambda level: score.cost(level[1][0][0]))
+
+    rows = compatibility_rows(levels, sections)
+    level_bits = levels_bits(levels)
+    # The scores ignore the week frequency and the rows already tell which combinations conflict, so folded masks do
+    combo_masks = [any_week(combo_mask) for _, viable in levels for combo_mask, _ in viable]
+    combo_payloads = [payload for _, viable in levels for _, payload in viable]
+
+    best = [] # A max-heap of (-cost, -order, chosen combinations) so the worst timetable kept is at the top
+    order = itertools.count()
+    chosen = [None] * num_of_crses
+
+    def combos_of(bits: int) -> Iterator[int]:
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            yield bit.bit_length() - 1
+
+    def place(depth: int, mask: int, allowed: int):
+        options = [allowed & bits for bits in level_bits[depth:]]
+
+        if 0 in options:
+            return
+
+        unions = [functools.reduce(operator.or_, (combo_masks[i] for i in combos_of(bits))) for bits in options]
+
+        if len(best) == k:
+            for level in range(1, len(options)):
+                others = functools.reduce(operator.or_, unions[:level] + unions[level + 1:])
+
+                if all(score.lower_bound(mask | combo_masks[i], others) >= -best[0][0] for i in combos_of(options[level])):
+                    return
+
+        if depth == num_of_crses - 1:
+            children = sorted((score.cost(mask | combo_masks[i]), i) for i in combos_of(options[0]))
+        else:
+            others = functools.reduce(operator.or_, unions[1:])
+            children = sorted((score.lower_bound(mask | combo_masks[i], others), i) for i in combos_of(options[0]))
+
+        for bound, i in children:
+            if (len(best) == k) and (bound >= -best[0][0]):
+                break
+
+            chosen[levels[depth][0]] = i
+
+            if depth == num_of_crses - 1:
+                item = (-bound, -next(order), list(chosen))
+
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                else:
+                    heapq.heapreplace(best, item)
+            else:
+                place(depth + 1, mask | combo_masks[i], allowed & rows[i])
+
+    place(0, 0, (1 << len(combo_masks)) - 1)
+
+    return [Timetable([sections[j] for i in combos for j in combo_payloads[i]]) for _, _, combos in sorted(best, key=lambda item: (-item[0], -item[1]))]
@@ -0,0 +1,86 @@
+import gzip
+from flask import request
+from mydegree import app
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# The types worth compressing. Images and fonts are already compressed.
+COMPRESSIBLE_TYPES = {'text/html', 'text/css', 'text/plain', 'application/json', 'application/javascript', 'text/javascript'}
+GZIP_LEVEL = 6 # The usual trade-off between size and speed, as in nginx and Apache
+BROTLI_QUALITY = 5 # Brotli's best qualities are too slow to run on every response
+
+def encodings() -> list:
+    """ This method returns the encodings the server can compress with, best first.
+    """
+    return (['br'] if brotli is not None else []) + ['gzip']
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output, and so the ETag, the same every time
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def accepted_encoding() -> str:
+    """ This method returns the best encoding in the Accept-Encoding header of the request, or None if the client
+        does not accept any of encodings().
+    """
+    for encoding in encodings():
+        if request.accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+def not_modified(etag: str) -> bool:
+    """ This method returns true if the If-None-Match header of the request matches etag in any encoding.
+    """
+    return any(request.if_none_match.contains(tag) for tag in [etag] + [f'{etag}-{encoding}' for encoding in encodings()])
+
+@app.after_request
+def cache_and_compress(response):
+    """ This method gives every successful GET response of a compressible type a strong ETag and answers with
+        304 Not Modified when the client already has it. Responses of at least COMPRESS_MIN_BYTES are then
+        compressed with brotli (when the brotli package is installed) or gzip.
+
+        The ETag of a compressed response is the ETag of the uncompressed one with the encoding appended, as
+        each encoding is a different representation. Static files keep the ETag Flask gives them; the others
+        get a hash of their content, so a page or timetable payload the client has already seen is not sent
+        again. Responses that depend on the session are marked private so shared caches do not keep them.
+    """
+    # Static files are passed through as files, so they look streamed but can be read
+    if (request.method not in ('GET', 'HEAD')) or (response.status_code != 200) or (response.is_streamed and not response.direct_passthrough):
+        return response
+
+    if (response.mimetype not in COMPRESSIBLE_TYPES) or ('Content-Encoding' in response.headers):
+        return response
+
+    if response.direct_passthrough:
+        # The file of a static file response has to be read to be compressed
+        file = response.response
+        response.direct_passthrough = False
+        response.set_data(b''.join(file))
+        file.close()
+
+    response.vary.add('Accept-Encoding')
+
+    if response.get_etag()[0] is None:
+        response.add_etag()
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+    etag = response.get_etag()[0]
+
+    if not_modified(etag):
+        response.status_code = 304
+        response.set_data(b'')
+        return response
+
+    encoding = accepted_encoding()
+
+    if app.config['RESPONSE_COMPRESSION'] and (encoding is not None) and (response.content_length or 0) >= app.config['COMPRESS_MIN_BYTES']:
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f'{etag}-{encoding}')
+
+    return response
@@ -1,28 +1,17 @@
-import os
-from flask import render_template, json, jsonify, redirect, url_for, request, flash, current_app
-from mydegree import app
+from flask import render_template, json, jsonify, redirect, url_for, request, flash
+from mydegree import app, electives, program_data
 from mydegree.forms import *
-from mydegree.data_structures import Course, Timetable, get_sections, all_timetables
+from mydegree.data_structures import all_timetables, get_sections
 from mydegree.render_timetable import course_height, course_mt, course_ml
+from mydegree.planner import PlanGenerator
+from mydegree.program_data import all_elctv_data, programs, years
+from mydegree.prerequisites import prerequisite_index
+from mydegree.ranking import SCORES
+from mydegree.session_state import load_state, save_state
+from mydegree.timetable_cache import timetable_cache
 
-list_of_names = []
-semester = ""
-in_order_load = False
-
-bsc_electives = []
-cmplmntry_electives = []
-start_year = ""
-mainline = []
-program = ""
-elctv_data = []
-
-x_timetable = Timetable([])
-
-courses = dict()
-section_regex = dict()
-
-programs = ["Computer Systems Engineering", "Software Engineering", "Communications Engineering", "Biomedical & Electrical Engineering"]
-years = ["2018", "2019", "2020", "2021", "2022", "2023"]
+PAGE_SIZE = 20 # The number of timetables sent to the carousel at a time
+MANY_TIMETABLES = 1000 # Students are asked to add filters when there are more timetables than this
 
 elctv_titles = {
     "BASICSCI": "Basic Science Elective",
@@ -32,127 +21,25 @@ elctv_titles = {
     "ENGELCTV": "Engineering Elective"
 }
 
-all_elctv_data = [
-        [
-            {
-                "total_num_needed": 3,
-                "req_data": [
-                    {
-                        "type": "specific",
-                        "code": "MECH 4503",
-                        "max_needed": 1
-                    },
-                    {
-                        "type": "general",
-                        "code": "(SYSC|ELEC) (3|4)(\\d{3})",
-                        "max_needed": 3
-                    },
-                    {
-                        "type": "general",
-                        "code": "SYSC 5(\\d{3})",
-                        "max_needed": 2
-                    }
-                ]
-            }
-        ],       
-        [
-            {
-                "total_num_needed": 2,
-                "req_data": [
-                    {
-                        "type": "list",
-                        "code": "computerScience",
-                        "max_needed": 2
-                    },
-                    {
-                        "type": "general",
-                        "code": "SYSC 5(\\d{3})",
-                        "max_needed": 2
-                    }
-                ]
-            },
-            {
-                "total_num_needed": 1,
-                "req_data": [
-                    {
-                        "type": "list",
-                        "code": "basicScience",
-                        "max_needed": 1
-                    },
-                    {
-                        "type": "specific",
-                        "code": "ELEC 2507, ELEC 4705",
-                        "max_needed": 1
-                    }
-                ]
-            },
-            {
-                "total_num_needed": 2,
-                "req_data": [
-                    {
-                        "type": "general",
-                        "code": "((SYSC|ELEC) (3|4)(\\d{3})|SYSC 5(\\d{3}))",
-                        "max_needed": 2
-                    }
-                ]
-            }
-        ],
-        [    
-            {
-                "total_num_needed": 2,
-                "req_data": [
-                    {
-                        "type": "general",
-                        "code": "(SYSC|ELEC) (3|4)(\\d{3})",
-                        "max_needed": 2
-                    }
-                ]
-            },
-        ],
-        [
-            {
-                "total_num_needed": 1,
-                "req_data": [
-                    {
-                        "type": "specific",
-                        "code": "ELEC 3908, SYSC 2004",
-                        "max_needed": 1
-                    }
-                ]
-            },
-            {
-                "total_num_needed": 2,
-                "req_data": [
-                    {
-                        "type": "specific",
-                        "code": "ELEC 4709, SYSC 4202, SYSC 4205",
-                        "max_needed": 2
-                    },
-                    {
-                        "type": "general",
-                        "code": "BIOM 5(\\d{3})",
-                        "max_needed": 2
-                    }
-                ]
-            },
-            {
-                "total_num_needed": 1,
-                "req_data": [
-                    {
-                        "type": "general",
-                        "code": "((SYSC|ELEC) (3|4)(\\d{3})|BIOM 5(\\d{3}))",
-                        "max_needed": 1
-                    }
-                ]
-            }
-        ]
-    ]
-
 def resolution(course_code):
     if len(course_code.split(" ")) == 1:
         return ["Elective", elctv_titles[course_code]]
     else:
-        return [course_code, courses[course_code]["course_title"]]
+        return [course_code, program_data.elective_courses.get().courses[course_code]["course_title"]]
+
+def is_codes(value):
+    # A list of course codes
+    return isinstance(value, list) and all(isinstance(code, str) for code in value)
+
+def is_counts(value):
+    # A list of numbers of courses
+    return isinstance(value, list) and all(is_count(count) for count in value)
+
+def is_count(value):
+    return isinstance(value, int) and (not isinstance(value, bool)) and value >= 0
+
+def plan_error(message, status = 400):
+    return jsonify(dict(error = message)), status
 
 
 @app.route("/")
@@ -162,8 +49,11 @@ def input_page():
     submit_button = SubmitButtonForm()
     
     if text_field.validate_on_submit():
-        list_of_names.append(text_field.name_of_course.data)
-        flash(f'{list_of_names}', 'success')
+        state = load_state()
+        state.list_of_names.append(text_field.name_of_course.data)
+        save_state(state)
+        
+        flash(f'{state.list_of_names}', 'success')
         return redirect(url_for('input_page'))
         
     if submit_button.is_submitted():
@@ -175,26 +65,16 @@ def select_program():
     select_form = SelectProgramForm()
     
     if select_form.validate_on_submit():
-        global program
-        global mainline
-        global elctv_data
-        global programs
-        global start_year
-        global in_order_load
+        state = load_state()
+        state.in_order_load = True
         
-        in_order_load = True
+        state.program = programs[int(select_form.name_of_course.data)]
         
-        program = programs[int(select_form.name_of_course.data)]
-        
-        elctv_data = all_elctv_data[int(select_form.name_of_course.data)]
-        start_year = years[int(select_form.catalog_year.data)]
-        
-        with app.app_context():
-            file = os.path.join(current_app.static_folder, 'data', 'mainline_courses.json')
-
-            with open(file) as f:
-                mainline = json.load(f)[int(select_form.catalog_year.data)][int(select_form.name_of_course.data)]
+        state.elctv_data = all_elctv_data[int(select_form.name_of_course.data)]
+        state.start_year = years[int(select_form.catalog_year.data)]
+        state.mainline = program_data.mainline_courses.get().terms[int(select_form.catalog_year.data)][int(select_form.name_of_course.data)]
 
+        save_state(state)
         return redirect(url_for('home')) 
     
     return render_template('select_program.html', select_form = select_form)
@@ -202,13 +82,11 @@ def select_program():
     
 @app.route("/home/")
 def home():
-    global courses
+    state = load_state()
+    mainline_codes = "[]"
     
-    with app.app_context():
-        file = os.path.join(current_app.static_folder, 'data', 'eng_electives.json')
-
-        with open(file) as f:
-            courses = json.load(f)
+    if state.in_order_load:
+        mainline_codes = program_data.mainline_courses.get().codes_json[years.index(state.start_year)][programs.index(state.program)]
     
     return render_template(
         'home.html', 
@@ -216,14 +94,14 @@ def home():
         range = range,
         str = str,
         list = list,
-        in_order_load = in_order_load,
-        start_year = start_year,
-        mainline = mainline,
-        keys = list(courses.keys()),
-        courses = courses, 
-        title = program,
+        in_order_load = state.in_order_load,
+        start_year = state.start_year,
+        mainline = state.mainline,
+        mainline_codes = mainline_codes,
+        course_info = program_data.elective_courses.get().course_info_json,
+        title = state.program,
         elctv_titles = elctv_titles,
-        elctv_data = elctv_data,
+        elctv_data = state.elctv_data,
         resolution = resolution
     )
     
@@ -231,21 +109,18 @@ def home():
 def handle_input():
     received = request.args.get('term_data')
     data = json.loads(received)
-
-    global list_of_names
-    global semester
-    global x_timetable
-    global section_regex
-    global timetables
+    
+    state = load_state()
     
     course_codes = data['course_codes']
-    semester = data['semester']
+    state.semester = data['semester']
     
     for i in range(len(course_codes)):
-        list_of_names.append(course_codes[i])
-        section_regex[course_codes[i]] = ""
+        state.list_of_names.append(course_codes[i])
+        state.section_regex[course_codes[i]] = ""
 
-    timetables = all_timetables(list_of_names, x_timetable, section_regex, semester) 
+    state.generate()
+    save_state(state)
     
     url = url_for('filters')
     return jsonify(dict(url = url))
@@ -255,53 +130,40 @@ def handle_filters():
     received = request.args.get('sent')
     data = json.loads(received)
     url = url_for('filters')
-
-    global list_of_names
-    global semester
-    global x_timetable
-    global section_regex
-    global timetables
     
-    x_timetable = Timetable([])
+    state = load_state()
     
     for j in range(len(data['list_of_names'])):
-        list_of_names.append(data['list_of_names'][j])
+        state.list_of_names.append(data['list_of_names'][j])
 
-    section_regex = data['includeSections']
-    
-    print(section_regex)
-    
-    for i in range(len(data['blockedOff'])):
-        x_timetable.add_course(
-            Course(
-                crn=0,
-                code="NONE 0000",
-                title="Filler Course",
-                days=[data['blockedOff'][i]['day']],
-                week=0,
-                start_time=data['blockedOff'][i]['startTime'],
-                end_time=data['blockedOff'][i]['endTime']
-            )
-        )
+    state.section_regex = data['includeSections']
+    state.rank_by = data.get('rankBy', "") if data.get('rankBy', "") in SCORES else ""
+    
+    app.logger.debug("Section regexes %s", state.section_regex)
+    
+    state.blocked_off = [
+        dict(day = blocked['day'], startTime = blocked['startTime'], endTime = blocked['endTime']) 
+        for blocked in data['blockedOff']
+    ]
         
-    timetables = all_timetables(list_of_names, x_timetable, section_regex, semester) 
+    # The total is counted when the filters page asks for it (see timetable_count())
+    state.generate()
+    save_state(state)
     
     return jsonify(dict(url = url))
 
 @app.route("/filters/")
 def filters():
-    global list_of_names
-    global semester
-    global x_timetable
-    global section_regex
-    global timetables
+    state = load_state()
+    list_of_names = state.list_of_names
+    timetables = state.pager()
     
     names_and_sections = dict()
     copy_list = []
     none_list_keys = []
     
-    for i in range(len(timetables["none_list"])):
-        course_code = timetables["none_list"][i].code
+    for i in range(len(timetables.none_list)):
+        course_code = timetables.none_list[i].code
         none_list_keys.append(course_code[0] + " " + course_code[1])
     
     for i in range(len(list_of_names)):
@@ -311,17 +173,15 @@ def filters():
     for i in range(len(list_of_names)):
         copy_list.append(list_of_names[i])
         course_name = list_of_names[i]
-        names_and_sections[course_name] = get_sections(course_name, semester)
+        names_and_sections[course_name] = get_sections(course_name, state.semester)
 
     list_of_names.clear()
 
-    timetable_list = timetables["timetables"]
-    none_list = timetables["none_list"]
-    
-    # return f"<h1>{timetable_list} <br> and <br> {none_list} </h1>"
+    first_page = timetables.page_indices(0, PAGE_SIZE)
+    has_more = timetables.has_more(PAGE_SIZE)
+    save_state(state)
     
-    
-    if len(timetables) == 0:
+    if len(first_page) == 0:
         return f"<h1>Unable to generate time table for {copy_list} with the given filter parameters</h1>"
     else:    
         return render_template(
@@ -334,24 +194,142 @@ def filters():
             course_ml = course_ml,
             list_of_names = copy_list,
             names_and_sections = names_and_sections,
-            none_list = timetables["none_list"],
-            timetables = timetables["timetables"] 
+            none_list = timetables.none_list,
+            sections = [course.to_dict() for course in timetables.sections],
+            table = timetables.table_id,
+            first_page = first_page,
+            has_more = has_more,
+            page_size = PAGE_SIZE,
+            many_timetables = MANY_TIMETABLES,
+            rank_by = state.rank_by
         )
 
+@app.route("/timetables/")
+def timetable_page():
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = max(min(request.args.get('limit', PAGE_SIZE, type=int), 5 * PAGE_SIZE), 0)
+    
+    state = load_state()
+    timetables = state.pager()
+    
+    page = timetables.page_indices(offset, limit)
+    has_more = timetables.has_more(offset + len(page))
+    save_state(state)
+    
+    # The timetables are lists of indices into the section table, which is only sent when the client does not have it
+    data = dict(offset = offset, table = timetables.table_id, timetables = page, has_more = has_more)
+    
+    if request.args.get('table') != timetables.table_id:
+        data['sections'] = [course.to_dict() for course in timetables.sections]
+    
+    return jsonify(data)
+
+@app.route("/timetables/count/")
+def timetable_count():
+    state = load_state()
+    timetables = state.pager()
+    total = timetables.total()
+    save_state(state)
+    
+    # Ranked timetables are only the best of the total
+    return jsonify(dict(total = total, shown = timetables.shown()))
+
+@app.route("/timetables/cache/")
+def timetable_cache_stats():
+    return jsonify(timetable_cache.stats())
+
+@app.route("/plan/validate/", methods=['POST'])
+def validate_plan():
+    # The plan is {"terms": [[course codes of the first term], ...]}
+    plan = request.get_json(silent=True)
+    
+    if not (isinstance(plan, dict) and isinstance(plan.get('terms'), list) and all(is_codes(term) for term in plan['terms'])):
+        return plan_error("terms must be a list of lists of course codes")
+    
+    return jsonify(dict(missing = prerequisite_index.get().validate(plan['terms'])))
+
+@app.route("/plan/course/", methods=['POST'])
+def course_prerequisites():
+    # The query is {"code": course code, "passed": [course codes]}; passed is optional
+    query = request.get_json(silent=True)
+    
+    if not (isinstance(query, dict) and isinstance(query.get('code'), str)):
+        return plan_error("code must be a course code")
+    elif not is_codes(query.get('passed', [])):
+        return plan_error("passed must be a list of course codes")
+    
+    index = prerequisite_index.get()
+    code, passed = query['code'], query.get('passed', [])
+    
+    # What passing the course unlocks, the longest chain left to it and what failing it blocks
+    return jsonify(dict(
+        unlocks = index.unlocks(code, passed),
+        chain = index.chain(code, passed),
+        blocked_by = index.blocked_by(code, passed)
+    ))
+
+@app.route("/plan/generate/", methods=['POST'])
+def generate_plan():
+    # The options are {"passed": [course codes], "load_limits": [courses of each term], "start": "F", "summer": false}
+    options = request.get_json(silent=True)
+    
+    if not isinstance(options, dict):
+        return plan_error("The options must be a JSON object")
+    elif not is_codes(options.get('passed', [])):
+        return plan_error("passed must be a list of course codes")
+    elif not is_counts(options.get('load_limits', [])):
+        return plan_error("load_limits must be a list of numbers of courses")
+    elif options.get('start', "F") not in ["F", "W", "S"]:
+        return plan_error("start must be F, W or S")
+    elif (options.get('default_load') is not None) and not is_count(options['default_load']):
+        return plan_error("default_load must be a number of courses")
+    elif not isinstance(options.get('summer', False), bool):
+        return plan_error("summer must be true or false")
+    
+    state = load_state()
+    
+    if state.program not in programs:
+        return plan_error("No program has been selected", 409)
+    
+    generator = PlanGenerator(prerequisite_index.get(), program_data.elective_courses.get().courses, state.mainline, options.get('passed', []))
+    
+    return jsonify(generator.plan(options.get('start', "F"), options.get('load_limits', []), options.get('default_load'), options.get('summer', False)))
+
+@app.route("/plan/electives/", methods=['POST'])
+def match_electives():
+    # The plan is {"courses": [course codes], "season": "F"}; the season is optional
+    plan = request.get_json(silent=True)
+    
+    if not (isinstance(plan, dict) and is_codes(plan.get('courses'))):
+        return plan_error("courses must be a list of course codes")
+    elif plan.get('season') not in [None, "", "F", "W", "S"]:
+        return plan_error("season must be F, W or S")
+    
+    state = load_state()
+    
+    if (state.program not in programs) or (state.start_year not in years):
+        return plan_error("No program has been selected", 409)
+    
+    matcher = electives.elective_matcher(programs.index(state.program), years.index(state.start_year))
+    matched = matcher.match(plan['courses'])
+    
+    if plan.get('season'):
+        matched['still_counting'] = matcher.still_counting(plan['courses'], plan['season'])
+    
+    return jsonify(matched)
+
 @app.route("/result/")
 def result():
-    global list_of_names
-    global semester
-    global x_timetable
-    global section_regex
+    state = load_state()
     
-    timetables = all_timetables(list_of_names, x_timetable, section_regex, semester) 
+    timetables = all_timetables(state.list_of_names, state.x_timetable(), state.section_regex, state.semester) 
     
-    copy_list = ', '.join(list_of_names)
+    copy_list = ', '.join(state.list_of_names)
     
-    list_of_names.clear()
-    semester = ""
-    x_timetable = Timetable([])
+    state.list_of_names.clear()
+    state.semester = ""
+    state.blocked_off = []
+    save_state(state)
  
     if len(timetables) == 0:
         return f"<h1>Unable to generate time table for {copy_list} with the given filter parameters</h1>"
@@ -366,4 +344,3 @@ def result():
             course_ml = course_ml,
             timetables = timetables       
         )
- 
\ No newline at end of file
@@ -0,0 +1,262 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from flask import session
+from mydegree import app
+from mydegree.data_structures import Course, Timetable
+from mydegree.timetable_cache import timetable_cache
+
+SESSION_KEY = 'planner_id' # The key of the state id in the Flask session cookie
+MAX_ENTRIES = 1000 # The most states (or pagers of states) a store keeps in memory by default
+TTL = 24 * 60 * 60 # Seconds a state (or pager of a state) is kept in memory after it was last used by default
+
+class PlannerState:
+    """ This class holds everything one student has entered into the planner. It replaces the module-level
+        globals routes.py used to keep, so students using the app at the same time no longer share them.
+
+        Attributes
+        ----------
+        list_of_names : list
+            The course names entered since the timetables were last shown
+        semester : str
+            The given semester (Fall, Winter, or Summer)
+        blocked_off : list
+            The blocked off times as dictionaries with a day, startTime and endTime
+        section_regex : dict
+            A dictionary with the course names as the keys and regular expressions
+            representing the course sections to include as the corresponding values
+        timetable_courses : list
+            The course names the current timetables were generated for
+        rank_by : str
+            The name of the score in ranking.SCORES the timetables are ranked by, or "" to show them all
+        program, start_year, mainline, elctv_data, in_order_load
+            What was chosen on the select program page
+
+        Methods
+        -------
+        x_timetable()
+            Returns a Timetable object with the blocked off times represented by Course objects
+        generate()
+            Starts generating the timetables of list_of_names and returns their TimetablePager. When only the
+            filters were tightened, the previous timetables are filtered instead.
+        pager()
+            Returns the TimetablePager of the current timetables, which is taken from the timetable cache if the
+            state was loaded without it
+        to_dict()
+            Returns the state without the TimetablePager as a dictionary that can be saved as JSON
+    """
+    FIELDS = dict(
+        list_of_names = list, semester = str, blocked_off = list, section_regex = dict, timetable_courses = list, rank_by = str,
+        program = str, start_year = str, mainline = list, elctv_data = list, in_order_load = bool
+    )
+
+    def __init__(self, **kwargs):
+        for field, default in self.FIELDS.items():
+            setattr(self, field, kwargs.get(field, default()))
+        self.timetables = None
+
+    def x_timetable(self) -> 'data_structures.Timetable':
+        x_timetable = Timetable([])
+
+        for blocked in self.blocked_off:
+            x_timetable.add_course(
+                Course(
+                    crn=0,
+                    code="NONE 0000",
+                    title="Filler Course",
+                    days=[blocked['day']],
+                    week=0,
+                    start_time=blocked['startTime'],
+                    end_time=blocked['endTime']
+                )
+            )
+
+        return x_timetable
+
+    def generate(self) -> 'data_structures.TimetablePager':
+        previous = self.timetables
+        self.timetable_courses = list(self.list_of_names)
+        self.timetables = timetable_cache.pager(self.timetable_courses, self.x_timetable(), self.section_regex, self.semester, previous, self.rank_by)
+        return self.timetables
+
+    def pager(self) -> 'data_structures.TimetablePager':
+        if self.timetables is None:
+            self.timetables = timetable_cache.pager(self.timetable_courses, self.x_timetable(), self.section_regex, self.semester, rank_by=self.rank_by)
+        return self.timetables
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+def expire(entries: 'OrderedDict', max_entries: int, ttl: float, now: float) -> None:
+    """ This method drops the entries of an OrderedDict of (last used time, ...) tuples, kept in the order they were
+        last used, that were last used more than ttl seconds before now, then the least recently used entries
+        until at most max_entries are left.
+    """
+    while entries and (now - next(iter(entries.values()))[0] > ttl):
+        entries.popitem(last=False)
+
+    while len(entries) > max_entries:
+        entries.popitem(last=False)
+
+class MemoryStateStore:
+    """ This class keeps the PlannerState objects in memory, so it only works with a single server process.
+        The TimetablePager of each state is kept along with it. At most max_entries states are kept, dropping
+        the least recently used first, and a state not used for ttl seconds is dropped. Each load returns a
+        copy of the saved state, so requests of the same student at once do not change each other's state;
+        only the TimetablePager, which can be shared, is the same object.
+
+        Methods
+        -------
+        load(state_id : str)
+            Returns the PlannerState object saved under state_id, or a new one
+        save(state_id : str, state : 'session_state.PlannerState')
+            Saves state under state_id
+        delete(state_id : str)
+            Forgets the state saved under state_id
+    """
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, state_id: str) -> 'session_state.PlannerState':
+        with self._lock:
+            now = self._clock()
+            expire(self._states, self.max_entries, self.ttl, now)
+
+            if state_id not in self._states:
+                return PlannerState()
+
+            _, data, pager = self._states[state_id]
+            self._states[state_id] = (now, data, pager)
+            self._states.move_to_end(state_id)
+
+        state = PlannerState(**copy.deepcopy(data))
+        state.timetables = pager
+        return state
+
+    def save(self, state_id: str, state: 'session_state.PlannerState') -> None:
+        data = copy.deepcopy(state.to_dict())
+
+        with self._lock:
+            now = self._clock()
+            self._states[state_id] = (now, data, state.timetables)
+            self._states.move_to_end(state_id)
+            expire(self._states, self.max_entries, self.ttl, now)
+
+    def delete(self, state_id: str) -> None:
+        with self._lock:
+            self._states.pop(state_id, None)
+
+class SqliteStateStore:
+    """ This class saves the PlannerState objects as JSON in a SQLite file, so every server process and thread
+        sees the same state. It uses its own file rather than site.db because the section catalog reloads
+        whenever site.db changes. A TimetablePager cannot be saved, so each process keeps the pagers it built
+        and rebuilds one from the saved parameters when it has not seen the state before. At most max_entries
+        pagers are kept, dropping the least recently used first, and a pager not used for ttl seconds is dropped.
+
+        Methods
+        -------
+        load(state_id : str)
+            Returns the PlannerState object saved under state_id, or a new one
+        save(state_id : str, state : 'session_state.PlannerState')
+            Saves state under state_id
+        delete(state_id : str)
+            Forgets the state saved under state_id
+    """
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES, ttl: float = TTL, clock=time.monotonic):
+        self._path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._pagers = OrderedDict()
+        self._lock = threading.Lock()
+
+        with self._connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS planner_state (state_id TEXT PRIMARY KEY, data TEXT NOT NULL)')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=10)
+
+    def load(self, state_id: str) -> 'session_state.PlannerState':
+        with self._connect() as connection:
+            row = connection.execute('SELECT data FROM planner_state WHERE state_id = ?', (state_id,)).fetchone()
+
+        if row is None:
+            return PlannerState()
+
+        state = PlannerState(**json.loads(row[0]))
+
+        with self._lock:
+            now = self._clock()
+            expire(self._pagers, self.max_entries, self.ttl, now)
+
+            if state_id in self._pagers:
+                _, data, pager = self._pagers[state_id]
+
+                if data == row[0]:
+                    state.timetables = pager
+                    self._pagers[state_id] = (now, data, pager)
+                    self._pagers.move_to_end(state_id)
+
+        return state
+
+    def save(self, state_id: str, state: 'session_state.PlannerState') -> None:
+        data = json.dumps(state.to_dict())
+
+        with self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO planner_state (state_id, data) VALUES (?, ?)', (state_id, data))
+
+        with self._lock:
+            now = self._clock()
+
+            if state.timetables is None:
+                self._pagers.pop(state_id, None)
+            else:
+                self._pagers[state_id] = (now, data, state.timetables)
+                self._pagers.move_to_end(state_id)
+
+            expire(self._pagers, self.max_entries, self.ttl, now)
+
+    def delete(self, state_id: str) -> None:
+        with self._connect() as connection:
+            connection.execute('DELETE FROM planner_state WHERE state_id = ?', (state_id,))
+
+        with self._lock:
+            self._pagers.pop(state_id, None)
+
+def make_state_store(config: dict):
+    """ This method returns the state store named by PLANNER_STATE_STORE in config, either "memory" (default) or
+        "sqlite". The SQLite store is saved to PLANNER_STATE_PATH, which defaults to planner_state.db in the
+        instance folder. PLANNER_STATE_ENTRIES and PLANNER_STATE_TTL limit what the store keeps in memory.
+    """
+    limits = dict(max_entries = config.get('PLANNER_STATE_ENTRIES', MAX_ENTRIES), ttl = config.get('PLANNER_STATE_TTL', TTL))
+
+    if config.get('PLANNER_STATE_STORE', 'memory') == 'sqlite':
+        path = config.get('PLANNER_STATE_PATH') or os.path.join(app.instance_path, 'planner_state.db')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return SqliteStateStore(path, **limits)
+    return MemoryStateStore(**limits)
+
+state_store = make_state_store(app.config)
+
+def state_id() -> str:
+    """ This method returns the id of the current student's state, giving the Flask session a new one if needed.
+        It must be called inside a request.
+    """
+    if SESSION_KEY not in session:
+        session[SESSION_KEY] = uuid.uuid4().hex
+    return session[SESSION_KEY]
+
+def load_state() -> 'session_state.PlannerState':
+    return state_store.load(state_id())
+
+def save_state(state: 'session_state.PlannerState') -> None:
+    state_store.save(state_id(), state)
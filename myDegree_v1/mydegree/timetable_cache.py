@@ -0,0 +1,138 @@
+import threading
+from collections import OrderedDict
+from typing import List
+from mydegree import app, catalog, ranking
+from mydegree.data_structures import TimetablePager, any_week, indexed_timetables, narrow_timetables, timetable_sections
+
+def timetable_key(input_courses: List[str], x_timetable: 'data_structures.Timetable', section_regex: dict, semester: str, rank_by: str = "") -> tuple:
+    """ This method returns the key of a timetable request. Requests for the same courses in any order, with the
+        same section regexes and with blocked off times covering the same minutes have the same key.
+
+        Parameters
+        ----------
+        input_courses : list
+            The course names with only the department code and the course number
+        x_timetable : 'data_structures.Timetable'
+            A Timetable object with blocked off times represented by Course objects
+        section_regex : dict
+            A dictionary with the course names as the keys and regular expressions
+            representing the course sections to include as the corresponding values
+        semester : str
+            The given semester (Fall, Winter, or Summer)
+        rank_by : str
+            The name of the score in ranking.SCORES the timetables are ranked by, or "" if they are not ranked
+
+        Returns
+        -------
+        tuple
+            The semester, the sorted course names, their section regexes, the blocked off minutes (None if
+            there are no blocked off times) and rank_by
+    """
+    courses = tuple(sorted(set(input_courses)))
+    blocked_off = any_week(x_timetable.mask) if len(x_timetable.courses) != 0 else None
+
+    return (semester, courses, tuple(section_regex.get(course, "") for course in courses), blocked_off, rank_by)
+
+class TimetableCache:
+    """ This class is a process-wide LRU cache of TimetablePager objects keyed by timetable_key(), so students
+        asking for the same timetables share them. It holds at most max_entries pagers and about max_bytes bytes
+        of timetables, dropping the least recently used pagers first. Since pagers keep growing as pages are
+        requested, the limits are checked again on every lookup. The whole cache is dropped whenever the
+        CourseData table changes.
+
+        On a miss, the search of the previous TimetablePager of the student is narrowed down to the remaining lecture
+        and lab combinations when the filters were only tightened (see data_structures.narrow_timetables()), and
+        the timetables are searched for from scratch otherwise. Ranked timetables are always searched for from 
+        scratch, since only the best of them are kept.
+
+        Methods
+        -------
+        pager(input_courses : list, x_timetable : 'data_structures.Timetable', section_regex : dict, semester : str, previous : 'data_structures.TimetablePager', rank_by : str)
+            Returns the cached TimetablePager of the request, building it on a miss
+        stats()
+            Returns the hits, misses, narrowed misses, evictions, entries and approximate bytes of the cache
+        clear()
+            Drops all cached pagers
+    """
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.narrowed = 0
+        self.evictions = 0
+        self._pagers = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _size(self) -> int:
+        return sum(pager.size() for pager in self._pagers.values())
+
+    def _evict(self) -> None:
+        while len(self._pagers) > self.max_entries:
+            self._pagers.popitem(last=False)
+            self.evictions += 1
+
+        # The most recently used pager is kept even when it alone is over max_bytes
+        while (len(self._pagers) > 1) and (self._size() > self.max_bytes):
+            self._pagers.popitem(last=False)
+            self.evictions += 1
+
+    def pager(self, input_courses: List[str], x_timetable: 'data_structures.Timetable', section_regex: dict, semester: str, previous: 'data_structures.TimetablePager' = None, rank_by: str = "") -> 'data_structures.TimetablePager':
+        key = timetable_key(input_courses, x_timetable, section_regex, semester, rank_by)
+        version = catalog.section_catalog.version()
+
+        with self._lock:
+            if version != self._version:
+                self._pagers.clear()
+                self._version = version
+
+            if key in self._pagers:
+                self.hits += 1
+                self._pagers.move_to_end(key)
+                self._evict()
+                return self._pagers[key]
+
+            self.misses += 1
+            # Only an unranked pager still in the cache was built from the current CourseData and has a search to narrow
+            if (rank_by != "") or not any((previous is pager) and (pager_key[-1] == "") for pager_key, pager in self._pagers.items()):
+                previous = None
+
+        sections = timetable_sections(list(key[1]), x_timetable, section_regex, semester)
+        timetables = narrow_timetables(previous, sections) if previous is not None else None
+
+        if rank_by != "":
+            timetables = dict(timetables = ranking.top_timetables(sections["section_combos"], ranking.SCORES[rank_by]), ranked = True, **sections)
+        elif timetables is None:
+            timetables = dict(indexed_timetables(sections["section_combos"]), **sections)
+        else:
+            with self._lock:
+                self.narrowed += 1
+
+        pager = TimetablePager(timetables)
+
+        with self._lock:
+            if version == self._version:
+                pager = self._pagers.setdefault(key, pager)
+                self._pagers.move_to_end(key)
+                self._evict()
+
+        return pager
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                hits = self.hits,
+                misses = self.misses,
+                narrowed = self.narrowed,
+                evictions = self.evictions,
+                entries = len(self._pagers),
+                bytes = self._size()
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pagers.clear()
+            self._version = None
+
+timetable_cache = TimetableCache(app.config['TIMETABLE_CACHE_ENTRIES'], app.config['TIMETABLE_CACHE_BYTES'])
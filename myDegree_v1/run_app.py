@@ -1,4 +1,6 @@
+import logging
 from mydegree import app
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO) # Shows the timing of each request (see mydegree/instrumentation.py)
     app.run(host="0.0.0.0", port=4050, debug=True)
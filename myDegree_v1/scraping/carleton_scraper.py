@@ -1,16 +1,14 @@
-import http.client
 import json
 import os
 import re
-import time
 from datetime import datetime
 from pathlib import Path
-import requests
 from pypdf import PdfReader
 
 import course_info
 import program_tree
 import electives_pdf
+from fetcher import Fetcher
 from parser_interface import Parser
 
 # Departments to scrape courses from
@@ -27,6 +25,7 @@ ELECTIVES_URLS = [
     "https://carleton.ca/engineering-design/current-students/undergrad-academic-support/comp-electives-for-software-engineering/",
     "https://carleton.ca/engineering-design/current-students/undergrad-academic-support/science-electives/"
 ]
+PDF_LINK_REGEX = r"https://.+.pdf"  # Link to the PDF list on each electives page
 
 # Directories to store scraped/parsed files
 DEPT_DIR = "departments"
@@ -36,6 +35,9 @@ PROGRAM_HTML_DIR = f"{PROGRAM_DIR}/raw_html"
 ELECTIVES_DIR = "electives"
 ELECTIVES_PDF_DIR = f"{ELECTIVES_DIR}/raw_pdf"
 
+# Shared by every fetch so connections are reused and each host's limits apply across scrapes
+page_fetcher = Fetcher()
+
 
 def fetch_page(url: str):
     """
@@ -44,20 +46,7 @@ def fetch_page(url: str):
     :param url: URL to fetch
     :return: The page, or None if page could not be fetched
     """
-    max_retries = 5
-    for attempt in range(max_retries):
-        try:
-            page = requests.get(url, headers={
-                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/51.0.2704.103 Safari/537.36"
-            })  # Use random user agent to mitigate blocked requests
-            return page
-        except (requests.exceptions.ConnectionError, http.client.RemoteDisconnected) as e:
-            time.sleep(1.5 ** attempt)  # Exponential backoff if fetch fails
-            if attempt >= max_retries - 1:
-                print(f"Max retries exceeded. {url} not acquired")
-            else:
-                print(f"Connection failed, retrying #{attempt}")
-    return None
+    return page_fetcher.fetch(url)
 
 
 def fetch_and_store(url: str, destination: str, type="html", replace=False) -> None:
@@ -83,6 +72,18 @@ def fetch_and_store(url: str, destination: str, type="html", replace=False) -> N
                     file.write(page.content)
 
 
+def fetch_and_store_all(jobs: list[tuple[str, str]], type="html", replace=False) -> None:
+    """
+    Fetches and stores the pages of the given (url, destination) pairs concurrently,
+    as fetch_and_store does for one.
+    :param jobs: The url to fetch and the destination file path of each page
+    :param type: The type of file to write. Options are "html" (default), "file" (used for pdfs).
+    :param replace: True to replace existing files, False to ignore
+    :return: None
+    """
+    page_fetcher.map(lambda job: fetch_and_store(job[0], job[1], type=type, replace=replace), jobs)
+
+
 def scrape_dept_courses(replace=False) -> None:
     """
     Fetches the html for all departments and stores them in the DEPT_HTML_DIR.
@@ -90,10 +91,8 @@ def scrape_dept_courses(replace=False) -> None:
     :param replace: If True (default False), replaces scraped files if existing
     :return: None
     """
-    for dept in DEPTS:
-        dept_file = f"{DEPT_HTML_DIR}/{dept}.html"
-        dept_url = DEPT_COURSES_URL + dept
-        fetch_and_store(dept_url, dept_file, replace=replace)
+    jobs = [(DEPT_COURSES_URL + dept, f"{DEPT_HTML_DIR}/{dept}.html") for dept in DEPTS]
+    fetch_and_store_all(jobs, replace=replace)
 
 
 def scrape_program_trees(replace=False) -> None:
@@ -105,13 +104,15 @@ def scrape_program_trees(replace=False) -> None:
     :return: None
     """
     years = get_catalog_years(5)
+    jobs = []
     for year in years:
-        catalog_file = f"{PROGRAM_HTML_DIR}/{catalog_filename("", year)}.html"
+        catalog_file = f"{PROGRAM_HTML_DIR}/{catalog_filename('', year)}.html"
         if year == years[-1]:
             calendar_url = CURRENT_CALENDAR_URL
         else:
-            calendar_url = f"{OLD_CALENDAR_URL.replace("YEAR", year)}"
-        fetch_and_store(calendar_url, catalog_file, replace=replace)
+            calendar_url = f"{OLD_CALENDAR_URL.replace('YEAR', year)}"
+        jobs.append((calendar_url, catalog_file))
+    fetch_and_store_all(jobs, replace=replace)
 
 
 def scrape_electives(replace=False) -> None:
@@ -122,14 +123,14 @@ def scrape_electives(replace=False) -> None:
     :param replace: If True (default False), replaces scraped files if existing
     :return: None
     """
-    for elective_urls in ELECTIVES_URLS:
-        page = fetch_page(elective_urls)
+    jobs = []
+    for elective_urls, page in zip(ELECTIVES_URLS, page_fetcher.fetch_all(ELECTIVES_URLS)):
         if page:
-            pdf_link_regex = r"https://.+.pdf"
-            pdf_link = re.search(pdf_link_regex, page.text)
+            pdf_link = re.search(PDF_LINK_REGEX, page.text)
             if pdf_link:
                 dest = f"{ELECTIVES_PDF_DIR}/{elective_urls.split('/')[-2]}.pdf"
-                fetch_and_store(pdf_link.group(), dest, type="file", replace=replace)
+                jobs.append((pdf_link.group(), dest))
+    fetch_and_store_all(jobs, type="file", replace=replace)
 
 
 def catalog_filename(program_name: str, catalog_year: str) -> str:
@@ -143,7 +144,7 @@ def catalog_filename(program_name: str, catalog_year: str) -> str:
     :return: The conventional filename for the given parameters
     """
     if program_name:
-        return f"{program_name.replace(" ", "_")}_{catalog_year}"
+        return f"{program_name.replace(' ', '_')}_{catalog_year}"
     else:
         return f"programs_{catalog_year}"
 
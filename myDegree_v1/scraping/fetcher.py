@@ -0,0 +1,147 @@
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# Use random user agent to mitigate blocked requests
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/51.0.2704.103 Safari/537.36"
+
+MAX_WORKERS = 8  # Pages fetched at once across every host
+HOST_CONCURRENCY = 4  # Pages fetched at once from one host, also the number of connections kept open to it
+REQUESTS_PER_SECOND = 4.0  # Requests started per second to one host, on average
+BURST = 4  # Requests that may be started at once to a host that has not been sent any for a while
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.5  # Seconds waited after the nth failed attempt are BACKOFF_BASE ** n
+
+
+class TokenBucket:
+    """
+    A token bucket rate limit. Tokens are added at rate per second up to capacity,
+    and each request takes one, waiting for it if the bucket is empty. Thread safe.
+    """
+
+    def __init__(self, rate: float, capacity: int, clock=time.monotonic, sleep=time.sleep):
+        """
+        :param rate: Tokens added per second
+        :param capacity: The most tokens the bucket holds, i.e. the largest burst
+        :param clock: Function returning the current time in seconds
+        :param sleep: Function waiting the given seconds
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Takes a token, waiting until one is available.
+        :return: None
+        """
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)  # Wait outside the lock so other threads can check the bucket
+
+
+class Fetcher:
+    """
+    Fetches pages over one shared requests.Session, so connections to a host are
+    kept alive and reused instead of opening a new TCP/TLS connection per page.
+    Requests to each host are capped at host_concurrency at a time and rate limited
+    with a TokenBucket, and failed connections are retried with exponential backoff.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, host_concurrency: int = HOST_CONCURRENCY,
+                 requests_per_second: float = REQUESTS_PER_SECOND, burst: int = BURST,
+                 max_retries: int = MAX_RETRIES, backoff_base: float = BACKOFF_BASE, sleep=time.sleep):
+        """
+        :param max_workers: Pages fetched at once by fetch_all
+        :param host_concurrency: Pages fetched at once from one host
+        :param requests_per_second: Requests started per second to one host
+        :param burst: Requests that may be started at once to an idle host
+        :param max_retries: Attempts made to fetch a page
+        :param backoff_base: Seconds waited after the nth failed attempt are backoff_base ** n
+        :param sleep: Function waiting the given seconds, used for backoff and rate limiting
+        """
+        self.max_workers = max_workers
+        self.host_concurrency = host_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.sleep = sleep
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        # Retries are done here, so the adapter does not retry
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=host_concurrency, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.hosts = {}
+        self.hosts_lock = threading.Lock()
+
+    def host_limits(self, url: str) -> tuple[threading.Semaphore, TokenBucket]:
+        """
+        Return the concurrency cap and rate limit of the host of the given URL.
+        :param url: The URL
+        :return: The semaphore and token bucket of its host
+        """
+        host = urlsplit(url).netloc
+        with self.hosts_lock:
+            if host not in self.hosts:
+                self.hosts[host] = (threading.BoundedSemaphore(self.host_concurrency),
+                                    TokenBucket(self.requests_per_second, self.burst, sleep=self.sleep))
+            return self.hosts[host]
+
+    def fetch(self, url: str):
+        """
+        Fetches the page at the given URL, attempting up to max_retries times with exponential backoff.
+        Returns the page, or None if the page could not be fetched.
+        :param url: URL to fetch
+        :return: The page, or None if page could not be fetched
+        """
+        slots, bucket = self.host_limits(url)
+        for attempt in range(self.max_retries):
+            try:
+                with slots:
+                    bucket.acquire()
+                    return self.session.get(url)
+            except (requests.exceptions.ConnectionError, http.client.RemoteDisconnected):
+                self.sleep(self.backoff_base ** attempt)  # Exponential backoff if fetch fails, without holding a slot
+                if attempt >= self.max_retries - 1:
+                    print(f"Max retries exceeded. {url} not acquired")
+                else:
+                    print(f"Connection failed, retrying #{attempt}")
+        return None
+
+    def map(self, function, items: list) -> list:
+        """
+        Calls function on every item from max_workers threads.
+        :param function: Function of one item, usually fetching a page
+        :param items: The items
+        :return: The results, in the order of items
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(function, items))
+
+    def fetch_all(self, urls: list[str]) -> list:
+        """
+        Fetches the pages at the given URLs concurrently.
+        :param urls: URLs to fetch
+        :return: The page, or None if it could not be fetched, of each URL in order
+        """
+        return self.map(self.fetch, urls)
+
+    def close(self) -> None:
+        self.session.close()
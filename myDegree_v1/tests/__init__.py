@@ -0,0 +1,16 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# The tests run on a copy of instance/site.db, upgraded as excel_to_sql.py --upgrade-db would, so the bundled
+# database is never written to. This must run before mydegree is first imported.
+_folder = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, _folder, ignore_errors=True)
+shutil.copy(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'site.db'), _folder)
+os.environ.setdefault('DATABASE_URI', 'sqlite:///' + os.path.join(_folder, 'site.db'))
+
+from mydegree import app, models
+
+with app.app_context():
+    models.upgrade_course_data()
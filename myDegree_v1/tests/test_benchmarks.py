@@ -0,0 +1,42 @@
+import unittest
+
+# mydegree is imported before the benchmark so the tests keep using their copy of site.db instead of the benchmark fixture
+from mydegree.data_structures import backtrack_timetables
+from mydegree.ranking import SCORES
+from benchmarks import bench_timetables
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.sections = lambda: dict(section_combos = bench_timetables.synthetic_combos(3, 3, 2, 0.5, 1), none_list = [])
+
+    def test_synthetic_combos(self):
+        section_combos = self.sections()["section_combos"]
+        self.assertEqual(3, len(section_combos))
+        # The same seed builds the same sections, so results of different commits can be compared
+        self.assertEqual(
+            [[course.crn for combo in combos for course in combo.courses] for combos in section_combos],
+            [[course.crn for combo in combos for course in combo.courses] for combos in self.sections()["section_combos"]]
+        )
+
+        for combos in section_combos:
+            for combo in combos:
+                self.assertFalse(combo.courses[0].conflicts(combo.courses[1]))
+
+    def test_run_case(self):
+        result = bench_timetables.run_case(self.sections, 1)
+        self.assertEqual(len(list(backtrack_timetables(self.sections()["section_combos"]))), result["timetables"])
+        self.assertEqual(set(bench_timetables.stages(self.sections)), set(result["stages"]))
+
+        for timing in result["stages"].values():
+            self.assertLessEqual(timing["min_ms"], timing["median_ms"])
+
+    def test_rank_matches_score_all(self):
+        case_stages = bench_timetables.stages(self.sections)
+        score = SCORES[bench_timetables.RANK_BY]
+        self.assertEqual(case_stages["score_all"](), [score.cost(timetable.mask) for timetable in case_stages["rank"]()])
+
+    def test_compare(self):
+        results = dict(cases = dict(a = dict(stages = dict(count = dict(median_ms = 2.0)))))
+        baseline = dict(cases = dict(a = dict(stages = dict(count = dict(median_ms = 4.0), rank = dict(median_ms = 1.0)))))
+        self.assertEqual([("a", "count", 4.0, 2.0, 0.5)], bench_timetables.compare(results, baseline))
@@ -0,0 +1,172 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from ..scraping import carleton_scraper
+from ..scraping.fetcher import Fetcher, TokenBucket
+
+# Fixture pages served by the stand-in server, keyed by path
+PAGES = {
+    "/courses/SYSC": "<html><body><div class='courseblock'>SYSC 2006</div></body></html>",
+    "/courses/ELEC": "<html><body><div class='courseblock'>ELEC 2501</div></body></html>",
+    "/courses/MATH": "<html><body><div class='courseblock'>MATH 1104</div></body></html>",
+    "/electives/science-electives/": "<a href='{base}/files/science.pdf'>Science electives</a>",
+    "/files/science.pdf": "%PDF-1.4 fixture",
+    "/flaky/": "<html><body>Answered</body></html>",
+    "/overlap/": "<html><body>Together</body></html>"
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(self.path)
+            self.server.active += 1
+            self.server.most_active = max(self.server.most_active, self.server.active)
+            # The first drops requests to /flaky/ are dropped without an answer
+            drop = (self.path == "/flaky/") and self.server.drops > 0
+            self.server.drops -= drop
+
+        try:
+            if drop:
+                self.close_connection = True
+                return
+
+            if self.path.startswith("/overlap/"):
+                # Requests to /overlap/ are only answered once another one has arrived
+                try:
+                    self.server.barrier.wait(timeout=5)
+                except threading.BrokenBarrierError:
+                    self.server.alone += 1
+
+            time.sleep(0.02)  # Long enough for requests to overlap
+            page = PAGES.get(self.path.split("?")[0])
+            body = (page or "Not found").replace("{base}", self.server.base).encode()
+            self.send_response(200 if page is not None else 404)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with self.server.lock:
+                self.server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FetcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        self.server.base = f"http://127.0.0.1:{self.server.server_port}"
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.connections = 0
+        self.server.active = 0
+        self.server.most_active = 0
+        self.server.drops = 0
+        self.server.barrier = threading.Barrier(2)
+        self.server.alone = 0
+        threading.Thread(target=self.server.serve_forever, kwargs=dict(poll_interval=0.05), daemon=True).start()
+        self.sleeps = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fetcher(self, **limits) -> Fetcher:
+        options = dict(max_workers=8, host_concurrency=2, requests_per_second=1000, burst=100)
+        options.update(limits)
+        fetcher = Fetcher(**options)
+        self.addCleanup(fetcher.close)
+        return fetcher
+
+    def test_fetch_all(self):
+        fetcher = self.fetcher()
+        urls = [f"{self.server.base}/courses/SYSC?page={i}" for i in range(12)]
+        pages = fetcher.fetch_all(urls)
+
+        self.assertEqual([200] * 12, [page.status_code for page in pages])
+        self.assertLessEqual(self.server.most_active, 2)  # The host concurrency cap
+        self.assertLessEqual(self.server.connections, 2)  # Connections are kept alive and reused
+
+    def test_fetch_all_overlaps(self):
+        pages = self.fetcher().fetch_all([f"{self.server.base}/overlap/?page={i}" for i in range(4)])
+
+        self.assertEqual([200] * 4, [page.status_code for page in pages])
+        self.assertEqual(0, self.server.alone)  # Every request arrived while another was being answered
+
+    def test_rate_limit(self):
+        fetcher = self.fetcher(requests_per_second=50, burst=1)
+        start = time.monotonic()
+        fetcher.fetch_all([f"{self.server.base}/courses/ELEC?page={i}" for i in range(6)])
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50)
+
+    def test_retry(self):
+        fetcher = self.fetcher(sleep=self.sleeps.append)
+        self.server.drops = 2
+
+        with mock.patch("builtins.print"):
+            page = fetcher.fetch(f"{self.server.base}/flaky/")
+
+        self.assertEqual(200, page.status_code)
+        self.assertEqual([1, 1.5], self.sleeps)  # The same backoff as before
+
+    def test_max_retries(self):
+        fetcher = self.fetcher(sleep=self.sleeps.append)
+        self.server.drops = 5
+
+        with mock.patch("builtins.print") as printed:
+            self.assertIsNone(fetcher.fetch(f"{self.server.base}/flaky/"))
+
+        self.assertEqual(5, len(self.sleeps))
+        printed.assert_called_with(f"Max retries exceeded. {self.server.base}/flaky/ not acquired")
+
+    def test_errors_are_returned(self):
+        # As with requests.get, pages are returned whatever their status
+        self.assertEqual(404, self.fetcher().fetch(f"{self.server.base}/missing").status_code)
+
+    def test_token_bucket(self):
+        now = [0.0]
+        bucket = TokenBucket(2, 2, clock=lambda: now[0], sleep=lambda seconds: (self.sleeps.append(seconds), now.__setitem__(0, now[0] + seconds)))
+
+        for _ in range(4):
+            bucket.acquire()
+
+        self.assertEqual([0.5, 0.5], self.sleeps)  # Two tokens at once, then one every half second
+
+    def test_scrape(self):
+        with tempfile.TemporaryDirectory() as folder, \
+                mock.patch.object(carleton_scraper, "page_fetcher", self.fetcher()), \
+                mock.patch.object(carleton_scraper, "DEPTS", {"SYSC", "ELEC", "MATH"}), \
+                mock.patch.object(carleton_scraper, "DEPT_COURSES_URL", f"{self.server.base}/courses/"), \
+                mock.patch.object(carleton_scraper, "DEPT_HTML_DIR", os.path.join(folder, "departments")), \
+                mock.patch.object(carleton_scraper, "ELECTIVES_URLS", [f"{self.server.base}/electives/science-electives/"]), \
+                mock.patch.object(carleton_scraper, "ELECTIVES_PDF_DIR", os.path.join(folder, "electives")), \
+                mock.patch.object(carleton_scraper, "PDF_LINK_REGEX", r"http://.+.pdf"):
+            carleton_scraper.scrape_dept_courses()
+            carleton_scraper.scrape_electives()
+            # Files already scraped are not fetched again
+            carleton_scraper.scrape_dept_courses()
+
+            self.assertEqual(["ELEC.html", "MATH.html", "SYSC.html"], sorted(os.listdir(os.path.join(folder, "departments"))))
+            with open(os.path.join(folder, "departments", "SYSC.html"), encoding="utf-8") as file:
+                self.assertEqual(PAGES["/courses/SYSC"], file.read())
+            with open(os.path.join(folder, "electives", "science-electives.pdf"), "rb") as file:
+                self.assertEqual(b"%PDF-1.4 fixture", file.read())
+            self.assertEqual(5, len(self.server.requests))
+
+
+if __name__ == '__main__':
+    unittest.main()
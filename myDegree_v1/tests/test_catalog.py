@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+
+from mydegree import app, catalog, db, models
+from mydegree.data_structures import Course
+
+
+class CatalogTestCase(unittest.TestCase):
+    def test_section_kind(self):
+        self.assertEqual(models.LECTURE, models.section_kind("A"))
+        self.assertEqual(models.LAB, models.section_kind("L1"))
+        self.assertEqual(models.LAB, models.section_kind("L1O"))
+        self.assertEqual(models.TUTORIAL, models.section_kind("A1"))
+        self.assertEqual(models.OTHER, models.section_kind("L10O"))
+
+    def test_split_course_code(self):
+        self.assertEqual(
+            dict(department="SYSC", course_number="2310", section="L1O", section_kind=models.LAB),
+            models.split_course_code("SYSC 2310 L1O")
+        )
+
+    def test_upgrade_up_to_date(self):
+        # The tests' copy of the database was upgraded (see tests/__init__.py), so upgrading it again writes nothing
+        with app.app_context(), mock.patch.object(db.engine, "begin") as begin:
+            models.upgrade_course_data()
+        begin.assert_not_called()
+
+    def test_course_sections(self):
+        sections = catalog.CourseSections()
+        for section in ["A", "A1", "A2", "B", "B1"]:
+            sections.add(section, Course(0, f"MATH 1104 {section}", "", [1], 0, 515, 595))
+
+        self.assertEqual(["MATH 1104 A", "MATH 1104 B"], [course.code for course in sections.lectures])
+        self.assertEqual(["MATH 1104 A1", "MATH 1104 A2"], [course.code for course in sections.labs_by_letter["A"]])
+        self.assertEqual(("MATH", "1104"), catalog.course_key("MATH 1104"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import itertools
+import unittest
+from unittest import mock
+
+from mydegree import data_structures
+from mydegree.data_structures import Course, Timetable, TimetablePager, backtrack_timetables, conflict_matrix, count_timetables, indexed_timetables, narrow_timetables
+
+
+crns = itertools.count(10000)
+
+
+def make_course(days, week, start_time, end_time, code="SYSC 0000 A"):
+    return Course(crn=next(crns), code=code, title="", days=days, week=week, start_time=start_time, end_time=end_time)
+
+
+def sample_section_combos():
+    return [
+        [
+            Timetable([make_course([1, 3], 0, 515, 595, "SYSC 2004 A"), make_course([2], 0, 875, 985, "SYSC 2004 L1")]),
+            Timetable([make_course([1, 3], 0, 515, 595, "SYSC 2004 A"), make_course([5], 0, 575, 685, "SYSC 2004 L2")])
+        ],
+        [
+            Timetable([make_course([2, 4], 0, 515, 595, "SYSC 2006 A")]),
+            Timetable([make_course([1, 3], 0, 575, 655, "SYSC 2006 B")])
+        ],
+        [
+            Timetable([make_course([5], 1, 515, 685, "SYSC 2510 L1O")]),
+            Timetable([make_course([5], 2, 515, 685, "SYSC 2510 L2E")]),
+            Timetable([make_course([2], 0, 875, 1045, "SYSC 2510 L3")])
+        ]
+    ]
+
+
+def iter_timetables_of(section_combos):
+    return dict(indexed_timetables(section_combos), none_list=[], section_combos=section_combos)
+
+
+class ConflictTestCase(unittest.TestCase):
+    def test_overlapping_times(self):
+        first = make_course([1, 3], 0, 515, 595)
+        self.assertTrue(first.conflicts(make_course([3], 0, 595, 685)))  # Touching end and start times overlap
+        self.assertFalse(first.conflicts(make_course([3], 0, 596, 685)))
+        self.assertFalse(first.conflicts(make_course([2, 4], 0, 515, 595)))
+
+    def test_biweekly(self):
+        odd = make_course([4], 1, 875, 1045)
+        self.assertFalse(odd.conflicts(make_course([4], 2, 875, 1045)))
+        self.assertTrue(odd.conflicts(make_course([4], 1, 875, 1045)))
+        self.assertTrue(odd.conflicts(make_course([4], 0, 875, 1045)))
+
+    def test_none_escape_hatches(self):
+        course = make_course([2], 0, 605, 685)
+        self.assertFalse(course.conflicts(make_course([None], 0, 605, 685)))
+        self.assertFalse(course.conflicts(make_course([2], 0, None, None)))
+        self.assertTrue(course.conflicts(make_course([5, None], 0, 605, 685)))  # A later None day is any day
+
+    def test_compact_course(self):
+        course = make_course([3, 1], 0, 515, 595)
+        self.assertEqual((1, 3), course.days)
+        self.assertEqual((None,), make_course([None], 0, None, None).days)
+        self.assertEqual([1, 3], course.to_dict()["days"])
+        self.assertRaises(AttributeError, setattr, course, "start_time", 605)
+        self.assertFalse(hasattr(course, "__dict__"))
+
+    def test_conflict_matrix(self):
+        courses = [
+            make_course([1, 3], 0, 515, 595), make_course([3], 0, 595, 685), make_course([4], 1, 875, 1045),
+            make_course([4], 2, 875, 1045), make_course([4], 0, 1000.5, 1100), make_course([None], 0, None, None),
+            make_course([5, None], 0, 605, 685)
+        ]
+        expected = [[a.conflicts(b) for b in courses] for a in courses]
+        self.assertEqual(expected, conflict_matrix(courses).tolist())
+
+    def test_add_course(self):
+        timetable = Timetable([])
+        self.assertTrue(timetable.add_course(make_course([1, 3], 0, 515, 595)))
+        self.assertFalse(timetable.add_course(make_course([1], 0, 585, 665)))
+        self.assertTrue(timetable.add_course(make_course([1], 0, 605, 685)))
+        self.assertEqual(2, len(timetable.courses))
+
+    def test_x_add_course(self):
+        x_timetable = Timetable([make_course([5], 0, 480, 600, code="NONE 0000")])
+        timetable = Timetable([])
+        self.assertTrue(timetable.x_add_course(make_course([5], 0, 515, 595), x_timetable))  # The first course is never filtered
+        self.assertFalse(timetable.x_add_course(make_course([5], 1, 575, 685), x_timetable))
+        self.assertTrue(timetable.x_add_course(make_course([4], 0, 575, 685), x_timetable))
+
+
+class BacktrackTestCase(unittest.TestCase):
+    def setUp(self):
+        self.section_combos = sample_section_combos()
+
+    def test_matches_exhaustive_search(self):
+        expected = set()
+        for combos in itertools.product(*self.section_combos):
+            courses = [course for combo in combos for course in combo.courses]
+            if not any(a.conflicts(b) for a, b in itertools.combinations(courses, 2)):
+                expected.add(tuple(course.code for course in courses))
+
+        result = [tuple(course.code for course in timetable.courses) for timetable in backtrack_timetables(self.section_combos)]
+        self.assertEqual(len(expected), len(result))
+        self.assertEqual(expected, set(result))
+
+    def test_narrow_timetables(self):
+        def pager(section_combos):
+            return TimetablePager(iter_timetables_of(section_combos))
+
+        def codes(timetables):
+            return sorted(tuple(course.code for course in timetable.courses) for timetable in timetables)
+
+        for i, combos in enumerate(self.section_combos):
+            for j in range(len(combos)):
+                narrowed_combos = list(self.section_combos)
+                narrowed_combos[i] = combos[:j] + combos[j + 1:]
+                narrowed = narrow_timetables(pager(self.section_combos), dict(none_list=[], section_combos=narrowed_combos))
+                narrowed_timetables = [Timetable([narrowed["sections"][index] for index in indices]) for indices in narrowed["timetables"]]
+                self.assertEqual(codes(backtrack_timetables(narrowed_combos)), codes(narrowed_timetables))
+
+        loosened_combos = self.section_combos[:2] + [self.section_combos[2] + [Timetable([make_course([3], 0, 875, 1045, "SYSC 2510 L4")])]]
+        self.assertIsNone(narrow_timetables(pager(self.section_combos), dict(none_list=[], section_combos=loosened_combos)))
+
+        # Narrowing does not depend on how many timetables previous has generated, and a narrowed pager can be narrowed again
+        first = pager(self.section_combos)
+        first.page(0, 1)
+        narrowed_combos = [combos[1:] for combos in self.section_combos]
+        narrowed = TimetablePager(narrow_timetables(first, dict(none_list=[], section_combos=narrowed_combos)))
+        self.assertEqual(codes(backtrack_timetables(narrowed_combos)), codes(narrowed))
+        self.assertEqual(len(list(narrowed)), narrowed.total())
+        again = narrow_timetables(narrowed, dict(none_list=[], section_combos=[combos[1:] for combos in narrowed_combos]))
+        self.assertEqual(codes(backtrack_timetables([combos[1:] for combos in narrowed_combos])), codes(TimetablePager(again)))
+
+        # A pager given its timetables has no search to narrow
+        listed = TimetablePager(dict(timetables=list(backtrack_timetables(self.section_combos)), none_list=[], section_combos=self.section_combos))
+        self.assertIsNone(narrow_timetables(listed, dict(none_list=[], section_combos=self.section_combos)))
+
+    def test_pager(self):
+        timetables = TimetablePager(iter_timetables_of(self.section_combos))
+        expected = [[course.code for course in timetable.courses] for timetable in backtrack_timetables(self.section_combos)]
+
+        self.assertEqual(expected, [[course.code for course in timetable.courses] for timetable in timetables.page(0, 10)])
+        self.assertTrue(all(isinstance(indices, tuple) for indices in timetables.indices()))
+        self.assertEqual(len(expected), timetables.total())
+
+    def test_ranked_pager(self):
+        # Only the best timetables are served, but the total is of every timetable
+        best = list(backtrack_timetables(self.section_combos))[:2]
+        timetables = TimetablePager(dict(timetables=best, ranked=True, none_list=[], section_combos=self.section_combos))
+
+        self.assertEqual(count_timetables(self.section_combos), timetables.total())
+        self.assertEqual(2, timetables.shown())
+
+    def test_without_numpy(self):
+        expected = [[course.crn for course in timetable.courses] for timetable in backtrack_timetables(self.section_combos)]
+
+        with mock.patch.object(data_structures, "np", None):
+            self.assertEqual(expected, [[course.crn for course in timetable.courses] for timetable in backtrack_timetables(self.section_combos)])
+
+    def test_count(self):
+        self.assertEqual(len(list(backtrack_timetables(self.section_combos))), count_timetables(self.section_combos))
+        self.assertEqual(2, count_timetables(self.section_combos[:1]))
+
+        for i in range(1, len(self.section_combos) + 1):
+            for combos in itertools.product(*[range(len(course_combos)) for course_combos in self.section_combos[:i]]):
+                subset = [[self.section_combos[j][k]] for j, k in enumerate(combos)]
+                self.assertEqual(len(list(backtrack_timetables(subset))), count_timetables(subset))
+
+    def test_no_combinations(self):
+        self.assertEqual([], list(backtrack_timetables([])))
+        self.assertEqual([], list(backtrack_timetables(self.section_combos + [[]])))
+        self.assertEqual(0, count_timetables([]))
+        self.assertEqual(0, count_timetables(self.section_combos + [[]]))
+
+    def test_single_course_conflict(self):
+        # With blocked off times, a lab is not checked against its lecture when the combinations are made
+        lecture = make_course([1, 3], 0, 515, 595, "SYSC 2004 A")
+        combos = [[Timetable([lecture, make_course([1], 0, 575, 685, "SYSC 2004 L1")]), Timetable([lecture, make_course([2], 0, 875, 985, "SYSC 2004 L2")])]]
+
+        self.assertEqual([["SYSC 2004 A", "SYSC 2004 L2"]], [[course.code for course in timetable.courses] for timetable in backtrack_timetables(combos)])
+        self.assertEqual(1, count_timetables(combos))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+
+from mydegree import app
+from mydegree.electives import ElectiveMatcher
+
+
+CATALOG = {
+    "SYSC 3110": {"semesters": "F"},
+    "SYSC 4101": {"semesters": "W"},
+    "ELEC 4705": {"semesters": "FW"},
+    "SYSC 2006": {"semesters": "W"},
+    "MATH 1104": {"semesters": "FW"}
+}
+
+LISTS = {"basicScience": [{"course_code": "BIOL 1103", "semester": "Fall"}, {"course_code": "CHEM 1002", "semester": "Both"}]}
+
+ELCTV_DATA = [
+    {
+        "total_num_needed": 1,
+        "req_data": [{"type": "general", "code": "(SYSC|ELEC) (3|4)(\\d{3})", "max_needed": 1}]
+    },
+    {
+        "total_num_needed": 2,
+        "req_data": [
+            {"type": "specific", "code": "ELEC 4705, SYSC 3110", "max_needed": 1},
+            {"type": "list", "code": "basicScience", "max_needed": 2}
+        ]
+    }
+]
+
+
+class ElectiveMatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.matcher = ElectiveMatcher(ELCTV_DATA, ["SYSC 2006", "MATH 1104"], CATALOG, LISTS)
+
+    def test_eligible(self):
+        self.assertEqual({"SYSC 3110", "SYSC 4101", "ELEC 4705"}, self.matcher.requirements[0][1][0].eligible)
+        self.assertEqual({"BIOL 1103", "CHEM 1002"}, self.matcher.requirements[1][1][1].offered["F"])
+        self.assertEqual({"CHEM 1002"}, self.matcher.requirements[1][1][1].offered["W"])
+
+    def test_overlapping_rules(self):
+        # Taking ELEC 4705 for the first requirement would leave SYSC 4101 counting for nothing
+        matched = self.matcher.match(["ELEC 4705", "SYSC 4101"])
+
+        self.assertEqual({"SYSC 4101": [0, 0], "ELEC 4705": [1, 0]}, matched["assigned"])
+        self.assertEqual([0, 1], matched["remaining"])
+
+    def test_limits(self):
+        matched = self.matcher.match(["SYSC 3110", "ELEC 4705", "SYSC 4101", "BIOL 1103", "SYSC 2006", "SYSC 5001"])
+
+        self.assertEqual(["SYSC 5001"], matched["unassigned"][-1:])
+        self.assertEqual(2, len(matched["unassigned"]))  # One of the three SYSC/ELEC courses and SYSC 5001
+        self.assertNotIn("SYSC 2006", matched["assigned"])  # Courses of the sequence are not electives
+        self.assertEqual([0, 0], matched["remaining"])
+
+    def test_pattern_outside_catalog(self):
+        self.assertEqual({"ELEC 4999": [0, 0]}, self.matcher.match(["ELEC 4999"])["assigned"])
+
+    def test_still_counting(self):
+        self.assertEqual(["BIOL 1103", "CHEM 1002", "ELEC 4705", "SYSC 3110"], self.matcher.still_counting(["SYSC 4101"], "F"))
+        # SYSC 3110 can take the place of ELEC 4705 in the second requirement, which frees ELEC 4705 for the first
+        self.assertEqual(["CHEM 1002", "SYSC 4101"], self.matcher.still_counting(["ELEC 4705", "BIOL 1103"], "W"))
+        self.assertEqual([], self.matcher.still_counting(["ELEC 4705", "BIOL 1103", "CHEM 1002", "SYSC 3110"], "W"))
+
+    def test_endpoint(self):
+        client = app.test_client()
+
+        with mock.patch.dict(app.config, WTF_CSRF_ENABLED=False):
+            client.post('/select_program/', data=dict(name_of_course = 1, catalog_year = 3))
+        matched = client.post('/plan/electives/', json=dict(courses = ["ELEC 4705", "BIOL 1103"], season = "F")).get_json()
+
+        self.assertEqual({"ELEC 4705", "BIOL 1103"}, set(matched["assigned"]))
+        self.assertEqual([2, 0, 1], matched["remaining"])
+        self.assertNotIn("ELEC 4705", matched["still_counting"])
+
+        for plan in [dict(), dict(courses = [["ELEC 4705"]]), dict(courses = [], season = "X")]:
+            self.assertEqual(400, client.post('/plan/electives/', json=plan).status_code)
+
+    def test_endpoint_without_program(self):
+        self.assertEqual(409, app.test_client().post('/plan/electives/', json=dict(courses = [])).status_code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+import pandas as pd
+
+import excel_to_sql
+
+
+def schedule(rows, file="winter_schedule.xlsx"):
+    columns = ["TERM", "CRN", "SUBJ", "CRSE", "SEQ", "CATALOG_TITLE", "DAYS", "START_TIME", "END_TIME"]
+    data = pd.DataFrame(rows, columns=columns)
+    data["FILE"] = file
+    return data
+
+
+class ParseScheduleTestCase(unittest.TestCase):
+    def test_parse_rows(self):
+        data = schedule([
+            [202410, 15360, "SYSC", 2310, "C", "Intro to Digital Systems", "TR", 1305.0, 1425.0],
+            [202410, 15361, "SYSC", 2310, "L1O", "Intro to Digital Systems", "R", 835.0, 1125.0],
+            [202410, 15336, "SYSC", 2004, "C", "Object-Oriented Sofware Dvlpmt", None, None, None],
+        ])
+        records = excel_to_sql.parse_schedule(data)["records"]
+
+        self.assertEqual(3, len(records))
+        self.assertEqual(
+            dict(regst_num=15361, course_code="SYSC 2310 L1O", course_title="Intro to Digital Systems", semester="Winter",
+                 first_day=4, second_day=None, week_frequency=1, start_time=515, end_time=685,
+                 department="SYSC", course_number="2310", section="L1O", section_kind="lab"),
+            records[1]
+        )
+        self.assertEqual((2, 4, 785, 865), (records[0]["first_day"], records[0]["second_day"], records[0]["start_time"], records[0]["end_time"]))
+        self.assertEqual((None, None), (records[2]["first_day"], records[2]["start_time"]))
+
+    def test_rejected_rows(self):
+        data = schedule([
+            [201910, 1, "SYSC", 2310, "A", "", "M", 835.0, 955.0],
+            [202410, 2, "SYSC", 2310, "B", "", "M", None, 955.0],
+            [202410, 3, "SYSC", 2310, "C", "", "MX", 835.0, 955.0],
+            [202410, 4, "SYSC", 2310, "D", "", "M", 35.0, 955.0],
+            [202410, 4, "SYSC", 2310, "E", "", "M", 835.0, 955.0],
+            [202410, 5, "SYSC", "23X0", "F", "", "M", 835.0, 955.0],
+        ])
+        parsed = excel_to_sql.parse_schedule(data)
+
+        self.assertEqual([], parsed["records"])
+        self.assertEqual(
+            ["unknown term", "incomplete meeting time", "unknown day", "bad start time", "duplicate CRN", "bad course number"],
+            list(parsed["rejected"]["reason"])
+        )
+        self.assertEqual("SYSC 23X0 F", parsed["rejected"]["course_code"].iloc[-1])
+
+    def test_last_file_wins(self):
+        data = pd.concat([
+            schedule([[202410, 1, "SYSC", 2310, "A", "", "M", 835.0, 955.0]], file="fall_schedule.xlsx"),
+            schedule([[202410, 1, "SYSC", 2310, "A", "", "W", 835.0, 955.0]], file="winter_schedule.xlsx"),
+        ], ignore_index=True)
+        parsed = excel_to_sql.parse_schedule(data)
+
+        self.assertEqual([3], [record["first_day"] for record in parsed["records"]])
+        self.assertEqual(0, len(parsed["rejected"]))
+
+
+class DiffSchedulesTestCase(unittest.TestCase):
+    def test_diff(self):
+        def row(crn, start_time, semester="Winter", department="SYSC"):
+            return dict(regst_num=crn, semester=semester, department=department, start_time=start_time)
+
+        existing = [row(1, 515), row(2, 605), row(3, 695), row(4, 785, semester="Fall"), row(5, 875, department="AFRI")]
+        records = [row(1, 515), row(2, 610), row(6, 1055)]
+        changes = excel_to_sql.diff_schedules(records, existing, ["Winter"])
+
+        self.assertEqual([6], [record["regst_num"] for record in changes["added"]])
+        self.assertEqual([2], [record["regst_num"] for record in changes["changed"]])
+        self.assertEqual([3], [record["regst_num"] for record in changes["removed"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from mydegree import app, catalog
+from mydegree.timetable_cache import timetable_cache
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        catalog.section_catalog.refresh()
+        timetable_cache.clear()
+
+    def handle_input(self):
+        term_data = json.dumps(dict(course_codes = ["SYSC 2006", "MATH 1104"], semester = "Winter"))
+
+        with self.assertLogs('mydegree.requests', level='INFO') as logs:
+            response = self.client.get('/handle_input/', query_string=dict(term_data = term_data))
+
+        return response, json.loads(logs.records[-1].getMessage())
+
+    def test_server_timing(self):
+        response, record = self.handle_input()
+        metrics = [metric.split(';')[0] for metric in response.headers['Server-Timing'].split(', ')]
+
+        self.assertEqual('/handle_input/', record['path'])
+        self.assertEqual(200, record['status'])
+        self.assertEqual(list(record['stages']) + list(record['counts']) + ['total'], metrics)
+        self.assertIn('sections', record['stages'])
+        self.assertIn('catalog_load', record['stages'])
+        self.assertGreater(record['counts']['queries'], 0)  # The catalog was dropped, so the semester is loaded again
+        self.assertGreater(record['counts']['combinations'], 0)
+
+    def test_profile(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with mock.patch.dict(app.config, PROFILE_THRESHOLD_MS=0.001, PROFILE_DIR=folder):
+                _, record = self.handle_input()
+
+            self.assertTrue(os.path.exists(record['profile']))
+
+    def test_off(self):
+        with mock.patch.dict(app.config, REQUEST_TIMING=False):
+            response = self.client.get('/timetables/cache/')
+
+        self.assertNotIn('Server-Timing', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
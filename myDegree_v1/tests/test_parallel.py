@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+from mydegree import app, parallel
+from mydegree.data_structures import TimetablePager, backtrack_timetables, count_timetables, indexed_timetables
+from tests.test_data_structures import sample_section_combos
+
+
+class ParallelSearchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.section_combos = sample_section_combos()
+        self.expected = [[course.crn for course in timetable.courses] for timetable in backtrack_timetables(self.section_combos)]
+
+    def check(self):
+        result = parallel.parallel_search(self.section_combos)
+        self.assertEqual(self.expected, [[course.crn for course in timetable.courses] for timetable in result])
+
+    def test_in_process(self):
+        with mock.patch.dict(app.config, PARALLEL_WORKERS=0):
+            self.check()
+
+    def test_one_worker(self):
+        # One process is no faster than this one, so the search stays here
+        levels, _, _ = parallel.compact_levels(self.section_combos)
+
+        with mock.patch.dict(app.config, PARALLEL_WORKERS=1, PARALLEL_THRESHOLD=1):
+            self.assertFalse(parallel.use_pool(levels))
+            self.check()
+
+    def test_pool(self):
+        with mock.patch.dict(app.config, PARALLEL_WORKERS=2, PARALLEL_THRESHOLD=1):
+            self.check()
+
+    def test_pager_uses_pool(self):
+        # The timetables of /filters/ and their count are split across the processes too
+        with mock.patch.dict(app.config, PARALLEL_WORKERS=2, PARALLEL_THRESHOLD=1), \
+                mock.patch.object(parallel, "get_pool", wraps=parallel.get_pool) as get_pool:
+            pager = TimetablePager(dict(indexed_timetables(self.section_combos), none_list=[], section_combos=self.section_combos))
+            result = [[course.crn for course in timetable.courses] for timetable in pager]
+            total = count_timetables(self.section_combos)
+
+        self.assertEqual(self.expected, result)
+        self.assertEqual(len(self.expected), total)
+        self.assertEqual(2, get_pool.call_count)
+
+    def test_no_combinations(self):
+        with mock.patch.dict(app.config, PARALLEL_WORKERS=2, PARALLEL_THRESHOLD=1):
+            self.assertEqual([], parallel.parallel_search(self.section_combos + [[]]))
+            self.assertEqual(0, count_timetables(self.section_combos + [[]]))
+
+    def test_partitions(self):
+        levels, rows, sections = parallel.compact_levels(self.section_combos)
+        parts = parallel.partitions(levels, 4)
+        self.assertEqual(list(range(len(levels[0][1]))), [position for part in parts for position in part])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest import mock
+
+from mydegree import app, program_data
+from mydegree.planner import PlanGenerator
+from mydegree.prerequisites import PrerequisiteIndex, prerequisite_index
+
+
+def leaf(code):
+    return {"data": code, "children": []}
+
+
+COURSES = {
+    "SYSC 1005": {"semesters": "F"},
+    "SYSC 2006": {"semesters": "W", "prerequisites": leaf("SYSC 1005")},
+    "SYSC 2004": {"semesters": "FW", "prerequisites": leaf("SYSC 1005")},
+    "SYSC 3310": {"semesters": "F", "prerequisites": {"data": "&", "children": [leaf("SYSC 2006"), leaf("cELEC 2501")]}},
+    "SYSC 4001": {"semesters": "FW", "prerequisites": {"data": "|", "children": [leaf("SYSC 3310"), leaf("MATH 9999")]}},
+    "ELEC 2501": {"semesters": "FW"},
+    "MATH 1004": {"semesters": "FW", "prerequisites": leaf("MATH 0005")}
+}
+
+SEQUENCE = [["SYSC 1005", "MATH 1004"], ["SYSC 2006", "SYSC 2004"], ["SYSC 3310", "ELEC 2501"], ["SYSC 4001", "ENGELCTV"]]
+
+
+class PlanGeneratorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = PrerequisiteIndex(COURSES)
+
+    def plan(self, passed=(), **options):
+        return PlanGenerator(self.index, COURSES, SEQUENCE, passed).plan(**options)
+
+    def test_sequence(self):
+        plan = self.plan()
+
+        # ELEC 2501 is on the longest chain (to SYSC 3310 and SYSC 4001), so it goes before MATH 1004
+        self.assertEqual([["SYSC 1005", "ELEC 2501"], ["MATH 1004", "SYSC 2006"], ["SYSC 2004", "SYSC 3310"], ["SYSC 4001", "ENGELCTV"]], [term["courses"] for term in plan["terms"]])
+        self.assertEqual(["F", "W", "F", "W"], [term["season"] for term in plan["terms"]])
+        # MATH 0005 is not in the plan, so it is assumed to be passed
+        self.assertEqual({"MATH 1004": ["MATH 0005"]}, self.index.validate([term["courses"] for term in plan["terms"]]))
+
+    def test_critical_path(self):
+        # With one course a term, the courses SYSC 4001 waits on go before SYSC 2004 and the placeholder
+        plan = self.plan(default_load=1)
+        courses = [code for term in plan["terms"] for code in term["courses"]]
+
+        self.assertLess(courses.index("SYSC 2006"), courses.index("SYSC 2004"))
+        self.assertEqual("ENGELCTV", courses[-1])
+        self.assertEqual({"MATH 1004": ["MATH 0005"]}, self.index.validate([term["courses"] for term in plan["terms"]]))
+
+    def test_off_pattern(self):
+        # Failing SYSC 1005 and taking a co-op term off: SYSC 1005 is only offered in the fall
+        plan = self.plan(["MATH 1004"], start="W", load_limits=[2, 0])
+
+        self.assertEqual(dict(season = "W", courses = ["ELEC 2501", "ENGELCTV"]), plan["terms"][0])
+        self.assertEqual(dict(season = "F", courses = []), plan["terms"][1])
+        self.assertEqual(dict(season = "W", courses = []), plan["terms"][2])
+        self.assertEqual(dict(season = "F", courses = ["SYSC 1005"]), plan["terms"][3])
+        self.assertEqual([], plan["unplanned"])
+
+    def test_summer(self):
+        plan = self.plan(["SYSC 1005", "MATH 1004"], start="W", summer=True)
+        self.assertEqual(["W", "S", "F", "W"], [term["season"] for term in plan["terms"]])
+
+    def test_full_year_passed(self):
+        sequence = SEQUENCE[:3] + [["SYSC 4001", "SYSC 4907"], ["SYSC 4907"]]
+        plan = PlanGenerator(self.index, COURSES, sequence, ["SYSC 4907"]).plan()
+        self.assertNotIn("SYSC 4907", [code for term in plan["terms"] for code in term["courses"]])
+
+    def test_never_offered(self):
+        courses = dict(COURSES, **{"SYSC 4001": {"semesters": "S"}})
+        plan = PlanGenerator(self.index, courses, SEQUENCE).plan()
+        self.assertEqual(["SYSC 4001"], plan["unplanned"])
+
+    def test_programs(self):
+        # Every program of every catalog year is planned with its prerequisites met by courses of the plan
+        for year in program_data.mainline_courses.get().terms:
+            for sequence in year:
+                generator = PlanGenerator(prerequisite_index.get(), program_data.elective_courses.get().courses, sequence)
+                plan = generator.plan()
+                missing = prerequisite_index.get().validate([term["courses"] for term in plan["terms"]])
+
+                self.assertEqual([], plan["unplanned"])
+                self.assertEqual({}, {code: courses for code, courses in missing.items() if generator.outside[code] == 0})
+
+    def test_endpoint(self):
+        client = app.test_client()
+
+        with mock.patch.dict(app.config, WTF_CSRF_ENABLED=False):
+            client.post('/select_program/', data=dict(name_of_course = 0, catalog_year = 3))
+        plan = client.post('/plan/generate/', json=dict(passed = [], load_limits = [5])).get_json()
+
+        self.assertEqual(5, len(plan["terms"][0]["courses"]))
+        self.assertEqual([], plan["unplanned"])
+
+        for options in [[], dict(passed = [["SYSC 1005"]]), dict(load_limits = ["5"]), dict(start = "X"), dict(default_load = -1), dict(summer = "yes")]:
+            self.assertEqual(400, client.post('/plan/generate/', json=options).status_code)
+
+    def test_endpoint_without_program(self):
+        self.assertEqual(409, app.test_client().post('/plan/generate/', json=dict()).status_code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+from mydegree import app
+from mydegree.prerequisites import PrerequisiteIndex, prerequisite_index
+
+
+def leaf(code):
+    return {"data": code, "children": []}
+
+
+COURSES = {
+    "SYSC 2006": {"prerequisites": leaf("SYSC 1005")},
+    "SYSC 3310": {"prerequisites": {"data": "&", "children": [leaf("SYSC 2006"), leaf("cELEC 2501")]}},
+    "SYSC 4001": {"prerequisites": {"data": "|", "children": [leaf("SYSC 3310"), leaf("SYSC 2004")]}},
+    "SYSC 1005": {"prerequisites": {"data": None, "children": [], "conditions": ["year standing"]}},
+    "ELEC 2501": {}
+}
+
+
+class PrerequisiteIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = PrerequisiteIndex(COURSES)
+
+    def test_valid_plan(self):
+        self.assertEqual({}, self.index.validate([["SYSC 1005"], ["SYSC 2006", "ELEC 2501"], ["SYSC 3310"], ["SYSC 4001"]]))
+
+    def test_concurrent(self):
+        # ELEC 2501 may be taken in the same term as SYSC 3310 but SYSC 2006 may not
+        self.assertEqual({"SYSC 3310": ["SYSC 2006"]}, self.index.validate([["SYSC 1005"], ["SYSC 2006", "SYSC 3310", "ELEC 2501"]]))
+        self.assertEqual({"SYSC 3310": ["ELEC 2501"]}, self.index.validate([["SYSC 1005"], ["SYSC 2006"], ["SYSC 3310"], ["ELEC 2501"]]))
+
+    def test_alternatives(self):
+        self.assertEqual({"SYSC 4001": [["SYSC 3310", "SYSC 2004"]]}, self.index.validate([["SYSC 4001"]]))
+        self.assertEqual({}, self.index.validate([["SYSC 2004"], ["SYSC 4001"]]))
+
+    def test_unknown_courses(self):
+        self.assertEqual({}, self.index.validate([["BASICSCI", "NONE 0000"]]))
+
+    def test_graph(self):
+        self.assertEqual(["ELEC 2501", "SYSC 2006"], self.index.course_codes(self.index.prerequisites["SYSC 3310"]))
+        self.assertEqual(["SYSC 4001"], self.index.course_codes(self.index.dependents["SYSC 2004"]))
+        self.assertEqual(["ELEC 2501", "SYSC 1005", "SYSC 2004", "SYSC 2006", "SYSC 3310"], self.index.course_codes(self.index.ancestors["SYSC 4001"]))
+        self.assertEqual(["SYSC 2006", "SYSC 3310", "SYSC 4001"], self.index.course_codes(self.index.descendants["SYSC 1005"]))
+        self.assertLess(self.index.order.index("SYSC 2006"), self.index.order.index("SYSC 3310"))
+
+    def test_unlocks(self):
+        self.assertEqual(["SYSC 2006"], self.index.unlocks("SYSC 1005"))
+        self.assertEqual([], self.index.unlocks("SYSC 2006"))
+        self.assertEqual(["SYSC 3310"], self.index.unlocks("SYSC 2006", ["SYSC 1005", "ELEC 2501"]))
+        self.assertEqual(["SYSC 4001"], self.index.unlocks("SYSC 2004"))
+
+    def test_chain(self):
+        # Of the alternatives, SYSC 2004 is the shorter chain
+        self.assertEqual(["SYSC 2004", "SYSC 4001"], self.index.chain("SYSC 4001"))
+        self.assertEqual(["SYSC 1005", "SYSC 2006", "SYSC 3310"], self.index.chain("SYSC 3310"))
+        self.assertEqual(["SYSC 3310"], self.index.chain("SYSC 3310", ["SYSC 2006"]))
+        self.assertEqual([], self.index.chain("SYSC 3310", ["SYSC 3310"]))
+        self.assertEqual(3, self.index.depths["SYSC 3310"])
+
+    def test_blocked_by(self):
+        # SYSC 4001 can still be taken after SYSC 2004
+        self.assertEqual(["SYSC 2006", "SYSC 3310"], self.index.blocked_by("SYSC 1005"))
+        self.assertEqual([], self.index.blocked_by("SYSC 3310"))
+        self.assertEqual([], self.index.blocked_by("SYSC 1005", ["SYSC 2006", "SYSC 3310"]))
+
+    def test_cycle(self):
+        index = PrerequisiteIndex({"A 1000": {"prerequisites": leaf("B 1000")}, "B 1000": {"prerequisites": leaf("A 1000")}})
+
+        self.assertEqual(["A 1000", "B 1000"], index.course_codes(index.ancestors["A 1000"]))
+        self.assertEqual(["B 1000"], index.blocked_by("A 1000"))
+
+    def test_endpoint(self):
+        response = app.test_client().post('/plan/validate/', json=dict(terms=[["SYSC 2006", "SYSC 2320"], ["SYSC 3310"]]))
+        self.assertNotIn("SYSC 3310", response.get_json()["missing"])
+
+        response = app.test_client().post('/plan/validate/', json=dict(terms=[["SYSC 3310", "SYSC 2006"]]))
+        self.assertEqual(dict(missing = {"SYSC 3310": ["SYSC 2006", ["SYSC 2320", "SYSC 3006"]]}), response.get_json())
+
+    def test_course_endpoint(self):
+        response = app.test_client().post('/plan/course/', json=dict(code="SYSC 2006", passed=["SYSC 1005"]))
+        index = prerequisite_index.get()
+
+        self.assertEqual(
+            dict(unlocks=index.unlocks("SYSC 2006", ["SYSC 1005"]), chain=index.chain("SYSC 2006", ["SYSC 1005"]), blocked_by=index.blocked_by("SYSC 2006", ["SYSC 1005"])),
+            response.get_json()
+        )
+        self.assertEqual(["SYSC 2006"], response.get_json()["chain"])
+        self.assertIn("SYSC 3310", response.get_json()["blocked_by"])
+
+        for query in [dict(), dict(code=["SYSC 2006"]), dict(code="SYSC 2006", passed="SYSC 1005")]:
+            self.assertEqual(400, app.test_client().post('/plan/course/', json=query).status_code)
+
+    def test_endpoint_bad_input(self):
+        for plan in [dict(), dict(terms=[[["SYSC 2006"]]]), dict(terms="SYSC 2006"), ["SYSC 2006"]]:
+            self.assertEqual(400, app.test_client().post('/plan/validate/', json=plan).status_code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from mydegree import app, program_data
+
+
+class ProgramDataTestCase(unittest.TestCase):
+    def test_freeze(self):
+        frozen = program_data.freeze({"SYSC 2006": {"preclusions": ["SYSC 2002"]}})
+
+        with self.assertRaises(TypeError):
+            frozen["SYSC 2006"]["semesters"] = "FW"
+        self.assertEqual(("SYSC 2002",), frozen["SYSC 2006"]["preclusions"])
+
+    def test_course_info_json(self):
+        electives = program_data.elective_courses.get()
+        course_info = json.loads(electives.course_info_json)
+
+        self.assertEqual(set(electives.courses), set(course_info))
+        self.assertEqual(electives.courses["SYSC 2006"]["course_title"], course_info["SYSC 2006"]["title"])
+
+    def test_mainline_codes(self):
+        mainline = program_data.mainline_courses.get()
+        self.assertEqual([code for term in mainline.terms[0][0] for code in term], json.loads(mainline.codes_json[0][0]))
+
+    def test_preload(self):
+        # Data files made by the tests are not loaded with the app's
+        self.assertTrue(all(os.path.exists(data_file.path) for data_file in program_data.data_files))
+        program_data.preload()
+
+    def test_reload_in_debug(self):
+        with tempfile.TemporaryDirectory() as folder:
+            data_file = program_data.DataFile('mainline_courses.json', program_data.freeze, register=False)
+            data_file.path = os.path.join(folder, 'data.json')
+
+            with open(data_file.path, 'w') as file:
+                json.dump([1], file)
+            self.assertEqual((1,), data_file.get())
+
+            with open(data_file.path, 'w') as file:
+                json.dump([1, 2], file)
+            self.assertEqual((1,), data_file.get())  # The file is only read again in debug mode
+
+            with mock.patch.dict(app.config, DEBUG=True):
+                self.assertEqual((1, 2), data_file.get())
+
+    def test_reload_when_watched(self):
+        with tempfile.TemporaryDirectory() as folder:
+            data_file = program_data.DataFile('mainline_courses.json', program_data.freeze, watch=True, register=False)
+            data_file.path = os.path.join(folder, 'data.json')
+
+            with open(data_file.path, 'w') as file:
+                json.dump([1], file)
+            self.assertEqual((1,), data_file.get())
+
+            with open(data_file.path, 'w') as file:
+                json.dump([1, 2], file)
+            self.assertEqual((1, 2), data_file.get())
+
+            # A file that can not be parsed keeps the previous version, until it can
+            with open(data_file.path, 'w') as file:
+                file.write('[1, 2, ')
+            with mock.patch.object(app.logger, 'warning'):
+                self.assertEqual((1, 2), data_file.get())
+
+            with open(data_file.path, 'w') as file:
+                json.dump([1, 2, 3], file)
+            self.assertEqual((1, 2, 3), data_file.get())
+
+
+if __name__ == '__main__':
+    unittest.main()
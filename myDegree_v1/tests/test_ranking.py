@@ -0,0 +1,34 @@
+import unittest
+
+from mydegree.data_structures import Timetable, backtrack_timetables
+from mydegree.ranking import SCORES, top_timetables
+from tests.test_data_structures import make_course, sample_section_combos
+
+
+class RankingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.section_combos = sample_section_combos()
+
+    def test_scores(self):
+        mask = make_course([1, 3], 0, 515, 595).mask | make_course([1], 0, 605, 685).mask
+        self.assertEqual(2, SCORES["days"].cost(mask))
+        self.assertEqual(9, SCORES["gaps"].cost(mask))  # 9:56 to 10:04 on Monday
+        self.assertEqual(-515, SCORES["start"].cost(mask))
+        self.assertEqual(685, SCORES["finish"].cost(mask))
+
+    def test_matches_sorted_search(self):
+        timetables = list(backtrack_timetables(self.section_combos))
+
+        for name, score in SCORES.items():
+            for k in [1, 2, len(timetables) + 1]:
+                expected = sorted(score.cost(timetable.mask) for timetable in timetables)[:k]
+                self.assertEqual(expected, [score.cost(timetable.mask) for timetable in top_timetables(self.section_combos, score, k)], name)
+
+    def test_single_course(self):
+        for combos in [self.section_combos[:1], [self.section_combos[0] + [Timetable([make_course([1], 0, 515, 595), make_course([1], 0, 575, 655)])]]]:
+            expected = sorted(SCORES["finish"].cost(timetable.mask) for timetable in backtrack_timetables(combos))
+            self.assertEqual(expected, [SCORES["finish"].cost(timetable.mask) for timetable in top_timetables(combos, SCORES["finish"])])
+
+
+if __name__ == '__main__':
+    unittest.main()
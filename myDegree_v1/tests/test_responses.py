@@ -0,0 +1,49 @@
+import gzip
+import unittest
+from unittest import mock
+
+from mydegree import app, responses
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+class ResponsesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.url = '/static/data/eng_electives.json'
+
+    def test_gzip(self):
+        with mock.patch.object(responses, 'brotli', None):
+            plain = self.client.get(self.url).data
+            response = self.client.get(self.url, headers=GZIP)
+
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(plain, gzip.decompress(response.data))
+        self.assertLess(len(response.data), len(plain) // 5)
+
+    def test_not_modified(self):
+        with mock.patch.object(responses, 'brotli', None):
+            etag = self.client.get(self.url, headers=GZIP).headers['ETag']
+            response = self.client.get(self.url, headers=dict(GZIP, **{'If-None-Match': etag}))
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b'', response.data)
+
+    def test_small_json(self):
+        response = self.client.get('/timetables/cache/', headers=GZIP)
+        etag = response.headers['ETag']
+
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('private', response.headers['Cache-Control'])
+        self.assertEqual(304, self.client.get('/timetables/cache/', headers={'If-None-Match': etag}).status_code)
+
+    def test_off(self):
+        with mock.patch.dict(app.config, RESPONSE_COMPRESSION=False):
+            response = self.client.get(self.url, headers=GZIP)
+
+        self.assertNotIn('Content-Encoding', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import json
+import unittest
+
+from mydegree import app
+
+
+class TimetablePageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        term_data = json.dumps(dict(course_codes = ["SYSC 2006", "MATH 1104"], semester = "Winter"))
+        self.client.get('/handle_input/', query_string=dict(term_data = term_data))
+
+    def test_indices(self):
+        data = self.client.get('/timetables/', query_string=dict(offset = 0, limit = 5)).get_json()
+        self.assertEqual(5, len(data['timetables']))
+
+        for timetable in data['timetables']:
+            courses = {data['sections'][index]['code'].rsplit(' ', 1)[0] for index in timetable}
+            self.assertEqual({"SYSC 2006", "MATH 1104"}, courses)
+
+    def test_section_table_sent_once(self):
+        first = self.client.get('/timetables/', query_string=dict(offset = 0, limit = 5)).get_json()
+        second = self.client.get('/timetables/', query_string=dict(offset = 5, limit = 5, table = first['table'])).get_json()
+
+        self.assertNotIn('sections', second)
+        self.assertEqual(first['table'], second['table'])
+
+
+if __name__ == '__main__':
+    unittest.main()
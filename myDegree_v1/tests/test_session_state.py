@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from mydegree.session_state import MemoryStateStore, PlannerState, SqliteStateStore
+
+
+class StateStoreTestCase(unittest.TestCase):
+    def check_store(self, store):
+        state = store.load("first")
+        state.list_of_names.append("SYSC 2004")
+        state.blocked_off = [dict(day=5, startTime=480, endTime=600)]
+        store.save("first", state)
+
+        self.assertEqual(["SYSC 2004"], store.load("first").list_of_names)
+        self.assertEqual([], store.load("second").list_of_names)  # Students do not share state
+
+        store.delete("first")
+        self.assertEqual([], store.load("first").list_of_names)
+
+    def test_memory_store(self):
+        self.check_store(MemoryStateStore())
+
+    def test_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as folder:
+            self.check_store(SqliteStateStore(os.path.join(folder, "planner_state.db")))
+
+    def test_memory_store_copies(self):
+        store = MemoryStateStore()
+        store.save("first", PlannerState(list_of_names=["SYSC 2004"]))
+        store.load("first").list_of_names.append("SYSC 2006")  # Not saved
+        self.assertEqual(["SYSC 2004"], store.load("first").list_of_names)
+
+    def check_eviction(self, store, now):
+        pager = object()
+
+        for state_id in ["first", "second", "third"]:
+            state = PlannerState(list_of_names=[state_id])
+            state.timetables = pager
+            store.save(state_id, state)
+            now[0] += 1
+
+        # The least recently used state is dropped once there are more than max_entries
+        self.assertIsNone(store.load("first").timetables)
+        self.assertIs(pager, store.load("third").timetables)
+
+        # As is a state not used for ttl seconds
+        now[0] += 100
+        self.assertIsNone(store.load("third").timetables)
+
+    def test_memory_store_eviction(self):
+        now = [0]
+        self.check_eviction(MemoryStateStore(max_entries=2, ttl=60, clock=lambda: now[0]), now)
+
+    def test_sqlite_store_eviction(self):
+        now = [0]
+
+        with tempfile.TemporaryDirectory() as folder:
+            store = SqliteStateStore(os.path.join(folder, "planner_state.db"), max_entries=2, ttl=60, clock=lambda: now[0])
+            self.check_eviction(store, now)
+            # The state itself is still saved
+            self.assertEqual(["first"], store.load("first").list_of_names)
+
+    def test_x_timetable(self):
+        state = PlannerState(blocked_off=[dict(day=5, startTime=480, endTime=600), dict(day=1, startTime=515, endTime=595)])
+        self.assertEqual([(5,), (1,)], [course.days for course in state.x_timetable().courses])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+from mydegree.data_structures import Course, Timetable, backtrack_timetables
+from mydegree.timetable_cache import TimetableCache, timetable_key
+from tests.test_data_structures import sample_section_combos
+
+
+def blocked_off(*intervals):
+    return Timetable([Course(0, "NONE 0000", "Filler Course", [day], 0, start_time, end_time) for day, start_time, end_time in intervals])
+
+
+class TimetableKeyTestCase(unittest.TestCase):
+    def test_normalized(self):
+        regex = {"SYSC 2004": "", "SYSC 2006": " A"}
+        self.assertEqual(
+            timetable_key(["SYSC 2004", "SYSC 2006"], blocked_off((1, 480, 540), (3, 480, 540)), regex, "Winter"),
+            timetable_key(["SYSC 2006", "SYSC 2004"], blocked_off((3, 480, 540), (1, 480, 540)), regex, "Winter")
+        )
+        self.assertNotEqual(
+            timetable_key(["SYSC 2004"], blocked_off((1, 480, 540)), regex, "Winter"),
+            timetable_key(["SYSC 2004"], blocked_off((1, 480, 541)), regex, "Winter")
+        )
+        self.assertNotEqual(
+            timetable_key(["SYSC 2004"], Timetable([]), regex, "Winter"),
+            timetable_key(["SYSC 2004"], Timetable([]), regex, "Fall")
+        )
+
+
+class TimetableCacheTestCase(unittest.TestCase):
+    @mock.patch("mydegree.timetable_cache.catalog.section_catalog.version", return_value=(1, 1))
+    @mock.patch("mydegree.timetable_cache.timetable_sections")
+    def test_lru(self, timetable_sections, version):
+        timetable_sections.side_effect = lambda *args: dict(none_list=[], section_combos=[])
+        cache = TimetableCache(max_entries=2, max_bytes=1 << 20)
+
+        first = cache.pager(["SYSC 2004"], Timetable([]), {"SYSC 2004": ""}, "Winter")
+        self.assertIs(first, cache.pager(["SYSC 2004"], Timetable([]), {"SYSC 2004": ""}, "Winter"))
+        cache.pager(["SYSC 2006"], Timetable([]), {"SYSC 2006": ""}, "Winter")
+        cache.pager(["SYSC 2310"], Timetable([]), {"SYSC 2310": ""}, "Winter")
+
+        self.assertEqual(dict(hits=1, misses=3, narrowed=0, evictions=1, entries=2), {k: v for k, v in cache.stats().items() if k != "bytes"})
+
+        version.return_value = (2, 1)  # CourseData changed
+        self.assertIsNot(first, cache.pager(["SYSC 2004"], Timetable([]), {"SYSC 2004": ""}, "Winter"))
+        self.assertEqual(1, cache.stats()["entries"])
+
+    @mock.patch("mydegree.timetable_cache.catalog.section_catalog.version", return_value=(1, 1))
+    @mock.patch("mydegree.timetable_cache.timetable_sections")
+    def test_narrowed(self, timetable_sections, version):
+        section_combos = sample_section_combos()
+        narrowed_combos = [combos[1:] for combos in section_combos]
+        timetable_sections.side_effect = lambda courses, x_timetable, section_regex, semester: dict(
+            none_list=[], section_combos=narrowed_combos if section_regex["SYSC 2004"] else section_combos
+        )
+        cache = TimetableCache(max_entries=4, max_bytes=1 << 20)
+
+        first = cache.pager(["SYSC 2004"], Timetable([]), {"SYSC 2004": ""}, "Winter")
+        first.page(0, 1)  # Only the first page was shown before the filters were tightened
+        narrowed = cache.pager(["SYSC 2004"], Timetable([]), {"SYSC 2004": " [BC]"}, "Winter", previous=first)
+
+        self.assertEqual(1, cache.stats()["narrowed"])
+        self.assertEqual(
+            sorted([course.code for course in timetable.courses] for timetable in backtrack_timetables(narrowed_combos)),
+            sorted([course.code for course in timetable.courses] for timetable in narrowed)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()